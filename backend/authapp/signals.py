@@ -0,0 +1,37 @@
+# authapp/signals.py
+from django.contrib.auth.models import User, Group
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from common.permisos import CLAVE_SESION, invalidar_permisos
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def on_permisos_m2m(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidar_permisos()
+
+
+@receiver(post_delete, sender=Group)
+def on_grupo_borrado(sender, instance, **kwargs):
+    invalidar_permisos()
+
+
+@receiver(post_save, sender=User)
+def on_usuario_guardado(sender, instance, created, update_fields=None, **kwargs):
+    # El login guarda last_login en cada inicio de sesión: eso no cambia permisos
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    # is_superuser / is_active afectan has_perm
+    if not created:
+        invalidar_permisos()
+
+
+@receiver(user_logged_in)
+def on_login(sender, request, user, **kwargs):
+    # Recalcular en el primer render después de iniciar sesión
+    if request is not None and hasattr(request, "session"):
+        request.session.pop(CLAVE_SESION, None)
@@ -54,6 +54,8 @@ INSTALLED_APPS = [
 # ======================================
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # (WhiteNoise se inserta aquí si está instalado y SERVIR_ESTATICOS; ver STATIC FILES)
+    "common.middleware.InstrumentacionConsultasMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -113,9 +115,27 @@ DATABASES = {
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "3306"),
         "OPTIONS": {"charset": "utf8mb4"},
+        # Conexiones persistentes por worker; antes de reusar una se verifica
+        # que siga viva. Bajo ASGI (uvicorn) usar DB_CONN_MAX_AGE=0.
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Pool de conexiones por proceso (opcional, DB_POOL=True). Las conexiones
+# vuelven al pool al final de cada request, por eso CONN_MAX_AGE = 0.
+# TAMANO es por worker: igual a los hilos de gunicorn (GUNICORN_THREADS).
+if os.getenv("DB_POOL", "False") == "True":
+    DATABASES["default"].update({
+        "ENGINE": "common.db.mysql_pool",
+        "CONN_MAX_AGE": 0,
+        "POOL": {
+            "TAMANO": int(os.getenv("DB_POOL_TAMANO", os.getenv("GUNICORN_THREADS", "4"))),
+            "ESPERA": float(os.getenv("DB_POOL_ESPERA", "5")),
+            "MAX_INACTIVA": float(os.getenv("DB_POOL_MAX_INACTIVA", "300")),
+        },
+    })
+
 
 # ======================================
 # PASSWORD VALIDATION
@@ -154,6 +174,133 @@ STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# collectstatic genera nombres con hash del contenido (manifest) y variantes
+# .gz (zopfli) y .br (brotli) de cada archivo de texto; ver common/almacenamiento.py
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "common.almacenamiento.EstaticosComprimidos"},
+}
+
+# En producción gunicorn sirve los estáticos con WhiteNoise: entrega la
+# variante comprimida que acepte el navegador y marca los archivos con hash
+# como immutable (cache de un año). Los que no llevan hash: un día.
+# WhiteNoise es solo síncrono: bajo ASGI obligaría a cada vista async a
+# pasar por el adaptador sync→async. El servicio uvicorn (web_asgi) no
+# sirve estáticos y arranca con SERVIR_ESTATICOS=False.
+SERVIR_ESTATICOS = os.getenv("SERVIR_ESTATICOS", "True") == "True"
+try:
+    import whitenoise  # noqa: F401
+except ImportError:
+    WHITENOISE = False
+else:
+    WHITENOISE = SERVIR_ESTATICOS
+
+if WHITENOISE:
+    MIDDLEWARE.insert(1, "whitenoise.middleware.WhiteNoiseMiddleware")
+    WHITENOISE_MAX_AGE = 60 * 60 * 24
+
+
+# ======================================
+# MEDIA (imágenes subidas)
+# ======================================
+MEDIA_URL = "/media/"
+MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", BASE_DIR / "media"))
+
+# Sin proxy delante (docker-compose), Django sirve /media/ con cabeceras de
+# cache; con nginx o un CDN sirviendo MEDIA_ROOT, poner SERVIR_MEDIA=False
+SERVIR_MEDIA = os.getenv("SERVIR_MEDIA", "True") == "True"
+
+
+# ======================================
+# CACHE
+# ======================================
+# archivo: disco compartido por los workers del host (por defecto)
+# redis:   Redis o compatible en REDIS_URL (requiere `pip install redis`)
+# memoria: LocMem por proceso, solo desarrollo/tests
+REDIS_URL = os.getenv("REDIS_URL", "")
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "redis" if REDIS_URL else "archivo")
+CACHE_DIR = Path(os.getenv("CACHE_DIR", BASE_DIR / ".cache"))
+
+# Un alias por módulo: claves y contadores separados, se pueden limpiar por separado
+# ("carritos" guarda las órdenes en borrador del POS: no limpiarlo en horas de venta)
+CACHE_NAMESPACES = ["catalogo", "permisos", "dashboards", "reportes", "carritos"]
+
+
+def _config_cache(namespace):
+    if CACHE_BACKEND == "redis":
+        return {
+            "BACKEND": "common.cache_backends.RedisConContadores",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": f"sipv:{namespace}",
+        }
+    if CACHE_BACKEND == "memoria":
+        return {
+            "BACKEND": "common.cache_backends.MemoriaConContadores",
+            "LOCATION": f"sipv-{namespace}",
+        }
+    return {
+        "BACKEND": "common.cache_backends.ArchivoConContadores",
+        "LOCATION": str(CACHE_DIR / namespace),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+
+
+CACHES = {
+    alias: _config_cache(alias)
+    for alias in ["default", *CACHE_NAMESPACES]
+}
+
+
+# ======================================
+# FACTURACIÓN
+# ======================================
+# True: cada venta se factura al cobrarla (api_completar_venta). False: el
+# cobro no factura y las ventas se facturan en lote al cierre del día
+# (`manage.py facturar_pendientes` o POST /facturas/api/facturar-lote/).
+SIPV_FACTURAR_AL_COBRAR = os.getenv("SIPV_FACTURAR_AL_COBRAR", "True") == "True"
+
+# Numeración fiscal SAR (app sar): con True cada factura de venta toma su
+# número del rango CAI vigente del punto de emisión; sin rango vigente no
+# se puede facturar. Cada caja/servidor de caja con su propio punto.
+SIPV_NUMERACION_SAR = os.getenv("SIPV_NUMERACION_SAR", "False") == "True"
+SIPV_ESTABLECIMIENTO = os.getenv("SIPV_ESTABLECIMIENTO", "001")
+SIPV_PUNTO_EMISION = os.getenv("SIPV_PUNTO_EMISION", "001")
+
+
+# ======================================
+# INSTRUMENTACIÓN DE CONSULTAS
+# ======================================
+# Con True, una vista que excede su @presupuesto_consultas lanza excepción
+# (pensado para tests/CI). En False solo deja un warning en el log.
+SIPV_PRESUPUESTO_CONSULTAS_ESTRICTO = (
+    os.getenv("SIPV_PRESUPUESTO_CONSULTAS_ESTRICTO", "False") == "True"
+)
+
+
+# ======================================
+# LOGGING
+# ======================================
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "common.logs.FormatoJSON"},
+    },
+    "handlers": {
+        "consola_json": {
+            "class": "logging.StreamHandler",
+            "formatter": "json",
+        },
+    },
+    "loggers": {
+        "sipv": {
+            "handlers": ["consola_json"],
+            "level": os.getenv("SIPV_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
 
 # ======================================
 # DEFAULT PRIMARY KEY
@@ -1,5 +1,7 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework import routers
 from . import views
 
@@ -8,6 +10,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 from maestros.api import CategoriaViewSet, ProveedorViewSet, ProductoViewSet
+from common.views import cache_estadisticas, db_estadisticas, media
 router = routers.DefaultRouter()
 router.register(r'categorias', CategoriaViewSet)
 router.register(r'proveedores', ProveedorViewSet)
@@ -16,6 +19,8 @@ router.register(r'productos', ProductoViewSet)
 urlpatterns = [
     path("", views.home_dashboard, name="home"),
     path("accounts/", include("accounts.urls")),
+    path("admin/cache/", cache_estadisticas, name="cache_estadisticas"),
+    path("admin/db/", db_estadisticas, name="db_estadisticas"),
     path("admin/", admin.site.urls),
     path("api/v1/", include(router.urls)),
     path("inventario/", include("inventario.urls", namespace="inventario")),
@@ -26,9 +31,11 @@ urlpatterns = [
     path("auth/", include("authapp.urls", namespace="authapp")),
 ]
 
-# MEDIA (imagenes)
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# MEDIA (imagenes), con cabeceras de cache; ver common.views.media
+if settings.SERVIR_MEDIA:
+    urlpatterns += [
+        re_path(r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")), media, name="media"),
+    ]
 
 # STATICFILES (CSS, JS, admin, etc.)
 if settings.DEBUG:
@@ -0,0 +1,93 @@
+# common/almacenamiento.py
+"""
+Storage de estáticos para producción.
+
+ManifestStaticFilesStorage (nombres con hash del contenido: app.3f2a9c1b.css)
+más variantes precomprimidas .gz (zopfli) y .br (brotli) generadas una vez en
+collectstatic. WhiteNoise entrega la variante que acepte el navegador y,
+como el nombre cambia con el contenido, los archivos con hash se sirven con
+cache de un año (immutable).
+
+Sin zopfli se usa gzip nivel 9; sin brotli solo se genera .gz.
+"""
+import gzip
+import logging
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import zopfli.gzip as _zopfli
+except ImportError:
+    _zopfli = None
+
+try:
+    import brotli as _brotli
+except ImportError:
+    _brotli = None
+
+
+logger = logging.getLogger("sipv.estaticos")
+
+COMPRIMIBLES = (
+    ".css", ".js", ".mjs", ".map", ".json", ".svg", ".html", ".txt", ".xml",
+    ".ico", ".ttf", ".otf", ".eot",
+)
+# Si la variante no ahorra al menos esto, no vale la pena guardarla
+AHORRO_MINIMO = 0.05
+
+
+def _gzip(datos):
+    if _zopfli is not None:
+        return _zopfli.compress(datos)
+    return gzip.compress(datos, compresslevel=9, mtime=0)
+
+
+def _brotli_11(datos):
+    return _brotli.compress(datos, quality=11)
+
+
+class EstaticosComprimidos(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        procesados = set()
+        for original, procesado, ok in super().post_process(paths, dry_run, **options):
+            if ok and not isinstance(ok, Exception):
+                procesados.update((original, procesado))
+            yield original, procesado, ok
+
+        if dry_run:
+            return
+
+        # Los hashed_files incluyen los que Django no tuvo que reescribir
+        procesados.update(self.hashed_files.values())
+        ahorro = total = 0
+        for nombre in sorted(procesados):
+            if nombre and nombre.endswith(COMPRIMIBLES) and self.exists(nombre):
+                antes, despues = self._comprimir(nombre)
+                total += antes
+                ahorro += antes - despues
+        if total:
+            logger.info(
+                "Estáticos precomprimidos: %s KB → %s KB (mejor variante por archivo)",
+                total // 1024, (total - ahorro) // 1024,
+            )
+
+    def _comprimir(self, nombre):
+        with self.open(nombre) as f:
+            datos = f.read()
+        mejor = len(datos)
+
+        compresores = [(".gz", _gzip)]
+        if _brotli is not None:
+            compresores.append((".br", _brotli_11))
+
+        for extension, comprimir in compresores:
+            comprimido = comprimir(datos)
+            destino = nombre + extension
+            if self.exists(destino):
+                self.delete(destino)
+            if len(comprimido) <= len(datos) * (1 - AHORRO_MINIMO):
+                self._save(destino, ContentFile(comprimido))
+                mejor = min(mejor, len(comprimido))
+        return len(datos), mejor
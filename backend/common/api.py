@@ -0,0 +1,506 @@
+# common/api.py
+"""
+Piezas compartidas de la API REST (/api/v1/).
+
+    GET /api/v1/productos/?fields=id,nombre,precio_venta
+    GET /api/v1/productos/?updated_since=2024-05-01T00:00:00-06:00
+    GET /api/v1/productos/?cursor=cD0yMDI0...&page_size=500
+
+- Paginación por llave sobre (actualizado, id): el cursor lleva los dos
+  valores de la última fila y la página siguiente empieza estrictamente
+  después de ella, así que muchas filas con el mismo `actualizado` (un
+  PATCH masivo) no hacen saltar ni repetir filas. Un producto editado
+  entre página y página se mueve al final y aparece de nuevo ahí. Sin
+  COUNT(*) ni OFFSET.
+- `?fields=` deja en la respuesta solo esos campos, y el queryset carga
+  solo las columnas y relaciones que esos campos necesitan.
+- `?updated_since=` filtra por `actualizado` (fecha u hora ISO 8601).
+- ETag por versión (common/condicional.py): sin cambios, 304.
+
+Escritura masiva (EscrituraMasivaMixin), una lista de objetos por request:
+
+    POST  /api/v1/productos/bulk/   crear
+    PATCH /api/v1/productos/bulk/   actualizar (cada objeto trae "id")
+    PUT   /api/v1/productos/bulk/   upsert por la llave del viewset
+
+Todo el lote se valida en memoria (una consulta por relación y por campo
+único, no una por objeto) y se escribe con bulk_create / bulk_update en
+una transacción. Un objeto inválido no detiene a los demás: la respuesta
+trae un resultado por objeto, en el mismo orden. bulk_* no dispara señales;
+cada viewset repite lo que harían en despues_de_guardar().
+
+bulk/ pide sesión y los permisos del modelo (add_ para POST, change_ para
+PATCH, los dos para PUT) aunque el resto del viewset esté abierto.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, time
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.permissions import DjangoModelPermissions
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.validators import UniqueValidator
+
+from .condicional import CondicionalViewSetMixin
+
+
+class PaginacionCursor(BasePagination):
+    """
+    Paginación por llave (actualizado, id), solo hacia adelante:
+
+        WHERE actualizado > t OR (actualizado = t AND id > i)
+        ORDER BY actualizado, id LIMIT n + 1
+
+    CursorPagination de DRF arma el cursor solo con el primer campo del
+    orden y desempata con OFFSET, lo que salta filas cuando un empate
+    cambia entre páginas.
+    """
+    ordering = ("actualizado", "id")
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        tamano = self._tamano(request)
+        qs = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            actualizado, pk = self._leer_cursor(cursor)
+            qs = qs.filter(Q(actualizado__gt=actualizado) | Q(actualizado=actualizado, id__gt=pk))
+
+        filas = list(qs[:tamano + 1])
+        self.siguiente = None
+        if len(filas) > tamano:
+            filas = filas[:tamano]
+            self.siguiente = self._cursor(filas[-1].actualizado, filas[-1].pk)
+        return filas
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "previous": None, "results": data})
+
+    def get_next_link(self):
+        if self.siguiente is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.siguiente
+        )
+
+    def _tamano(self, request):
+        valor = request.query_params.get(self.page_size_query_param)
+        if valor and valor.isdigit() and int(valor) > 0:
+            return min(int(valor), self.max_page_size)
+        return self.page_size
+
+    @staticmethod
+    def _cursor(actualizado, pk):
+        return urlsafe_b64encode(f"{actualizado.isoformat()}|{pk}".encode()).decode()
+
+    @staticmethod
+    def _leer_cursor(valor):
+        try:
+            momento, pk = urlsafe_b64decode(valor.encode()).decode().split("|")
+            return datetime.fromisoformat(momento), int(pk)
+        except (ValueError, UnicodeError):
+            raise NotFound("Cursor inválido.")
+
+
+def campos_solicitados(request):
+    """Conjunto de `?fields=a,b,c`, o None si no se pidió."""
+    if request is None:
+        return None
+    valor = request.query_params.get("fields")
+    if not valor:
+        return None
+    return {c.strip() for c in valor.split(",") if c.strip()}
+
+
+class CamposDinamicosMixin:
+    """
+    Serializer que respeta `?fields=`. Los campos calculados declaran en
+    Meta.fuentes las columnas del modelo que leen, para que el viewset no
+    las difiera:
+
+        fuentes = {"imagen_thumb_url": ("imagen", "imagen_miniatura")}
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campos = campos_solicitados(self.context.get("request"))
+        if campos is None:
+            return
+        desconocidos = campos - set(self.fields)
+        if desconocidos:
+            raise ValidationError(
+                {"fields": f"Campos desconocidos: {', '.join(sorted(desconocidos))}."}
+            )
+        for nombre in set(self.fields) - campos:
+            self.fields.pop(nombre)
+
+
+def _columnas_de_campo(modelo, campo, fuentes):
+    """
+    (columnas para only(), relaciones para select_related) de un campo del
+    serializer, o None si no se puede saber qué lee.
+    """
+    if campo.field_name in fuentes:
+        return set(fuentes[campo.field_name]), set()
+    if isinstance(campo, serializers.SerializerMethodField):
+        return None
+
+    partes = campo.source.split(".")
+    try:
+        actual = modelo._meta.get_field(partes[0])
+    except FieldDoesNotExist:
+        return None
+    if len(partes) == 1:
+        return {actual.name}, set()
+
+    # "proveedor.nombre" → select_related("proveedor"), only("proveedor__nombre")
+    if not actual.is_relation or actual.many_to_many or actual.one_to_many:
+        return None
+    return {actual.name, "__".join(partes)}, {actual.name}
+
+
+class CatalogoViewSetMixin(CondicionalViewSetMixin):
+    """
+    Paginación por cursor, `?updated_since=`, ETag por la generación
+    "maestros" y queryset ajustado a los campos del serializer. En
+    escrituras se usa el queryset completo (sin only()) para que save() y
+    las señales vean la fila entera.
+    """
+    pagination_class = PaginacionCursor
+    grupos_etag = ("maestros",)
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        qs = self._filtrar_actualizado(qs)
+
+        columnas, relaciones = self._necesidades()
+        if relaciones:
+            qs = qs.select_related(*sorted(relaciones))
+        if columnas and self.request.method in ("GET", "HEAD"):
+            qs = qs.only(*sorted(columnas))
+        return qs
+
+    def _filtrar_actualizado(self, qs):
+        valor = self.request.query_params.get("updated_since")
+        if not valor:
+            return qs
+        momento = parse_datetime(valor)
+        if momento is None:
+            dia = parse_date(valor)
+            if dia is None:
+                raise ValidationError(
+                    {"updated_since": "Use una fecha u hora ISO 8601 (2024-05-01 o 2024-05-01T08:00:00-06:00)."}
+                )
+            momento = datetime.combine(dia, time.min)
+        if timezone.is_naive(momento):
+            momento = timezone.make_aware(momento)
+        return qs.filter(actualizado__gte=momento)
+
+    def _necesidades(self):
+        """
+        Columnas y relaciones que leen los campos que se van a devolver. Si
+        algún campo no se puede resolver, no se difiere nada (columnas vacías).
+        """
+        serializer = self.get_serializer()
+        modelo = serializer.Meta.model
+        fuentes = getattr(serializer.Meta, "fuentes", {})
+
+        columnas = {"id"} | {c.lstrip("-") for c in PaginacionCursor.ordering}
+        relaciones = set()
+        completo = True
+        for campo in serializer.fields.values():
+            necesidad = _columnas_de_campo(modelo, campo, fuentes)
+            if necesidad is None:
+                completo = False
+                continue
+            columnas |= necesidad[0]
+            relaciones |= necesidad[1]
+        return (columnas if completo else set()), relaciones
+
+
+
+# --------------------------------------
+# ESCRITURA MASIVA
+# --------------------------------------
+def _entero(valor):
+    if isinstance(valor, bool):
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+class RelacionPrecargada(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField que busca en un in_bulk() ya hecho para todo el lote."""
+
+    def __init__(self, objetos, **kwargs):
+        self.objetos = objetos
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        pk = _entero(data)
+        if pk is None:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return self.objetos[pk]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+class ListaMasivaSerializer(serializers.ListSerializer):
+    """
+    Valida cada objeto de la lista por separado y devuelve los errores por
+    objeto en vez de rechazar la lista completa.
+    """
+    unicos = ()   # (campo, fuente) cuya unicidad se revisa para todo el lote
+
+    def validar(self, items, instancias):
+        """[(datos_validados, None) | (None, errores)] en el orden de `items`."""
+        resultados = []
+        for item, instancia in zip(items, instancias):
+            # Con fila existente solo se validan los campos que vienen
+            self.partial = instancia is not None
+            self.child.instance = instancia
+            try:
+                resultados.append((self.child.run_validation(item), None))
+            except ValidationError as e:
+                resultados.append((None, e.detail))
+        self.child.instance = None
+        return resultados
+
+
+class PermisosEscrituraMasiva(DjangoModelPermissions):
+    """Permisos de modelo para bulk/. El upsert (PUT) crea y actualiza: pide los dos."""
+    perms_map = {
+        **DjangoModelPermissions.perms_map,
+        "PUT": ["%(app_label)s.add_%(model_name)s", "%(app_label)s.change_%(model_name)s"],
+    }
+
+
+class EscrituraMasivaMixin:
+    """
+    Acción `bulk/` para un ModelViewSet. Se configura con:
+
+      llave_upsert      campo único que identifica la fila en el upsert
+      metodos_masivos   métodos permitidos (crear solo: ("POST",))
+
+    y los ganchos validar_lote() / despues_de_guardar(), que corren dentro
+    de la transacción.
+    """
+    llave_upsert = "id"
+    metodos_masivos = ("POST", "PATCH", "PUT")
+    max_lote = 1000
+    lote_bd = 500
+
+    @action(detail=False, methods=["post", "patch", "put"], url_path="bulk",
+            permission_classes=[PermisosEscrituraMasiva])
+    def bulk(self, request):
+        if request.method not in self.metodos_masivos:
+            return self.http_method_not_allowed(request)
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Se espera una lista de objetos."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_lote:
+            return Response({"detail": f"Máximo {self.max_lote} objetos por lote."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        modo = {"POST": "crear", "PATCH": "actualizar", "PUT": "upsert"}[request.method]
+        instancias, errores = self._instancias(modo, items)
+
+        lista = self._lista_masiva(items)
+        pendientes = {}
+        validados = lista.validar(
+            [it for i, it in enumerate(items) if i not in errores],
+            [ins for i, ins in enumerate(instancias) if i not in errores],
+        )
+        indices = [i for i in range(len(items)) if i not in errores]
+        for i, (datos, error) in zip(indices, validados):
+            if error:
+                errores[i] = error
+            else:
+                pendientes[i] = (datos, instancias[i])
+
+        for i, error in self._validar_unicos(lista.unicos, pendientes).items():
+            errores[i] = error
+            pendientes.pop(i)
+
+        try:
+            with transaction.atomic():
+                for i, error in self.validar_lote(pendientes).items():
+                    errores[i] = error
+                    pendientes.pop(i)
+                creados, actualizados = self._escribir(pendientes)
+                self.despues_de_guardar(list(creados.values()), list(actualizados.values()))
+        except IntegrityError as e:
+            # Otro proceso escribió la misma llave entre la validación y el INSERT
+            return Response({"detail": f"Conflicto al guardar el lote: {e}"},
+                            status=status.HTTP_409_CONFLICT)
+
+        resultados = []
+        for i in range(len(items)):
+            if i in errores:
+                resultados.append({"indice": i, "estado": "error", "errores": errores[i]})
+            elif i in creados:
+                resultados.append({"indice": i, "estado": "creado", "id": creados[i].pk})
+            else:
+                resultados.append({"indice": i, "estado": "actualizado", "id": actualizados[i].pk})
+
+        return Response({
+            "ok": not errores,
+            "creados": len(creados),
+            "actualizados": len(actualizados),
+            "errores": len(errores),
+            "resultados": resultados,
+        })
+
+    # Ganchos -------------------------------------------------------------
+
+    def validar_lote(self, pendientes):
+        """Reglas que miran todo el lote. {indice: errores} de los que se rechazan."""
+        return {}
+
+    def despues_de_guardar(self, creados, actualizados):
+        pass
+
+    # Internos ------------------------------------------------------------
+
+    def _modelo(self):
+        return self.get_serializer_class().Meta.model
+
+    def _instancias(self, modo, items):
+        """Fila existente (o None) de cada objeto y errores de identificación."""
+        instancias = [None] * len(items)
+        errores = {}
+        if modo == "crear":
+            return instancias, errores
+
+        llave = "id" if modo == "actualizar" else self.llave_upsert
+        valores = {}
+        vistos = set()
+        for i, item in enumerate(items):
+            valor = item.get(llave) if isinstance(item, dict) else None
+            if llave == "id":
+                valor = _entero(valor)
+            if valor in (None, ""):
+                if modo == "actualizar":
+                    errores[i] = {llave: ["Este campo es requerido."]}
+                continue
+            if valor in vistos:
+                errores[i] = {llave: ["Repetido en el lote."]}
+                continue
+            vistos.add(valor)
+            valores[i] = valor
+
+        existentes = self._modelo()._default_manager.in_bulk(vistos, field_name=llave)
+        for i, valor in valores.items():
+            instancias[i] = existentes.get(valor)
+            if instancias[i] is None and modo == "actualizar":
+                errores[i] = {llave: [f"No existe un registro con {llave}={valor}."]}
+        return instancias, errores
+
+    def _lista_masiva(self, items):
+        child = self.get_serializer_class()(context=self.get_serializer_context())
+        lista = ListaMasivaSerializer(child=child, context=child.context)
+        lista.unicos = []
+        for nombre, campo in list(child.fields.items()):
+            if campo.read_only:
+                continue
+            # La unicidad se revisa para todo el lote en _validar_unicos
+            sin_unico = [v for v in campo.validators if not isinstance(v, UniqueValidator)]
+            if len(sin_unico) != len(campo.validators):
+                campo.validators = sin_unico
+                lista.unicos.append((nombre, campo.source))
+            if isinstance(campo, serializers.PrimaryKeyRelatedField):
+                ids = {_entero(it.get(nombre)) for it in items if isinstance(it, dict)} - {None}
+                child.fields[nombre] = RelacionPrecargada(
+                    campo.get_queryset().in_bulk(ids),
+                    queryset=campo.queryset,
+                    allow_null=campo.allow_null,
+                    required=campo.required,
+                )
+        return lista
+
+    def _validar_unicos(self, unicos, pendientes):
+        errores = {}
+        manager = self._modelo()._default_manager
+        for nombre, fuente in unicos:
+            valores = {
+                i: datos[fuente] for i, (datos, _) in pendientes.items()
+                if datos.get(fuente) not in (None, "") and i not in errores
+            }
+            if not valores:
+                continue
+            existentes = dict(
+                manager.filter(**{f"{fuente}__in": set(valores.values())}).values_list(fuente, "pk")
+            )
+            vistos = set()
+            for i, valor in valores.items():
+                instancia = pendientes[i][1]
+                propio = instancia.pk if instancia is not None else None
+                if valor in vistos or existentes.get(valor, propio) != propio:
+                    errores[i] = {nombre: [f"Ya existe un registro con {nombre}={valor}."]}
+                vistos.add(valor)
+        return errores
+
+    def _escribir(self, pendientes):
+        modelo = self._modelo()
+        ahora = timezone.now()
+        tiene_actualizado = any(f.name == "actualizado" for f in modelo._meta.concrete_fields)
+
+        creados = {}
+        actualizados = {}
+        campos = set()
+        for i, (datos, instancia) in pendientes.items():
+            if instancia is None:
+                creados[i] = modelo(**datos)
+                continue
+            for campo, valor in datos.items():
+                setattr(instancia, campo, valor)
+            campos.update(datos)
+            actualizados[i] = instancia
+
+        if creados:
+            modelo._default_manager.bulk_create(list(creados.values()), batch_size=self.lote_bd)
+            self._completar_ids(list(creados.values()))
+        if actualizados:
+            # bulk_update no aplica auto_now
+            if tiene_actualizado:
+                for instancia in actualizados.values():
+                    instancia.actualizado = ahora
+                campos.add("actualizado")
+            if campos:
+                modelo._default_manager.bulk_update(
+                    list(actualizados.values()), sorted(campos), batch_size=self.lote_bd
+                )
+        return creados, actualizados
+
+    def _completar_ids(self, objetos):
+        """
+        MySQL no devuelve los ids de bulk_create: se buscan por la llave. Los
+        objetos sin llave quedan con id None en la respuesta.
+        """
+        if all(o.pk is not None for o in objetos) or self.llave_upsert == "id":
+            return
+        llave = self.llave_upsert
+        sin_id = {getattr(o, llave): o for o in objetos if o.pk is None and getattr(o, llave)}
+        ids = self._modelo()._default_manager.filter(
+            **{f"{llave}__in": list(sin_id)}
+        ).values_list(llave, "pk")
+        for valor, pk in ids:
+            sin_id[valor].pk = pk
@@ -0,0 +1,26 @@
+# common/asincrono.py
+"""
+Utilidades para vistas async (servidas por uvicorn bajo ASGI).
+
+En Django 4.2 login_required no acepta corrutinas, y request.user es
+perezoso: evaluarlo dentro de una vista async consulta la sesión desde el
+event loop y lanza SynchronousOnlyOperation. login_requerido_async lo
+resuelve en el hilo del ORM antes de entrar a la vista.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+
+
+def _autenticado(request):
+    return request.user.is_authenticated
+
+
+def login_requerido_async(vista):
+    @wraps(vista)
+    async def envoltura(request, *args, **kwargs):
+        if not await sync_to_async(_autenticado)(request):
+            return redirect_to_login(request.get_full_path())
+        return await vista(request, *args, **kwargs)
+    return envoltura
@@ -0,0 +1,191 @@
+# common/cache_backends.py
+"""
+Backends de cache con contadores de hits / misses / sets / borrados / desalojos.
+
+Cada alias de CACHES (default, catalogo, permisos, dashboards, reportes) es
+una instancia distinta, así que los contadores quedan separados por módulo.
+Los contadores se acumulan en memoria del proceso y se vuelcan cada pocos
+segundos al propio cache con incr(), para que la página de administración
+vea la suma de todos los workers.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+
+EVENTOS = ("hits", "misses", "sets", "borrados", "desalojos")
+PREFIJO_STATS = "sipv:stats:"
+INTERVALO_VOLCADO = 10  # segundos
+
+_FALTA = object()
+
+
+class ContadoresMixin:
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._contadores = Counter()
+        self._candado_contadores = threading.Lock()
+        self._ultimo_volcado = time.monotonic()
+        self._local = threading.local()
+
+    # ---------------------------------------------
+    # Contadores
+    # ---------------------------------------------
+    def _pausado(self):
+        return getattr(self._local, "pausado", False)
+
+    def _contar(self, evento, n=1, volcar=True):
+        if n <= 0 or self._pausado():
+            return
+        with self._candado_contadores:
+            self._contadores[evento] += n
+            toca_volcar = time.monotonic() - self._ultimo_volcado > INTERVALO_VOLCADO
+        # Desde _cull no se vuelca: el backend puede tener su candado tomado
+        if volcar and toca_volcar:
+            self.volcar_contadores()
+
+    def volcar_contadores(self):
+        with self._candado_contadores:
+            pendientes = self._contadores
+            self._contadores = Counter()
+            self._ultimo_volcado = time.monotonic()
+
+        self._local.pausado = True
+        try:
+            for evento, n in pendientes.items():
+                clave = PREFIJO_STATS + evento
+                try:
+                    self.incr(clave, n)
+                except ValueError:
+                    if not self.add(clave, n, None):
+                        self.incr(clave, n)
+        finally:
+            self._local.pausado = False
+
+    def estadisticas(self):
+        self.volcar_contadores()
+        self._local.pausado = True
+        try:
+            datos = self.get_many([PREFIJO_STATS + e for e in EVENTOS])
+        finally:
+            self._local.pausado = False
+
+        stats = {e: datos.get(PREFIJO_STATS + e, 0) for e in EVENTOS}
+        consultas = stats["hits"] + stats["misses"]
+        stats["ratio"] = (stats["hits"] / consultas * 100) if consultas else None
+        return stats
+
+    def reiniciar_estadisticas(self):
+        with self._candado_contadores:
+            self._contadores = Counter()
+        self._local.pausado = True
+        try:
+            self.delete_many([PREFIJO_STATS + e for e in EVENTOS])
+        finally:
+            self._local.pausado = False
+
+    # ---------------------------------------------
+    # Operaciones contadas
+    # ---------------------------------------------
+    def get(self, key, default=None, version=None):
+        if self._pausado():
+            return super().get(key, default, version)
+
+        self._local.pausado = True
+        try:
+            valor = super().get(key, _FALTA, version)
+        finally:
+            self._local.pausado = False
+
+        if valor is _FALTA:
+            self._contar("misses")
+            return default
+        self._contar("hits")
+        return valor
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if self._pausado():
+            return super().get_many(keys, version)
+
+        self._local.pausado = True
+        try:
+            encontrados = super().get_many(keys, version)
+        finally:
+            self._local.pausado = False
+
+        self._contar("hits", len(encontrados))
+        self._contar("misses", len(keys) - len(encontrados))
+        return encontrados
+
+    def set(self, key, value, timeout=None, version=None):
+        self._contar("sets")
+        return super().set(key, value, timeout, version)
+
+    def delete(self, key, version=None):
+        self._contar("borrados")
+        return super().delete(key, version)
+
+
+class ArchivoConContadores(ContadoresMixin, FileBasedCache):
+    """Cache en disco compartido por todos los workers del mismo host."""
+
+    def _cull(self):
+        self._local.en_cull = True
+        try:
+            super()._cull()
+        finally:
+            self._local.en_cull = False
+
+    def _delete(self, fname):
+        borrado = super()._delete(fname)
+        if borrado and getattr(self._local, "en_cull", False):
+            self._contar("desalojos", volcar=False)
+        return borrado
+
+
+class MemoriaConContadores(ContadoresMixin, LocMemCache):
+    """Solo para desarrollo/tests: cada proceso tiene su propia memoria."""
+
+    def _cull(self):
+        antes = len(self._cache)
+        super()._cull()
+        self._contar("desalojos", antes - len(self._cache), volcar=False)
+
+
+class RedisConContadores(ContadoresMixin, RedisCache):
+    """Redis (o compatible). Los desalojos los reporta el propio servidor."""
+
+    BORRADO_LOTE = 1000
+
+    def clear(self):
+        """
+        Borra solo las claves de este alias (sipv:<namespace>:*). Todos los
+        alias comparten la base de REDIS_URL y se distinguen por KEY_PREFIX:
+        el clear() de Django (FLUSHDB) borraría también los demás, incluidas
+        las canastas abiertas de "carritos".
+        """
+        cliente = self._cache.get_client(write=True)
+        lote = []
+        for clave in cliente.scan_iter(match=f"{self.key_prefix}:*", count=self.BORRADO_LOTE):
+            lote.append(clave)
+            if len(lote) >= self.BORRADO_LOTE:
+                cliente.delete(*lote)
+                lote = []
+        if lote:
+            cliente.delete(*lote)
+        return True
+
+    def estadisticas(self):
+        stats = super().estadisticas()
+        try:
+            info = self._cache.get_client().info("stats")
+            stats["desalojos"] = info.get("evicted_keys", 0)
+        except Exception:
+            pass
+        return stats
@@ -0,0 +1,29 @@
+# common/catalogo.py
+"""
+Versión del catálogo de productos que usa el POS.
+
+Todo lo que se cachea a partir de productos / precios / categorías
+(búsquedas del POS, snapshots del catálogo, ETags) incluye esta versión en
+su clave. Cambiar la versión invalida todo de una vez, sin borrar claves.
+
+Los cambios fila por fila la suben desde maestros/signals.py; los cambios
+masivos (importación, reglas de precio) la suben una sola vez al terminar.
+"""
+from django.core.cache import caches
+
+from .versiones import leer_version, subir_version
+
+
+CLAVE_VERSION = "version"
+
+
+def _cache():
+    return caches["catalogo"]
+
+
+def version_catalogo():
+    return leer_version(_cache(), CLAVE_VERSION)
+
+
+def invalidar_catalogo():
+    subir_version(_cache(), CLAVE_VERSION)
@@ -0,0 +1,78 @@
+# common/condicional.py
+"""
+GET condicional (ETag / If-None-Match) para JSON que se consulta seguido.
+
+El ETag sale de los contadores que ya mantienen las señales: las
+generaciones de common.fragmentos ("ventas", "compras", "inventario",
+"maestros", "facturas") y la versión del catálogo. Leerlos es una sola
+consulta al cache, sin tocar la base de datos, así que cuando nada cambió
+la terminal o el dashboard recibe un 304 vacío casi gratis.
+
+    @login_required
+    @condicional("compras", "maestros", diario=True)
+    def dashboard_data(request): ...
+
+`diario=True` para respuestas que dependen de la fecha ("últimos 30 días"):
+el ETag cambia al cambiar el día aunque no haya movimientos.
+"""
+from functools import wraps
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import condition
+
+from .catalogo import version_catalogo
+from .fragmentos import generaciones
+
+
+def etag_version(grupos=(), catalogo=False, diario=False):
+    partes = []
+    if grupos:
+        partes.append(".".join(str(g) for g in generaciones(grupos)))
+    if catalogo:
+        partes.append(f"c{version_catalogo()}")
+    if diario:
+        partes.append(timezone.localdate().strftime("%Y%m%d"))
+    return f'"{"-".join(partes)}"'
+
+
+def _revalidar(response):
+    # El navegador guarda la respuesta pero pregunta siempre con If-None-Match
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def condicional(*grupos, catalogo=False, diario=False):
+    """Decorador para vistas de función: 304 si el ETag no cambió."""
+    def etag(request, *args, **kwargs):
+        return etag_version(grupos, catalogo, diario)
+
+    def decorador(vista):
+        @wraps(vista)
+        def envuelta(request, *args, **kwargs):
+            return _revalidar(vista(request, *args, **kwargs))
+        return condition(etag_func=etag)(envuelta)
+    return decorador
+
+
+class CondicionalViewSetMixin:
+    """Lo mismo para list / retrieve de un ViewSet de DRF."""
+    grupos_etag = ()
+    catalogo_etag = False
+
+    def _condicional(self, handler, request, *args, **kwargs):
+        etag = etag_version(self.grupos_etag, self.catalogo_etag)
+        no_modificado = get_conditional_response(request, etag=etag)
+        if no_modificado is not None:
+            return no_modificado
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            _revalidar(response)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._condicional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._condicional(super().retrieve, request, *args, **kwargs)
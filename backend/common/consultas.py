@@ -0,0 +1,130 @@
+# common/consultas.py
+"""
+Instrumentación de consultas SQL por request.
+
+Registra cuántas consultas hace cada vista, el tiempo total en base de datos
+y las consultas repetidas (misma huella SQL), que es la señal típica de un N+1.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+_RE_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+class PresupuestoConsultasExcedido(AssertionError):
+    """La vista hizo más consultas (o más repetidas) de las permitidas."""
+
+
+def huella_sql(sql):
+    """
+    Normaliza el SQL para agrupar consultas iguales con distintos parámetros.
+    `SELECT ... WHERE id = %s` y `... WHERE id IN (%s, %s)` quedan iguales
+    sin importar los valores.
+    """
+    sql = sql.replace("%s", "?")
+    sql = _RE_CADENAS.sub("?", sql)
+    sql = _RE_NUMEROS.sub("?", sql)
+    sql = _RE_LISTAS.sub("(...)", sql)
+    return " ".join(sql.split())
+
+
+class RegistroConsultas:
+    """
+    Se instala como execute_wrapper en todas las conexiones y acumula
+    número de consultas, tiempo en BD y huellas SQL.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.tiempo = 0.0
+        self.huellas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo += time.perf_counter() - inicio
+            self.total += 1
+            self.huellas[huella_sql(sql)] += 1
+
+    @property
+    def tiempo_ms(self):
+        return self.tiempo * 1000
+
+    @property
+    def repetidas(self):
+        """Huellas ejecutadas más de una vez → {huella: veces}."""
+        return {h: n for h, n in self.huellas.items() if n > 1}
+
+    @property
+    def total_repetidas(self):
+        # Consultas "de sobra": si una huella se ejecutó 5 veces, 4 sobran
+        return sum(n - 1 for n in self.repetidas.values())
+
+    @contextmanager
+    def activo(self):
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+
+def presupuesto_consultas(max_consultas, max_repetidas=None):
+    """
+    Declara el presupuesto de consultas de una vista.
+
+        @login_required
+        @presupuesto_consultas(4, max_repetidas=0)
+        def api_lineas(request, venta_id): ...
+
+    El middleware lo lee en process_view; los decoradores de Django copian
+    el atributo al usar functools.wraps, así que el orden no importa.
+    """
+    def decorador(vista):
+        vista.presupuesto_consultas = (max_consultas, max_repetidas)
+        return vista
+    return decorador
+
+
+def verificar_presupuesto(registro, max_consultas, max_repetidas=None, nombre=""):
+    """Lanza PresupuestoConsultasExcedido si el registro supera el presupuesto."""
+    errores = []
+
+    if max_consultas is not None and registro.total > max_consultas:
+        errores.append(f"{registro.total} consultas (máximo {max_consultas})")
+
+    if max_repetidas is not None and registro.total_repetidas > max_repetidas:
+        errores.append(
+            f"{registro.total_repetidas} consultas repetidas (máximo {max_repetidas})"
+        )
+
+    if errores:
+        detalle = "\n".join(
+            f"  {n}x {h}" for h, n in sorted(registro.repetidas.items(), key=lambda x: -x[1])
+        )
+        mensaje = f"{nombre or 'Bloque'}: " + ", ".join(errores)
+        if detalle:
+            mensaje += "\nRepetidas:\n" + detalle
+        raise PresupuestoConsultasExcedido(mensaje)
+
+
+@contextmanager
+def asegurar_presupuesto(max_consultas, max_repetidas=None):
+    """
+    Helper para tests:
+
+        with asegurar_presupuesto(4, max_repetidas=0):
+            self.client.get(reverse("ventas:api_lineas", args=[venta.id]))
+    """
+    registro = RegistroConsultas()
+    with registro.activo():
+        yield registro
+    verificar_presupuesto(registro, max_consultas, max_repetidas)
@@ -0,0 +1,52 @@
+# common/db/mysql_pool/base.py
+"""
+Backend MySQL de Django con pool de conexiones por proceso.
+
+    DATABASES["default"]["ENGINE"] = "common.db.mysql_pool"
+    DATABASES["default"]["POOL"] = {"TAMANO": 4, "ESPERA": 5, "MAX_INACTIVA": 300}
+
+Usar con CONN_MAX_AGE = 0: al final de cada request Django "cierra" la
+conexión, que vuelve al pool para el siguiente hilo. Ver common/db/pool.py.
+"""
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.mysql import base
+
+from common.db.pool import obtener_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    _reusada = False
+
+    def _pool(self):
+        return obtener_pool(self.alias, self.settings_dict.get("POOL") or {})
+
+    def get_new_connection(self, conn_params):
+        conexion, self._reusada = self._pool().tomar(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+        )
+        return conexion
+
+    def init_connection_state(self):
+        if self._reusada:
+            # SQL_AUTO_IS_NULL y el nivel de aislamiento son de la sesión MySQL
+            # y ya quedaron puestos cuando la conexión se abrió
+            BaseDatabaseWrapper.init_connection_state(self)
+            return
+        super().init_connection_state()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        conexion = self.connection
+        # Cerrada dentro de un atomic(): Django deja la referencia para el
+        # rollback posterior, así que no puede volver al pool
+        reutilizable = not self.in_atomic_block
+        if reutilizable:
+            try:
+                conexion.rollback()     # nada pendiente para el siguiente que la tome
+                if not conexion.get_autocommit():
+                    conexion.autocommit(True)
+            except Exception:
+                reutilizable = False
+        self._pool().devolver(conexion, reutilizable)
@@ -0,0 +1,162 @@
+# common/db/pool.py
+"""
+Pool de conexiones por proceso para el backend common.db.mysql_pool.
+
+Django abre una conexión por hilo y la cierra al final del request (o al
+vencer CONN_MAX_AGE). Con el pool, "cerrar" devuelve la conexión a una
+lista de libres del proceso y el siguiente request la toma ya autenticada,
+sin el handshake TLS + auth de MySQL.
+
+El tamaño es por proceso: con gunicorn gthread conviene TAMANO = hilos por
+worker, y el total contra MySQL es workers × TAMANO. Si todas están en uso,
+el request espera hasta ESPERA segundos y luego falla con PoolAgotado.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolAgotado(Exception):
+    """No se liberó ninguna conexión dentro del tiempo de espera."""
+
+
+class PoolConexiones:
+
+    def __init__(self, alias, tamano, espera, max_inactiva):
+        self.alias = alias
+        self.tamano = tamano
+        self.espera = espera
+        self.max_inactiva = max_inactiva
+        self.pid = os.getpid()
+
+        self._libres = deque()            # (conexión, momento en que se devolvió)
+        self._cupos = threading.BoundedSemaphore(tamano)
+        self._candado = threading.Lock()
+
+        self.en_uso = 0
+        self.creadas = 0
+        self.reusadas = 0
+        self.descartadas = 0
+        self.esperas = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+
+    def tomar(self, crear):
+        """
+        Devuelve (conexión, reusada). `crear` abre una conexión nueva si no
+        hay libres sanas. Lanza PoolAgotado si se vence la espera.
+        """
+        if not self._cupos.acquire(blocking=False):
+            inicio = time.monotonic()
+            with self._candado:
+                self.esperas += 1
+            obtenido = self._cupos.acquire(timeout=self.espera)
+            with self._candado:
+                self.espera_total += time.monotonic() - inicio
+                if not obtenido:
+                    self.timeouts += 1
+            if not obtenido:
+                raise PoolAgotado(
+                    f"Pool '{self.alias}': {self.tamano} conexiones en uso "
+                    f"y ninguna se liberó en {self.espera} s."
+                )
+
+        try:
+            conexion = self._tomar_libre()
+            reusada = conexion is not None
+            if conexion is None:
+                conexion = crear()
+        except BaseException:
+            self._cupos.release()
+            raise
+
+        with self._candado:
+            self.en_uso += 1
+            if reusada:
+                self.reusadas += 1
+            else:
+                self.creadas += 1
+        return conexion, reusada
+
+    def _tomar_libre(self):
+        ahora = time.monotonic()
+        while True:
+            with self._candado:
+                if not self._libres:
+                    return None
+                conexion, devuelta = self._libres.pop()      # LIFO: la más reciente
+            if ahora - devuelta <= self.max_inactiva and _viva(conexion):
+                return conexion
+            self._descartar(conexion)
+
+    def devolver(self, conexion, reutilizable=True):
+        if os.getpid() != self.pid:
+            # Conexión heredada por fork: el socket es del proceso padre,
+            # ni se reusa ni se cierra desde aquí
+            return
+        with self._candado:
+            self.en_uso -= 1
+            if reutilizable:
+                self._libres.append((conexion, time.monotonic()))
+        if not reutilizable:
+            self._descartar(conexion)
+        self._cupos.release()
+
+    def _descartar(self, conexion):
+        with self._candado:
+            self.descartadas += 1
+        try:
+            conexion.close()
+        except Exception:
+            pass
+
+    def estadisticas(self):
+        with self._candado:
+            return {
+                "alias": self.alias,
+                "pid": self.pid,
+                "tamano": self.tamano,
+                "en_uso": self.en_uso,
+                "libres": len(self._libres),
+                "creadas": self.creadas,
+                "reusadas": self.reusadas,
+                "descartadas": self.descartadas,
+                "esperas": self.esperas,
+                "timeouts": self.timeouts,
+                "espera_ms": round(self.espera_total * 1000, 1),
+            }
+
+
+def _viva(conexion):
+    try:
+        conexion.ping()
+        return True
+    except Exception:
+        return False
+
+
+_pools = {}
+_candado_pools = threading.Lock()
+
+
+def obtener_pool(alias, config):
+    """Pool del alias para este proceso (uno nuevo después de un fork)."""
+    pool = _pools.get(alias)
+    if pool is None or pool.pid != os.getpid():
+        with _candado_pools:
+            pool = _pools.get(alias)
+            if pool is None or pool.pid != os.getpid():
+                pool = _pools[alias] = PoolConexiones(
+                    alias,
+                    tamano=int(config.get("TAMANO", 4)),
+                    espera=float(config.get("ESPERA", 5)),
+                    max_inactiva=float(config.get("MAX_INACTIVA", 300)),
+                )
+    return pool
+
+
+def estadisticas_pools():
+    """Métricas de los pools de este proceso."""
+    pid = os.getpid()
+    return [p.estadisticas() for p in list(_pools.values()) if p.pid == pid]
@@ -0,0 +1,90 @@
+# common/fechas.py
+"""
+Filtros de fecha que pueden usar índices.
+
+`creado__date=hoy` o `creado__year=…` envuelven la columna en DATE() /
+EXTRACT() y MySQL ya no puede usar el índice sobre `creado`: recorre la
+tabla completa. Estos helpers devuelven el mismo filtro como un rango
+semiabierto [inicio, fin) de datetimes con zona horaria (TIME_ZONE,
+America/Tegucigalpa), que sí usa el índice:
+
+    Venta.objects.filter(**rango_dia("creado", hoy))
+    # creado >= hoy 00:00 -06:00 AND creado < mañana 00:00 -06:00
+
+Para los filtros "desde / hasta" que llegan por GET:
+
+    ventas = ventas.filter(**rango_parametros(request.GET, "creado", "fecha_desde", "fecha_hasta"))
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+class FechaInvalida(ValueError):
+    pass
+
+
+def inicio_dia(dia):
+    """Medianoche local del día, con zona horaria."""
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def rango_dia(campo, dia):
+    return {
+        f"{campo}__gte": inicio_dia(dia),
+        f"{campo}__lt": inicio_dia(dia + timedelta(days=1)),
+    }
+
+
+def rango_mes(campo, dia):
+    """El mes calendario que contiene `dia`."""
+    primero = dia.replace(day=1)
+    siguiente = (primero + timedelta(days=32)).replace(day=1)
+    return {
+        f"{campo}__gte": inicio_dia(primero),
+        f"{campo}__lt": inicio_dia(siguiente),
+    }
+
+
+def rango_fechas(campo, desde=None, hasta=None):
+    """
+    Días locales `desde` a `hasta`, ambos incluidos: [desde 00:00, hasta + 1
+    día 00:00). Cualquiera de los dos puede ser None (sin ese límite).
+    """
+    filtros = {}
+    if desde is not None:
+        filtros[f"{campo}__gte"] = inicio_dia(desde)
+    if hasta is not None:
+        filtros[f"{campo}__lt"] = inicio_dia(hasta + timedelta(days=1))
+    return filtros
+
+
+def leer_fecha(valor, parametro="fecha"):
+    """"AAAA-MM-DD" → date; vacío → None. FechaInvalida si no es una fecha."""
+    if not valor:
+        return None
+    try:
+        dia = parse_date(valor)
+    except ValueError:
+        dia = None
+    if dia is None:
+        raise FechaInvalida(f"{parametro} debe ser una fecha AAAA-MM-DD válida")
+    return dia
+
+
+def rango_parametros(params, campo, desde="desde", hasta="hasta", estricto=False):
+    """
+    rango_fechas() con las fechas de request.GET. Una fecha inválida se
+    ignora (filtros de las pantallas), o lanza FechaInvalida con
+    estricto=True (APIs que responden 400).
+    """
+    dias = []
+    for parametro in (desde, hasta):
+        try:
+            dias.append(leer_fecha(params.get(parametro), parametro))
+        except FechaInvalida:
+            if estricto:
+                raise
+            dias.append(None)
+    return rango_fechas(campo, *dias)
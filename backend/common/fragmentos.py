@@ -0,0 +1,96 @@
+# common/fragmentos.py
+"""
+Cache de widgets de dashboard.
+
+Cada widget depende de uno o más grupos ("ventas", "compras", "inventario",
+"maestros"). Cada grupo tiene un número de generación que las señales suben
+cuando hay una venta, compra o ajuste nuevo; la clave del widget incluye las
+generaciones, así que al subir una el widget se recalcula en el próximo hit
+sin borrar nada a mano.
+
+El recálculo es single-flight: un solo worker calcula (candado con
+cache.add) y los demás sirven el último valor conocido o esperan un momento.
+
+Con el backend por defecto (archivo, FileBasedCache) add() e incr() no son
+atómicos entre procesos: dos workers pueden tomar el candado a la vez y
+calcular los dos, y dos incr() simultáneos pueden sumar uno solo (la
+generación igual cambia). Es el mejor esfuerzo; con Redis son atómicos.
+"""
+import time
+
+from django.core.cache import caches
+
+from .versiones import leer_versiones, subir_version
+
+
+TTL_DEFECTO = 60          # segundos
+TTL_CANDADO = 30          # si el worker muere calculando, el candado expira
+ESPERA_MAX = 2.0          # segundos esperando el cálculo de otro worker
+INTERVALO_ESPERA = 0.05
+
+_FALTA = object()
+
+
+def _cache():
+    return caches["dashboards"]
+
+
+def _clave_generacion(grupo):
+    return f"gen:{grupo}"
+
+
+def generaciones(grupos):
+    return leer_versiones(_cache(), [_clave_generacion(g) for g in grupos])
+
+
+def incrementar_generacion(*grupos):
+    cache = _cache()
+    for grupo in grupos:
+        subir_version(cache, _clave_generacion(grupo))
+
+
+def widget(nombre, calcular, grupos=(), ttl=TTL_DEFECTO, variante=""):
+    """
+    Devuelve el valor cacheado del widget o lo calcula con `calcular()`.
+    El valor debe ser serializable (dicts, listas, instancias de modelos;
+    nada de querysets sin evaluar).
+    """
+    cache = _cache()
+    base = f"frag:{nombre}:{variante}"
+    gens = ".".join(str(g) for g in generaciones(grupos))
+    clave = f"{base}:{gens}"
+    clave_ultimo = f"{base}:ultimo"
+    candado = f"{clave}:calculando"
+
+    valor = cache.get(clave, _FALTA)
+    if valor is not _FALTA:
+        return valor
+
+    if not cache.add(candado, 1, TTL_CANDADO):
+        # Otro worker ya está calculando: servir el último valor si existe…
+        ultimo = cache.get(clave_ultimo, _FALTA)
+        if ultimo is not _FALTA:
+            return ultimo
+
+        # …o esperar a que termine
+        limite = time.monotonic() + ESPERA_MAX
+        while time.monotonic() < limite:
+            time.sleep(INTERVALO_ESPERA)
+            valor = cache.get(clave, _FALTA)
+            if valor is not _FALTA:
+                return valor
+            if cache.get(candado) is None:
+                break
+
+        # El otro worker falló o tarda demasiado: calcular sin candado
+        return calcular()
+
+    try:
+        valor = calcular()
+        cache.set(clave, valor, ttl)
+        # El último valor vive más para servirlo mientras otro recalcula
+        cache.set(clave_ultimo, valor, ttl * 10)
+    finally:
+        cache.delete(candado)
+
+    return valor
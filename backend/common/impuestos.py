@@ -0,0 +1,75 @@
+# common/impuestos.py
+"""
+Cálculo de líneas e impuestos (ISV) compartido por ventas, compras y facturas.
+
+Regla única:
+  - subtotal de línea = cantidad × precio, redondeado a centavos
+  - impuesto de línea = subtotal × tasa, redondeado a centavos
+  - total de línea    = subtotal + impuesto
+  - totales del documento = suma de las líneas ya redondeadas
+
+Redondeo comercial (ROUND_HALF_UP), nunca float. Así la suma de las líneas
+de una factura siempre coincide con su total, sin centavos sueltos.
+
+La tasa es una fracción (0.15), como Producto.impuesto. Compra guarda la
+tasa como porcentaje (15.00): usar tasa_desde_porcentaje().
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+
+
+CENTAVO = Decimal("0.01")
+CERO = Decimal("0")
+CIEN = Decimal("100")
+TASA_ISV = Decimal("0.15")
+
+
+@dataclass
+class TotalesDocumento:
+    lineas: list = field(default_factory=list)   # [(subtotal, impuesto, total)]
+    subtotal: Decimal = CERO
+    impuesto: Decimal = CERO
+    total: Decimal = CERO
+
+
+def decimal(valor):
+    """Decimal desde int / str / float / Decimal (float vía str, sin arrastrar binario)."""
+    if isinstance(valor, Decimal):
+        return valor
+    if valor is None:
+        return CERO
+    return Decimal(str(valor))
+
+
+def dinero(valor):
+    return decimal(valor).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def tasa_desde_porcentaje(porcentaje):
+    return decimal(porcentaje) / CIEN
+
+
+def calcular_linea(cantidad, precio, tasa=TASA_ISV):
+    """(subtotal, impuesto, total) de una línea. Sin tasa: ISV general."""
+    subtotal = (decimal(cantidad) * decimal(precio)).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+    impuesto = (subtotal * decimal(tasa)).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+    return subtotal, impuesto, subtotal + impuesto
+
+
+def calcular(lineas):
+    """
+    Calcula todas las líneas y los totales del documento en una pasada.
+
+    `lineas`: iterable de (cantidad, precio, tasa). Devuelve TotalesDocumento
+    con las líneas en el mismo orden.
+    """
+    resultado = []
+    agregar = resultado.append
+    suma_sub = suma_imp = CERO
+    for cantidad, precio, tasa in lineas:
+        subtotal = (decimal(cantidad) * decimal(precio)).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+        impuesto = (subtotal * decimal(tasa)).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+        agregar((subtotal, impuesto, subtotal + impuesto))
+        suma_sub += subtotal
+        suma_imp += impuesto
+    return TotalesDocumento(resultado, suma_sub, suma_imp, suma_sub + suma_imp)
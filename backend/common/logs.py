@@ -0,0 +1,23 @@
+# common/logs.py
+import json
+import logging
+
+
+# Atributos que trae todo LogRecord; lo demás viene de `extra=`
+_CAMPOS_BASE = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por evento, con los campos pasados en `extra=`."""
+
+    def format(self, record):
+        data = {
+            "ts": self.formatTime(record),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _CAMPOS_BASE:
+                data[clave] = valor
+        return json.dumps(data, ensure_ascii=False, default=str)
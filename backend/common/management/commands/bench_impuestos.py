@@ -0,0 +1,86 @@
+# common/management/commands/bench_impuestos.py
+import random
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.impuestos import CENTAVO, TASA_ISV, calcular, calcular_linea
+
+
+TASAS = (Decimal("0"), TASA_ISV, Decimal("0.18"))
+
+
+def _canasta(rnd, n):
+    return [
+        (
+            Decimal(rnd.randint(1, 50_000)) / 1000,     # cantidad con 3 decimales
+            Decimal(rnd.randint(1, 999_999)) / 100,     # precio con 2 decimales
+            rnd.choice(TASAS),
+        )
+        for _ in range(n)
+    ]
+
+
+def _referencia(lineas):
+    """Cálculo línea por línea, como estaba repetido en las vistas (redondeando al final)."""
+    sub = imp = Decimal("0")
+    for cantidad, precio, tasa in lineas:
+        s = cantidad * precio
+        sub += s
+        imp += s * tasa
+    return sub.quantize(CENTAVO, ROUND_HALF_UP), imp.quantize(CENTAVO, ROUND_HALF_UP)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide common.impuestos.calcular() con canastas aleatorias y verifica "
+        "que los totales cuadren con la suma de las líneas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--canastas", type=int, default=2000)
+        parser.add_argument("--lineas", type=int, default=25)
+        parser.add_argument("--semilla", type=int, default=1)
+
+    def handle(self, *args, **opts):
+        rnd = random.Random(opts["semilla"])
+        canastas = [_canasta(rnd, opts["lineas"]) for _ in range(opts["canastas"])]
+        n_lineas = opts["canastas"] * opts["lineas"]
+
+        # Consistencia del redondeo
+        diferencias = 0
+        for lineas in canastas:
+            t = calcular(lineas)
+            if t.total != t.subtotal + t.impuesto:
+                raise CommandError("total ≠ subtotal + impuesto")
+            if [calcular_linea(*l) for l in lineas] != t.lineas:
+                raise CommandError("calcular() no coincide con calcular_linea()")
+            for s, i, tot in t.lineas:
+                if s != s.quantize(CENTAVO) or i != i.quantize(CENTAVO) or tot != s + i:
+                    raise CommandError("línea sin redondear a centavos")
+            if sum(l[2] for l in t.lineas) != t.total:
+                raise CommandError("la suma de las líneas no da el total")
+            if _referencia(lineas)[1] != t.impuesto:
+                diferencias += 1
+
+        # Tiempo
+        inicio = time.perf_counter()
+        for lineas in canastas:
+            calcular(lineas)
+        seg_calcular = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        for lineas in canastas:
+            _referencia(lineas)
+        seg_referencia = time.perf_counter() - inicio
+
+        self.stdout.write(
+            f"{n_lineas} líneas: calcular {seg_calcular * 1e6 / n_lineas:.2f} µs/línea, "
+            f"sin redondeo por línea {seg_referencia * 1e6 / n_lineas:.2f} µs/línea"
+        )
+        self.stdout.write(
+            f"Canastas donde redondear por línea cambia el ISV total en centavos: "
+            f"{diferencias}/{opts['canastas']}"
+        )
+        self.stdout.write(self.style.SUCCESS("Redondeo consistente."))
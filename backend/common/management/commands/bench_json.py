@@ -0,0 +1,95 @@
+# common/management/commands/bench_json.py
+import json
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+
+from common import json_rapido
+from common.json_rapido import codificador, texto
+
+
+_FILA = codificador(
+    ("id", None), ("nombre", None), ("precio", float), ("codigo", texto), ("impuesto", float),
+)
+
+
+def _filas(rnd, n):
+    """Tuplas como las de values_list() en la búsqueda de productos."""
+    return [
+        (
+            i,
+            f"Producto {rnd.randint(1, 10**6)} ñandú 500 g",
+            Decimal(rnd.randint(100, 999_999)) / 100,
+            str(rnd.randint(10**11, 10**12)) if rnd.random() < 0.9 else None,
+            rnd.choice((Decimal("0.15"), Decimal("0.00"))),
+        )
+        for i in range(n)
+    ]
+
+
+def _como_antes(filas):
+    # dict por fila a mano + JsonResponse (DjangoJSONEncoder)
+    return JsonResponse({"ok": True, "results": [
+        {
+            "id": f[0],
+            "nombre": f[1],
+            "precio": float(f[2]),
+            "codigo": f[3] or "",
+            "impuesto": float(f[4]),
+        }
+        for f in filas
+    ]}).content
+
+
+def _codificador_json(filas):
+    return json.dumps(
+        {"ok": True, "results": [_FILA(f) for f in filas]},
+        ensure_ascii=False, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _codificador_rapido(filas):
+    return json_rapido.dumps({"ok": True, "results": [_FILA(f) for f in filas]})
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la serialización de respuestas de 1000 filas: dicts a mano + "
+        "JsonResponse contra los codificadores de common.json_rapido."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=1000)
+        parser.add_argument("--repeticiones", type=int, default=200)
+        parser.add_argument("--semilla", type=int, default=1)
+
+    def handle(self, *args, **opts):
+        filas = _filas(random.Random(opts["semilla"]), opts["filas"])
+        variantes = [
+            ("dicts + JsonResponse", _como_antes),
+            ("codificador + json", _codificador_json),
+        ]
+        if json_rapido.orjson is not None:
+            variantes.append(("codificador + orjson", _codificador_rapido))
+        else:
+            self.stdout.write("orjson no está instalado: se omite esa variante.")
+
+        referencia = json.loads(_como_antes(filas))
+        base = None
+        for nombre, funcion in variantes:
+            cuerpo = funcion(filas)
+            if json.loads(cuerpo) != referencia:
+                self.stderr.write(f"{nombre}: el contenido no coincide con JsonResponse")
+                continue
+            inicio = time.perf_counter()
+            for _ in range(opts["repeticiones"]):
+                funcion(filas)
+            seg = (time.perf_counter() - inicio) / opts["repeticiones"]
+            base = base or seg
+            self.stdout.write(
+                f"{nombre:24} {seg * 1000:7.2f} ms/respuesta  {len(cuerpo):8} bytes  "
+                f"{len(cuerpo) / seg / 1e6:7.1f} MB/s  ×{base / seg:.1f}"
+            )
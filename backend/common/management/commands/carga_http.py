@@ -0,0 +1,72 @@
+# common/management/commands/carga_http.py
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+RUTAS_POS = (
+    "/ventas/api/buscar-productos/?q=a",
+    "/ventas/api/recientes/",
+)
+
+
+def _pedir(url, cookie, timeout):
+    req = urllib.request.Request(url, headers={"Cookie": cookie} if cookie else {})
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            r.read()
+            ok = r.status == 200
+    except (urllib.error.URLError, TimeoutError):
+        ok = False
+    return ok, time.perf_counter() - inicio
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de los endpoints del POS contra uno o varios servidores "
+        "(p. ej. gunicorn/WSGI en :80 y uvicorn/ASGI en :8001) y compara latencias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--servidor", action="append", required=True,
+            help="URL base; repetir para comparar (http://localhost --servidor http://localhost:8001)",
+        )
+        parser.add_argument("--ruta", action="append", help=f"Rutas a pedir (por defecto {RUTAS_POS})")
+        parser.add_argument("--sesion", default="", help="Valor de la cookie sessionid de un usuario")
+        parser.add_argument("--peticiones", type=int, default=500)
+        parser.add_argument("--concurrencia", type=int, default=20)
+        parser.add_argument("--timeout", type=float, default=10.0)
+
+    def handle(self, *args, **opts):
+        rutas = opts["ruta"] or RUTAS_POS
+        cookie = f"sessionid={opts['sesion']}" if opts["sesion"] else ""
+        n = opts["peticiones"]
+        if n < 1 or opts["concurrencia"] < 1:
+            raise CommandError("--peticiones y --concurrencia deben ser positivos.")
+
+        for servidor in opts["servidor"]:
+            urls = [servidor.rstrip("/") + rutas[i % len(rutas)] for i in range(n)]
+
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=opts["concurrencia"]) as pool:
+                resultados = list(pool.map(lambda u: _pedir(u, cookie, opts["timeout"]), urls))
+            segundos = time.perf_counter() - inicio
+
+            tiempos = sorted(t * 1000 for ok, t in resultados if ok)
+            errores = n - len(tiempos)
+            if not tiempos:
+                self.stdout.write(self.style.ERROR(f"{servidor}: {errores} errores, sin respuestas válidas"))
+                continue
+
+            p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+            self.stdout.write(
+                f"{servidor}: {n / segundos:.1f} req/s | "
+                f"p50 {statistics.median(tiempos):.1f} ms | p95 {p95:.1f} ms | "
+                f"máx {tiempos[-1]:.1f} ms | errores {errores}"
+            )
@@ -0,0 +1,99 @@
+# common/management/commands/verificar_indices.py
+import json
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from common.fechas import rango_dia, rango_mes
+
+
+def _consultas():
+    """
+    Consultas calientes de las vistas, con los mismos filtros que usan.
+    Cada una debe resolverse con un índice, no recorriendo la tabla.
+    """
+    from compras.models import Compra
+    from facturas.models import Factura
+    from inventario.models import MovimientoInventario
+    from maestros.models import Producto
+    from ventas.models import CuentaPorCobrar, Venta
+
+    hoy = timezone.localdate()
+    return [
+        ("Ventas del día (dashboard)", Venta.objects.filter(**rango_dia("creado", hoy))),
+        ("Ventas del mes (dashboard)", Venta.objects.filter(**rango_mes("creado", hoy))),
+        ("Ventas pagadas del día", Venta.objects.filter(estado="PAGADA", **rango_dia("creado", hoy))),
+        ("Ventas por método de pago", Venta.objects.filter(metodo_pago="EFECTIVO", **rango_dia("creado", hoy))),
+        ("Cartera vigente", CuentaPorCobrar.objects.filter(saldo_pendiente__gt=0, fecha_vencimiento__gte=hoy)),
+        ("Cartera vencida", CuentaPorCobrar.objects.filter(saldo_pendiente__gt=0, fecha_vencimiento__lt=hoy)),
+        ("Cuentas creadas del día", CuentaPorCobrar.objects.filter(**rango_dia("creado", hoy))),
+        ("Facturas por tipo (api_facturas_list)", Factura.objects.filter(tipo="VENTA").order_by("-fecha", "-id")[:200]),
+        ("Facturas recientes", Factura.objects.order_by("-fecha", "-id")[:200]),
+        ("Movimientos por referencia", MovimientoInventario.objects.filter(referencia__in=["Compra #1", "Compra #2"])),
+        ("Compras confirmadas del mes", Compra.objects.filter(estado="CONFIRMADA", fecha__gte=hoy - timedelta(days=30))),
+        ("Catálogo por cursor", Producto.objects.order_by("actualizado", "id")[:100]),
+    ]
+
+
+# SQLite: "SCAN ventas_venta" es recorrido completo; "SCAN … USING INDEX" no
+_SCAN_SQLITE = re.compile(r"\bSCAN (?:TABLE )?(\w+)(?! USING)(?:\s|$)")
+_SCAN_POSTGRES = re.compile(r"Seq Scan on (\w+)")
+
+
+def _tablas_mysql(nodo):
+    """Tablas con access_type ALL en el plan JSON de MySQL."""
+    if isinstance(nodo, dict):
+        if nodo.get("access_type") == "ALL" and "table_name" in nodo:
+            yield nodo["table_name"]
+        for valor in nodo.values():
+            yield from _tablas_mysql(valor)
+    elif isinstance(nodo, list):
+        for valor in nodo:
+            yield from _tablas_mysql(valor)
+
+
+def recorridos_completos(qs):
+    """Tablas que el plan de `qs` recorre completas (lista vacía si ninguna)."""
+    motor = connection.vendor
+    if motor == "mysql":
+        return list(_tablas_mysql(json.loads(qs.explain(format="JSON"))))
+    plan = qs.explain()
+    if motor == "sqlite":
+        return _SCAN_SQLITE.findall(plan)
+    if motor == "postgresql":
+        return _SCAN_POSTGRES.findall(plan)
+    raise CommandError(f"Motor no soportado: {motor}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Revisa con EXPLAIN que las consultas calientes (ventas por fecha, "
+        "cartera, facturas, movimientos por referencia, compras, catálogo) "
+        "usen índice. Falla si alguna recorre la tabla completa. Correr contra "
+        "una base con datos de tamaño real: con tablas casi vacías MySQL "
+        "prefiere el recorrido completo y puede dar falsos positivos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--plan", action="store_true", help="Mostrar el plan de cada consulta")
+
+    def handle(self, *args, **options):
+        fallas = []
+        for nombre, qs in _consultas():
+            tablas = recorridos_completos(qs)
+            if tablas:
+                fallas.append(nombre)
+                self.stdout.write(self.style.ERROR(
+                    f"  ✗ {nombre}: recorrido completo de {', '.join(tablas)}"
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"  ✓ {nombre}"))
+            if options["plan"]:
+                self.stdout.write(qs.explain())
+
+        if fallas:
+            raise CommandError(f"{len(fallas)} consulta(s) sin índice: {', '.join(fallas)}")
+        self.stdout.write(self.style.SUCCESS("Todas las consultas calientes usan índice."))
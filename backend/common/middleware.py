@@ -0,0 +1,133 @@
+# common/middleware.py
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from .db.pool import estadisticas_pools
+from .consultas import (
+    RegistroConsultas, PresupuestoConsultasExcedido, verificar_presupuesto,
+)
+
+logger = logging.getLogger("sipv.consultas")
+
+
+class InstrumentacionConsultasMiddleware:
+    """
+    Mide consultas SQL por request y las expone:
+      - Header Server-Timing (visible en DevTools → Network → Timing)
+      - Log estructurado en el logger "sipv.consultas"
+      - Presupuesto por vista (@presupuesto_consultas): aviso en log, y
+        excepción si SIPV_PRESUPUESTO_CONSULTAS_ESTRICTO está activo (tests).
+
+    Funciona bajo WSGI y ASGI. Bajo ASGI no obliga a Django a pasar la
+    cadena a modo síncrono, así que las vistas async (ventas/views_async.py)
+    siguen siendo async.
+
+    En una respuesta por partes (StreamingHttpResponse) las consultas corren
+    mientras se envía el cuerpo, después de que la vista retornó: se siguen
+    contando hasta la última parte y el log y el presupuesto se revisan al
+    terminar. Esas respuestas no llevan Server-Timing (los encabezados ya
+    salieron cuando se conoce el total).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        registro = self._iniciar(request)
+        inicio = time.perf_counter()
+        with registro.activo():
+            response = self.get_response(request)
+        return self._terminar(request, response, registro, inicio)
+
+    async def __acall__(self, request):
+        registro = self._iniciar(request)
+        inicio = time.perf_counter()
+
+        # El ORM async corre en el hilo "thread sensitive" del request: el
+        # execute_wrapper se instala y se quita en ese mismo hilo.
+        pila = ExitStack()
+        await sync_to_async(pila.enter_context)(registro.activo())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(pila.close)()
+        return self._terminar(request, response, registro, inicio)
+
+    def _iniciar(self, request):
+        request.presupuesto_consultas = None
+        request.nombre_vista = ""
+        return RegistroConsultas()
+
+    def _terminar(self, request, response, registro, inicio):
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._por_partes(
+                response.streaming_content, request, response, registro, inicio
+            )
+            return response
+
+        total_ms = (time.perf_counter() - inicio) * 1000
+
+        response["Server-Timing"] = (
+            f'db;desc="{registro.total} consultas, {registro.total_repetidas} repetidas";'
+            f"dur={registro.tiempo_ms:.1f}, "
+            f"total;dur={total_ms:.1f}"
+        )
+        self._registrar(request, response, registro, total_ms)
+        return response
+
+    def _por_partes(self, partes, request, response, registro, inicio):
+        # Se instala en el hilo que consume el cuerpo (el del servidor WSGI,
+        # o el de sync_to_async bajo ASGI)
+        with registro.activo():
+            yield from partes
+        self._registrar(request, response, registro, (time.perf_counter() - inicio) * 1000)
+
+    def _registrar(self, request, response, registro, total_ms):
+        extra = {
+            "vista": request.nombre_vista,
+            "metodo": request.method,
+            "ruta": request.path,
+            "status": response.status_code,
+            "consultas": registro.total,
+            "db_ms": round(registro.tiempo_ms, 2),
+            "total_ms": round(total_ms, 2),
+            "repetidas": registro.repetidas,
+        }
+        # Solo con ENGINE common.db.mysql_pool: estado del pool de este worker
+        pools = estadisticas_pools()
+        if pools:
+            extra["pool"] = pools
+
+        logger.info(
+            "%s %s → %s consultas en %.1f ms",
+            request.method, request.path, registro.total, registro.tiempo_ms,
+            extra=extra,
+        )
+
+        if request.presupuesto_consultas:
+            max_consultas, max_repetidas = request.presupuesto_consultas
+            try:
+                verificar_presupuesto(
+                    registro, max_consultas, max_repetidas, nombre=request.nombre_vista
+                )
+            except PresupuestoConsultasExcedido as e:
+                if getattr(settings, "SIPV_PRESUPUESTO_CONSULTAS_ESTRICTO", False):
+                    raise
+                logger.warning(str(e))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.nombre_vista = f"{view_func.__module__}.{view_func.__name__}"
+        request.presupuesto_consultas = getattr(view_func, "presupuesto_consultas", None)
+        return None
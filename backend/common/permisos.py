@@ -1,21 +1,47 @@
 # common/permisos.py
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject
 
+from .versiones import leer_version, subir_version
 
-def permisos_modulos(request):
-    user = request.user
+
+CLAVE_SESION = "permisos_modulos"
+CLAVE_VERSION = "version"
+
+FLAGS_VACIOS = {
+    "puede_inventario": False,
+    "puede_compras": False,
+    "puede_maestros": False,
+    "puede_ventas": False,
+    "puede_facturas": False,
+}
+
+
+def _cache():
+    return caches["permisos"]
+
+
+def version_permisos():
+    """
+    Versión global de permisos. Cambia cada vez que authapp modifica
+    grupos o permisos; las sesiones con otra versión recalculan sus flags.
+    Si la clave se pierde del cache se crea una nueva (basada en la hora),
+    así nunca coincide con una versión vieja guardada en sesión.
+    """
+    return leer_version(_cache(), CLAVE_VERSION)
+
+
+def invalidar_permisos():
+    subir_version(_cache(), CLAVE_VERSION)
+
+
+def calcular_permisos(user):
     """
     Devuelve flags de qué módulos puede ver el usuario,
     para usarlos en la navbar (base.html) y en los dashboards.
     """
     if not user.is_authenticated:
-        return {
-            "puede_inventario": False,
-            "puede_compras": False,
-            "puede_maestros": False,
-            "puede_ventas": False,
-	    "puede_facturas": False,
-
-        }
+        return dict(FLAGS_VACIOS)
 
     puede_inventario = (
         user.has_perm("inventario.view_movimientoinventario")
@@ -40,3 +66,35 @@ def permisos_modulos(request):
         "puede_ventas": puede_ventas,
         "puede_facturas": puede_facturas,
     }
+
+
+def permisos_usuario(request):
+    """
+    Flags del usuario guardados en su sesión: se calculan una vez por login
+    y solo se recalculan si cambió la versión global de permisos.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return dict(FLAGS_VACIOS)
+
+    version = version_permisos()
+    guardado = request.session.get(CLAVE_SESION)
+
+    if guardado and guardado.get("v") == version and guardado.get("u") == user.pk:
+        return guardado["flags"]
+
+    flags = calcular_permisos(user)
+    request.session[CLAVE_SESION] = {"v": version, "u": user.pk, "flags": flags}
+    return flags
+
+
+def permisos_modulos(request):
+    """
+    Context processor. Cada flag es perezoso: si la plantilla no pinta la
+    navbar (JSON, parciales HTMX), no se toca la sesión ni el cache.
+    """
+    flags = SimpleLazyObject(lambda: permisos_usuario(request))
+    return {
+        clave: SimpleLazyObject(lambda clave=clave: flags[clave])
+        for clave in FLAGS_VACIOS
+    }
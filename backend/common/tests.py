@@ -1,3 +1,153 @@
-from django.test import TestCase
+import random
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from .impuestos import (
+    CENTAVO, TASA_ISV, calcular, calcular_linea, dinero, tasa_desde_porcentaje,
+)
+from .versiones import leer_version, leer_versiones, subir_version
+from .management.commands.verificar_indices import (
+    _SCAN_SQLITE, _consultas, _tablas_mysql, recorridos_completos,
+)
+
+
+class ImpuestosTests(SimpleTestCase):
+    TASAS = (Decimal("0"), TASA_ISV, Decimal("0.18"))
+
+    def _lineas_al_azar(self, semilla, n):
+        azar = random.Random(semilla)
+        return [
+            (
+                Decimal(azar.randint(1, 50_000)) / 1000,     # cantidad con 3 decimales
+                Decimal(azar.randint(1, 1_000_000)) / 1000,  # precio con fracción de centavo
+                azar.choice(self.TASAS),
+            )
+            for _ in range(n)
+        ]
+
+    def test_redondeo_comercial(self):
+        # ROUND_HALF_UP: medio centavo sube, nunca redondeo bancario
+        self.assertEqual(calcular_linea(1, "0.125", 0), (Decimal("0.13"), Decimal("0"), Decimal("0.13")))
+        self.assertEqual(calcular_linea(1, "0.10", "0.15")[1], Decimal("0.02"))    # 0.015
+        self.assertEqual(calcular_linea(1, "0.30", "0.15")[1], Decimal("0.05"))    # 0.045
+        self.assertEqual(dinero("2.675"), Decimal("2.68"))
+
+    def test_float_sin_arrastre_binario(self):
+        self.assertEqual(calcular_linea(3, 0.1, 0.15), (Decimal("0.30"), Decimal("0.05"), Decimal("0.35")))
+        self.assertEqual(dinero(1.005), Decimal("1.01"))
+
+    def test_tasa_por_defecto_y_porcentaje(self):
+        self.assertEqual(calcular_linea(2, "100"), calcular_linea(2, "100", TASA_ISV))
+        self.assertEqual(tasa_desde_porcentaje("15.00"), TASA_ISV)
+
+    def test_invariantes_de_linea(self):
+        for cantidad, precio, tasa in self._lineas_al_azar(35, 2000):
+            subtotal, impuesto, total = calcular_linea(cantidad, precio, tasa)
+            for valor in (subtotal, impuesto, total):
+                self.assertEqual(valor, valor.quantize(CENTAVO))
+            self.assertEqual(total, subtotal + impuesto)
+            # Cada redondeo se aleja como mucho medio centavo del valor exacto
+            self.assertLessEqual(abs(subtotal - cantidad * precio), Decimal("0.005"))
+            self.assertLessEqual(abs(impuesto - subtotal * tasa), Decimal("0.005"))
+
+    def test_totales_suman_las_lineas(self):
+        for semilla in range(50):
+            lineas = self._lineas_al_azar(semilla, semilla % 25 + 1)
+            totales = calcular(lineas)
+
+            self.assertEqual(totales.lineas, [calcular_linea(*linea) for linea in lineas])
+            self.assertEqual(totales.subtotal, sum(l[0] for l in totales.lineas))
+            self.assertEqual(totales.impuesto, sum(l[1] for l in totales.lineas))
+            self.assertEqual(totales.total, sum(l[2] for l in totales.lineas))
+            self.assertEqual(totales.total, totales.subtotal + totales.impuesto)
+
+    def test_orden_de_lineas_no_cambia_totales(self):
+        lineas = self._lineas_al_azar(7, 30)
+        totales = calcular(lineas)
+        random.Random(7).shuffle(lineas)
+        revueltas = calcular(lineas)
+        self.assertEqual(
+            (totales.subtotal, totales.impuesto, totales.total),
+            (revueltas.subtotal, revueltas.impuesto, revueltas.total),
+        )
+
+    def test_documento_vacio(self):
+        totales = calcular([])
+        self.assertEqual((totales.lineas, totales.total), ([], Decimal("0")))
+
+
+class VersionesTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = LocMemCache("pruebas-versiones", {})
+        self.cache.clear()
+
+    def test_leer_y_subir(self):
+        version = leer_version(self.cache, "v")
+        self.assertEqual(leer_version(self.cache, "v"), version)
+        subir_version(self.cache, "v")
+        self.assertEqual(leer_version(self.cache, "v"), version + 1)
+
+    def test_clave_perdida_se_siembra_con_la_hora(self):
+        with mock.patch("common.versiones.time.time", return_value=1000.0):
+            subir_version(self.cache, "v")
+            self.assertEqual(leer_version(self.cache, "v"), 1_000_000)
+            subir_version(self.cache, "v")
+        self.cache.delete("v")
+        with mock.patch("common.versiones.time.time", return_value=1001.0):
+            self.assertEqual(leer_version(self.cache, "v"), 1_001_000)
+
+    def test_leer_versiones_en_orden(self):
+        subir_version(self.cache, "b")
+        subir_version(self.cache, "b")
+        a, b = leer_versiones(self.cache, ["a", "b"])
+        self.assertEqual([a, b], [leer_version(self.cache, "a"), leer_version(self.cache, "b")])
+
+
+class VerificarIndicesTests(TestCase):
+    """
+    Los planes de las consultas calientes (verificar_indices) con el motor de
+    la base de pruebas. En SQLite el planificador no depende del tamaño de la
+    tabla, así que un índice que falte se nota aunque esté vacía. MySQL con
+    tablas casi vacías prefiere el recorrido completo: ahí el comando se
+    corre contra una copia de producción (README).
+    """
+
+    solo_sqlite = skipUnless(connection.vendor == "sqlite", "Plan dependiente del tamaño de las tablas")
+
+    @solo_sqlite
+    def test_consultas_calientes_usan_indice(self):
+        for nombre, qs in _consultas():
+            with self.subTest(nombre):
+                self.assertEqual(recorridos_completos(qs), [])
+
+    def test_detecta_recorrido_completo(self):
+        from ventas.models import Venta
+
+        self.assertEqual(recorridos_completos(Venta.objects.filter(total__gt=0)), ["ventas_venta"])
+
+    @solo_sqlite
+    def test_comando(self):
+        salida = StringIO()
+        call_command("verificar_indices", stdout=salida)
+        self.assertIn("Todas las consultas calientes usan índice.", salida.getvalue())
+
+    def test_plan_sqlite(self):
+        self.assertEqual(_SCAN_SQLITE.findall("SCAN ventas_venta"), ["ventas_venta"])
+        self.assertEqual(_SCAN_SQLITE.findall("SCAN TABLE ventas_venta"), ["ventas_venta"])
+        self.assertEqual(_SCAN_SQLITE.findall("SCAN ventas_venta USING INDEX venta_creado"), [])
+        self.assertEqual(
+            _SCAN_SQLITE.findall("SEARCH ventas_venta USING INDEX venta_creado (creado>? AND creado<?)"), []
+        )
+
+    def test_plan_mysql(self):
+        plan = {"query_block": {"nested_loop": [
+            {"table": {"table_name": "ventas_venta", "access_type": "range", "key": "venta_creado"}},
+            {"table": {"table_name": "auth_user", "access_type": "ALL"}},
+        ]}}
+        self.assertEqual(list(_tablas_mysql(plan)), ["auth_user"])
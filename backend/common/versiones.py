@@ -0,0 +1,41 @@
+# common/versiones.py
+"""
+Contadores de versión en el cache.
+
+Una versión es un entero que va en las claves (o en el ETag) de lo que
+depende de ella: subirla invalida todo de una vez, sin borrar claves. La
+usan la versión del catálogo (common.catalogo), la de permisos
+(common.permisos) y las generaciones de los widgets (common.fragmentos).
+
+Si la clave se pierde del cache (desalojo, reinicio, "limpiar" en
+/admin/cache/) se vuelve a crear con la hora en milisegundos, así nunca
+repite un valor viejo que siga guardado en otras claves o en sesiones.
+"""
+import time
+
+
+def _semilla():
+    return int(time.time() * 1000)
+
+
+def leer_version(cache, clave):
+    version = cache.get(clave)
+    if version is None:
+        semilla = _semilla()
+        cache.add(clave, semilla, None)
+        version = cache.get(clave, semilla)
+    return version
+
+
+def leer_versiones(cache, claves):
+    """Como leer_version() para varias claves, con un solo get_many."""
+    valores = cache.get_many(claves)
+    return [valores[clave] if clave in valores else leer_version(cache, clave) for clave in claves]
+
+
+def subir_version(cache, clave):
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # No existía: cualquier valor nuevo invalida lo que hubiera
+        cache.add(clave, _semilla(), None)
@@ -1,3 +1,91 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import caches
+from django.db import connections
+from django.http import JsonResponse
+from django.shortcuts import render, redirect
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
 
-# Create your views here.
+from .db.pool import estadisticas_pools
+
+
+# Archivos de MEDIA cuyo nombre cambia con el contenido (miniaturas con hash)
+MEDIA_INMUTABLE = ("productos/miniaturas/",)
+
+
+@staff_member_required
+def cache_estadisticas(request):
+    """
+    Página de administración con hits / misses / desalojos por namespace.
+    POST con accion=limpiar|reiniciar y namespace=<alias>.
+    """
+    aliases = ["default", *settings.CACHE_NAMESPACES]
+
+    if request.method == "POST":
+        alias = request.POST.get("namespace")
+        accion = request.POST.get("accion")
+
+        if alias in aliases:
+            cache = caches[alias]
+            if accion == "limpiar":
+                cache.clear()
+                messages.success(request, f"Cache '{alias}' limpiado.")
+            elif accion == "reiniciar" and hasattr(cache, "reiniciar_estadisticas"):
+                cache.reiniciar_estadisticas()
+                messages.success(request, f"Contadores de '{alias}' reiniciados.")
+
+        return redirect("cache_estadisticas")
+
+    filas = []
+    for alias in aliases:
+        cache = caches[alias]
+        stats = cache.estadisticas() if hasattr(cache, "estadisticas") else {}
+        filas.append({
+            "alias": alias,
+            "backend": type(cache).__name__,
+            **stats,
+        })
+
+    return render(request, "admin/cache_estadisticas.html", {
+        **admin.site.each_context(request),
+        "title": "Estadísticas de cache",
+        "filas": filas,
+        "backend": settings.CACHE_BACKEND,
+    })
+
+
+@staff_member_required
+def db_estadisticas(request):
+    """
+    Conexiones a la base de datos del worker que atiende el request: pool
+    (en uso, libres, esperas, timeouts) si ENGINE es common.db.mysql_pool.
+    Cada worker tiene su propio pool; repetir la llamada muestra otros.
+    """
+    return JsonResponse({
+        "pools": estadisticas_pools(),
+        "conexiones": [
+            {
+                "alias": alias,
+                "engine": connections[alias].settings_dict["ENGINE"],
+                "conn_max_age": connections[alias].settings_dict["CONN_MAX_AGE"],
+                "health_checks": connections[alias].settings_dict["CONN_HEALTH_CHECKS"],
+            }
+            for alias in connections
+        ],
+    })
+
+
+def media(request, path):
+    """
+    Sirve MEDIA_ROOT cuando no hay proxy delante (SERVIR_MEDIA). Responde
+    304 con If-Modified-Since; las miniaturas llevan hash en el nombre y se
+    cachean un año, el resto un día.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if path.startswith(MEDIA_INMUTABLE):
+        patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=60 * 60 * 24)
+    return response
@@ -1,5 +1,4 @@
 from django.contrib import admin
-from django.db.models import Sum, F, DecimalField
 from unfold.admin import ModelAdmin
 
 from .models import Compra, CompraDetalle
@@ -72,20 +71,10 @@ class CompraAdmin(ModelAdmin):
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
 
-        detalles = obj.detalles.all()
-        if not detalles.exists():
+        if not obj.detalles.exists():
             return
 
-        subtotal = detalles.aggregate(
-            total=Sum(
-                F("cantidad") * F("costo_unitario"),
-                output_field=DecimalField(max_digits=12, decimal_places=2)
-            )
-        )["total"] or 0
-
-        obj.subtotal = subtotal
-        obj.impuesto = round(subtotal * obj.tasa_impuesto / 100, 2)
-        obj.total = obj.subtotal + obj.impuesto
+        obj.subtotal, obj.impuesto, obj.total = obj.calcular_totales()
         obj.save()
 
 
@@ -101,18 +90,7 @@ class CompraAdmin(ModelAdmin):
         formset.save_m2m()
 
         compra = formset.instance
-        detalles = compra.detalles.all()
-
-        subtotal = detalles.aggregate(
-            total=Sum(
-                F("cantidad") * F("costo_unitario"),
-                output_field=DecimalField(max_digits=12, decimal_places=2)
-            )
-        )["total"] or 0
-
-        compra.subtotal = subtotal
-        compra.impuesto = round(subtotal * compra.tasa_impuesto / 100, 2)
-        compra.total = compra.subtotal + compra.impuesto
+        compra.subtotal, compra.impuesto, compra.total = compra.calcular_totales()
         compra.save()
 
 
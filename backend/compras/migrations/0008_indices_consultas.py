@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras', '0007_alter_compra_proveedor'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['estado', 'fecha'], name='compra_estado_fecha'),
+        ),
+    ]
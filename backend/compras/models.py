@@ -2,6 +2,7 @@
 from decimal import Decimal
 from django.db import models, transaction
 from django.utils import timezone
+from common.impuestos import calcular, tasa_desde_porcentaje
 from common.models import TimeStampedModel
 from maestros.models import Producto, Proveedor
 from inventario.models import MovimientoInventario
@@ -66,23 +67,29 @@ class Compra(TimeStampedModel):
 
     procesada = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Dashboards: compras CONFIRMADAS de los últimos 30 días
+            models.Index(fields=["estado", "fecha"], name="compra_estado_fecha"),
+        ]
+
     def __str__(self):
         return f"Compra #{self.pk} ({self.estado})"
 
+    @property
+    def tasa(self):
+        """tasa_impuesto (15.00) como fracción (0.15), la que usa common.impuestos."""
+        return tasa_desde_porcentaje(self.tasa_impuesto or 0)
+
     def calcular_totales(self):
         """
-        SOLO calcula (no guarda). Devuelve (subtotal, impuesto, total).
+        SOLO calcula (no guarda). Devuelve (subtotal, impuesto, total),
+        sumando las líneas redondeadas igual que sus facturas.
         """
-        sub = Decimal("0.00")
-
-        for d in self.detalles.all():
-            sub += (d.cantidad or 0) * (d.costo_unitario or 0)
-
-        sub = sub.quantize(Decimal("0.01"))
-        imp = (sub * (self.tasa_impuesto or 0) / Decimal("100")).quantize(Decimal("0.01"))
-        tot = (sub + imp).quantize(Decimal("0.01"))
-
-        return sub, imp, tot
+        t = calcular(
+            (d.cantidad or 0, d.costo_unitario or 0, self.tasa) for d in self.detalles.all()
+        )
+        return t.subtotal, t.impuesto, t.total
 
 
     @transaction.atomic
@@ -93,9 +100,16 @@ class Compra(TimeStampedModel):
         """
         if self.estado != "CONFIRMADA":
             return
-        for d in self.detalles.select_related("producto").all():
+        detalles = list(self.detalles.select_related("producto").all())
+        # Una consulta (índice movimiento_referencia) en vez de un exists() por detalle
+        existentes = set(
+            MovimientoInventario.objects.filter(
+                referencia__in=[f"COMPRA:{self.pk}:{d.pk}" for d in detalles]
+            ).values_list("referencia", flat=True)
+        )
+        for d in detalles:
             ref = f"COMPRA:{self.pk}:{d.pk}"
-            if MovimientoInventario.objects.filter(referencia=ref).exists():
+            if ref in existentes:
                 continue
             MovimientoInventario.objects.create(
                 producto=d.producto,
@@ -1,6 +1,7 @@
 # compras/signals.py
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from common.fragmentos import incrementar_generacion
 from .models import Compra, CompraDetalle
 
 def _recalcular_y_actualizar(compra: Compra):
@@ -12,6 +13,7 @@ def _recalcular_y_actualizar(compra: Compra):
     Compra.objects.filter(pk=compra.pk).update(subtotal=sub, impuesto=imp, total=tot)
     if compra.estado == "CONFIRMADA":
         compra.materializar_movimientos()
+    incrementar_generacion("compras")
 
 @receiver(post_save, sender=CompraDetalle)
 def recalc_on_detalle_save(sender, instance: CompraDetalle, created, **kwargs):
@@ -16,8 +16,11 @@ from .models import Compra, CompraDetalle
 from maestros.models import Proveedor, Producto
 from .forms import CompraForm, CompraDetalleFormSet
 from common.permisos import permisos_modulos
+from common.condicional import condicional
+from common.consultas import presupuesto_consultas
+from common.fragmentos import widget
+from common.impuestos import calcular_linea
 from facturas.models import Factura, FacturaDetalle
-from inventario.models import MovimientoInventario
 
 @login_required
 @permission_required("compras.add_compra", raise_exception=True)
@@ -40,12 +43,12 @@ def crear_compra_borrador(request):
 @login_required
 def detalle_pos_compra(request, pk):
     compra = get_object_or_404(
-        Compra.objects.select_related("proveedor").prefetch_related("detalles__producto"),
+        Compra.objects.select_related("proveedor", "factura").prefetch_related("detalles__producto"),
         pk=pk
     )
 
     proveedores = Proveedor.objects.filter(estado=True)
-    factura = Factura.objects.filter(numero=f"FC-{compra.id}").first()
+    factura = getattr(compra, "factura", None)
 
     return render(request, "compras/pos_detalle.html", {
         "compra": compra,
@@ -56,6 +59,11 @@ def detalle_pos_compra(request, pk):
 # ---------- Dashboard & charts ----------
 @login_required
 def dashboard(request):
+    ctx = widget("compras:dashboard", _contexto_dashboard, grupos=("compras", "maestros"))
+    return render(request, "compras/dashboard.html", ctx)
+
+
+def _contexto_dashboard():
     hoy = timezone.localdate()
     inicio_30 = hoy - timezone.timedelta(days=30)
 
@@ -80,12 +88,14 @@ def dashboard(request):
         )["x"],
 
         # Últimas confirmadas (mantengo esta por compatibilidad)
-        "ult_conf": Compra.objects.filter(estado="CONFIRMADA")
+        "ult_conf": list(
+            Compra.objects.filter(estado="CONFIRMADA")
             .select_related("proveedor")
-            .order_by("-fecha", "-id")[:5],
+            .order_by("-fecha", "-id")[:5]
+        ),
     }
 
-    ult_compras = (
+    ult_compras = list(
         Compra.objects.select_related("proveedor")
         .order_by("-fecha", "-id")[:10]
     )
@@ -186,10 +196,16 @@ def dashboard(request):
         "chart_data_json": json.dumps(chart_data, cls=DjangoJSONEncoder),
     }
 
-    return render(request, "compras/dashboard.html", ctx)
+    return ctx
 
 @login_required
+@condicional("compras", "maestros", diario=True)
 def dashboard_data(request):
+    data = widget("compras:dashboard_data", _datos_dashboard, grupos=("compras", "maestros"))
+    return JsonResponse(data)
+
+
+def _datos_dashboard():
     hoy = timezone.localdate()
     inicio_30 = hoy - timezone.timedelta(days=30)
 
@@ -199,7 +215,7 @@ def dashboard_data(request):
         Compra.objects.filter(fecha__gte=inicio_30, estado="CONFIRMADA")
         .annotate(d=TruncDate("fecha"))
         .values("d")
-        .annotate(total=Coalesce(Sum("total", output_field=dec2), 0))
+        .annotate(total=Coalesce(Sum("total", output_field=dec2), Value(0, output_field=dec2)))
         .order_by("d")
     )
     labels = [c["d"].strftime("%Y-%m-%d") for c in comp]
@@ -212,7 +228,7 @@ def dashboard_data(request):
             compra__estado="CONFIRMADA", compra__fecha__gte=inicio_30
         )
         .values("producto__nombre")
-        .annotate(q=Coalesce(Sum("cantidad", output_field=dec3), 0))
+        .annotate(q=Coalesce(Sum("cantidad", output_field=dec3), Value(0, output_field=dec3)))
         .order_by("-q")[:10]
     )
     top_labels = [t["producto__nombre"] for t in top_qs]
@@ -222,7 +238,7 @@ def dashboard_data(request):
     prov_qs = (
         Compra.objects.filter(estado="CONFIRMADA", fecha__gte=inicio_30)
         .values("proveedor__nombre")
-        .annotate(monto=Coalesce(Sum("total", output_field=dec2), 0))
+        .annotate(monto=Coalesce(Sum("total", output_field=dec2), Value(0, output_field=dec2)))
         .order_by("-monto")[:10]
     )
     prov_labels = [p["proveedor__nombre"] for p in prov_qs]
@@ -236,7 +252,7 @@ def dashboard_data(request):
             len(labels) == 0 and len(top_labels) == 0 and len(prov_labels) == 0
         ),
     }
-    return JsonResponse(data)
+    return data
 
 
 
@@ -334,16 +350,15 @@ def crear(request):
 @login_required
 def detalle(request, pk):
     compra = get_object_or_404(
-        Compra.objects.select_related("proveedor").prefetch_related("detalles__producto"),
+        Compra.objects.select_related("proveedor", "factura").prefetch_related("detalles__producto"),
         pk=pk
     )
 
     detalles = []
-    factura = Factura.objects.filter(numero=f"FC-{compra.pk}").first()
+    factura = getattr(compra, "factura", None)
 
     for d in compra.detalles.all():
-        subtotal = d.cantidad * d.costo_unitario
-        impuesto = subtotal * Decimal("0.15")
+        subtotal, impuesto, _ = calcular_linea(d.cantidad, d.costo_unitario, compra.tasa)
         detalles.append({
             "obj": d,
             "subtotal": subtotal,
@@ -358,10 +373,29 @@ def detalle(request, pk):
 
 
 
+def _lineas_factura(factura, compra):
+    """Líneas de la factura de compra, para un solo bulk_create."""
+    lineas = []
+    for det in compra.detalles.all():
+        subtotal, impuesto, total = calcular_linea(det.cantidad, det.costo_unitario, compra.tasa)
+        lineas.append(FacturaDetalle(
+            factura=factura,
+            producto_id=det.producto_id,
+            cantidad=det.cantidad,
+            precio_unitario=det.costo_unitario,
+            subtotal=subtotal,
+            impuesto=impuesto,
+            total=total,
+        ))
+    return lineas
+
+
 @login_required
 @permission_required("compras.change_compra", raise_exception=True)
 def confirmar(request, pk):
-    compra = get_object_or_404(Compra.objects.prefetch_related("detalles"), pk=pk)
+    compra = get_object_or_404(
+        Compra.objects.select_related("factura").prefetch_related("detalles"), pk=pk
+    )
 
 
     # Estado
@@ -375,12 +409,13 @@ def confirmar(request, pk):
 
 
     # Verificar si ya existe factura (idempotente)
-    factura = Factura.objects.filter(tipo="COMPRA", numero=f"FC-{compra.id}").first()
+    factura = getattr(compra, "factura", None)
 
     if not factura:
         factura = Factura.objects.create(
             tipo="COMPRA",
             numero=f"FC-{compra.id}",
+            compra=compra,
             proveedor=compra.proveedor,
             fecha=timezone.now(),
             subtotal=compra.subtotal,
@@ -392,17 +427,8 @@ def confirmar(request, pk):
         )
 
     # Crear líneas solo si no existen
-    if factura.lineas.count() == 0:
-        for det in compra.detalles.all():
-            FacturaDetalle.objects.create(
-                factura=factura,
-                producto=det.producto,
-                cantidad=det.cantidad,
-                precio_unitario=det.costo_unitario,
-                subtotal=det.cantidad * det.costo_unitario,
-                impuesto=(det.cantidad * det.costo_unitario) * Decimal("0.15"),
-                total=(det.cantidad * det.costo_unitario) * Decimal("1.15")
-            )
+    if not factura.detalles.exists():
+        FacturaDetalle.objects.bulk_create(_lineas_factura(factura, compra))
 
     # -----------------------------
 
@@ -441,35 +467,40 @@ def anular(request, pk):
 
 
 @login_required
+@presupuesto_consultas(3, max_repetidas=0)
 def api_buscar_productos(request):
     q = request.GET.get("q", "").strip()
 
     if len(q) < 2:
         return JsonResponse({"results": []})
 
-    productos = Producto.objects.filter(
-    Q(nombre__icontains=q) | Q(codigo_barras__icontains=q)
-    )[:10]
+    dec3 = DecimalField(max_digits=14, decimal_places=3)
+
+    # Stock como anotación: una sola consulta en vez de una por producto
+    productos = (
+        Producto.objects.filter(
+            Q(nombre__icontains=q) | Q(codigo_barras__icontains=q)
+        )
+        .select_related("categoria")
+        .annotate(
+            stock=Coalesce(
+                Sum("movimientos__cantidad", output_field=dec3),
+                Value(0, output_field=dec3),
+                output_field=dec3,
+            )
+        )[:10]
+    )
 
     data = []
 
     for p in productos:
-
-        stock = MovimientoInventario.objects.filter(producto=p).aggregate(
-            total=Coalesce(
-                Sum("cantidad", output_field=DecimalField(max_digits=14, decimal_places=3)),
-                Value(0, output_field=DecimalField(max_digits=14, decimal_places=3)),
-                output_field=DecimalField(max_digits=14, decimal_places=3),
-            )
-        )["total"] or 0
-
         data.append({
             "id": p.id,
             "nombre": p.nombre,
             "costo": float(p.costo_promedio or 0),
             "categoria": getattr(p.categoria, "nombre", ""),
             "codigo": p.codigo_barras or "",
-            "stock": float(stock),   
+            "stock": float(p.stock),
         })
 
     return JsonResponse({"results": data})
@@ -477,6 +508,7 @@ def api_buscar_productos(request):
 
 
 @login_required
+@presupuesto_consultas(8)
 def api_cargar_lineas(request, pk):
     compra = get_object_or_404(Compra, pk=pk)
 
@@ -484,22 +516,21 @@ def api_cargar_lineas(request, pk):
     subtotal = Decimal("0.00")
     impuesto = Decimal("0.00")
 
-    for det in compra.detalles.select_related("producto"):
-        producto = det.producto
-
+    dec3 = DecimalField(max_digits=14, decimal_places=3)
+    detalles = compra.detalles.select_related("producto__categoria").annotate(
+        stock=Coalesce(
+            Sum("producto__movimientos__cantidad", output_field=dec3),
+            Value(0, output_field=dec3),
+            output_field=dec3,
+        )
+    )
 
-        stock = MovimientoInventario.objects.filter(producto=producto).aggregate(
-            total=Coalesce(
-                Sum("cantidad", output_field=DecimalField(max_digits=14, decimal_places=3)),
-                Value(0, output_field=DecimalField(max_digits=14, decimal_places=3)),
-                output_field=DecimalField(max_digits=14, decimal_places=3),
-            )
-        )["total"] or 0
+    for det in detalles:
+        producto = det.producto
+        stock = det.stock
 
         # Calculo de totales
-        sub = det.cantidad * det.costo_unitario
-        imp = sub * Decimal("0.15")
-        tot = sub + imp
+        sub, imp, tot = calcular_linea(det.cantidad, det.costo_unitario, compra.tasa)
 
         subtotal += sub
         impuesto += imp
@@ -604,9 +635,10 @@ def api_completar_compra(request, pk):
 
     # Crear factura COMPRA
     factura, created = Factura.objects.get_or_create(
-        tipo="COMPRA",
-        numero=f"FC-{compra.id}",
+        compra=compra,
         defaults={
+            "tipo": "COMPRA",
+            "numero": f"FC-{compra.id}",
             "proveedor": compra.proveedor,
             "fecha": timezone.now(),
             "subtotal": compra.subtotal,
@@ -622,17 +654,8 @@ def api_completar_compra(request, pk):
         factura.save(update_fields=["creado_por"])
 
     # Crear líneas de factura si no existen
-    if created and factura.detalles.count() == 0:
-        for det in compra.detalles.all():
-            FacturaDetalle.objects.create(
-                factura=factura,
-                producto=det.producto,
-                cantidad=det.cantidad,
-                precio_unitario=det.costo_unitario,
-                subtotal=det.cantidad * det.costo_unitario,
-                impuesto=(det.cantidad * det.costo_unitario) * Decimal("0.15"),
-                total=(det.cantidad * det.costo_unitario) * Decimal("1.15"),
-            )
+    if created and not factura.detalles.exists():
+        FacturaDetalle.objects.bulk_create(_lineas_factura(factura, compra))
 
     return JsonResponse({"ok": True})
 
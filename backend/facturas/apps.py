@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FacturasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'facturas'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,59 @@
+# facturas/management/commands/facturar_pendientes.py
+import time
+from concurrent.futures import wait
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from common.fechas import FechaInvalida, leer_fecha
+from facturas.pdf import encolar_pdfs
+from facturas.servicios import LOTE, facturar_pendientes, ventas_sin_factura
+from sar.numeracion import NumeracionAgotada
+
+
+class Command(BaseCommand):
+    help = (
+        "Facturación de cierre: factura en bloques las ventas PAGADA sin "
+        "factura de un rango de días (por defecto, hoy) y genera sus PDFs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", help="Primer día, AAAA-MM-DD (por defecto hoy)")
+        parser.add_argument("--hasta", help="Último día, AAAA-MM-DD (por defecto igual a --desde)")
+        parser.add_argument("--lote", type=int, default=LOTE,
+                            help=f"Ventas por transacción (por defecto {LOTE})")
+        parser.add_argument("--usuario", help="Usuario que queda como creador de las facturas")
+        parser.add_argument("--sin-pdf", action="store_true", help="No generar los PDFs")
+
+    def handle(self, *args, **opts):
+        try:
+            desde = leer_fecha(opts["desde"], "--desde") or timezone.localdate()
+            hasta = leer_fecha(opts["hasta"], "--hasta") or desde
+        except FechaInvalida as e:
+            raise CommandError(str(e))
+
+        usuario = None
+        if opts["usuario"]:
+            usuario = User.objects.filter(username=opts["usuario"]).first()
+            if usuario is None:
+                raise CommandError(f"No existe el usuario {opts['usuario']}")
+
+        inicio = time.monotonic()
+        pendientes = ventas_sin_factura(desde, hasta).count()
+        self.stdout.write(f"Ventas sin factura del {desde} al {hasta}: {pendientes}")
+
+        try:
+            ids = facturar_pendientes(desde, hasta, usuario=usuario, lote=opts["lote"])
+        except NumeracionAgotada as e:
+            raise CommandError(f"{e} Los bloques anteriores quedaron facturados.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Facturas creadas: {len(ids)} ({time.monotonic() - inicio:.1f} s)"
+        ))
+
+        if ids and not opts["sin_pdf"]:
+            inicio = time.monotonic()
+            wait(encolar_pdfs(ids))
+            self.stdout.write(self.style.SUCCESS(
+                f"PDFs procesados: {len(ids)} ({time.monotonic() - inicio:.1f} s)"
+            ))
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-19 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturas', '0003_factura_venta'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='factura',
+            index=models.Index(fields=['fecha', 'id'], name='factura_fecha_id'),
+        ),
+        migrations.AddIndex(
+            model_name='factura',
+            index=models.Index(fields=['tipo', 'fecha', 'id'], name='factura_tipo_fecha_id'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-19 11:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras', '0008_indices_consultas'),
+        ('facturas', '0004_factura_fecha_indices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='factura',
+            name='compra',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='factura', to='compras.compra'),
+        ),
+    ]
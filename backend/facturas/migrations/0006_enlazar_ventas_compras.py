@@ -0,0 +1,63 @@
+# Generated by Django 4.2 on 2026-10-19 11:39
+
+from django.db import migrations
+
+
+LOTE = 1000
+
+
+def enlazar(apps, schema_editor):
+    """
+    Llena Factura.venta y Factura.compra en las facturas que solo estaban
+    ligadas por el número: "FV-<numero de venta>" y "FC-<id de compra>".
+    """
+    Factura = apps.get_model("facturas", "Factura")
+    Venta = apps.get_model("ventas", "Venta")
+    Compra = apps.get_model("compras", "Compra")
+
+    # Ventas: solo las que todavía no tienen factura enlazada
+    sin_venta = dict(
+        Factura.objects.filter(tipo="VENTA", venta__isnull=True, numero__startswith="FV-")
+        .values_list("numero", "pk")
+    )
+    if sin_venta:
+        enlazadas = set(
+            Factura.objects.filter(venta__isnull=False).values_list("venta_id", flat=True)
+        )
+        numeros = [n[3:] for n in sin_venta]
+        for i in range(0, len(numeros), LOTE):
+            ventas = Venta.objects.filter(
+                numero__in=numeros[i:i + LOTE]
+            ).values_list("numero", "pk")
+            facturas = [
+                Factura(pk=sin_venta[f"FV-{numero}"], venta_id=pk)
+                for numero, pk in ventas
+                if pk not in enlazadas
+            ]
+            Factura.objects.bulk_update(facturas, ["venta"])
+
+    # Compras
+    sin_compra = {}
+    for numero, pk in (
+        Factura.objects.filter(tipo="COMPRA", compra__isnull=True, numero__startswith="FC-")
+        .values_list("numero", "pk")
+    ):
+        if numero[3:].isdigit():
+            sin_compra[int(numero[3:])] = pk
+    ids = list(sin_compra)
+    for i in range(0, len(ids), LOTE):
+        existentes = Compra.objects.filter(pk__in=ids[i:i + LOTE]).values_list("pk", flat=True)
+        facturas = [Factura(pk=sin_compra[pk], compra_id=pk) for pk in existentes]
+        Factura.objects.bulk_update(facturas, ["compra"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturas', '0005_factura_compra'),
+        ('ventas', '0009_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.RunPython(enlazar, migrations.RunPython.noop),
+    ]
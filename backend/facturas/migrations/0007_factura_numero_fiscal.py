@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-19 11:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sar', '0003_rangos_cai'),
+        ('facturas', '0006_enlazar_ventas_compras'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='factura',
+            name='numero_fiscal',
+            field=models.CharField(blank=True, max_length=19, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='factura',
+            name='rango_cai',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='facturas', to='sar.rangocai'),
+        ),
+    ]
@@ -13,6 +13,12 @@ class Factura(models.Model):
     numero = models.CharField(max_length=20, unique=True)
     tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
 
+    # Numeración SAR (sar/numeracion.py): EEE-PPP-TT-NNNNNNNN y su rango CAI
+    numero_fiscal = models.CharField(max_length=19, unique=True, null=True, blank=True)
+    rango_cai = models.ForeignKey(
+        "sar.RangoCAI", null=True, blank=True, on_delete=models.PROTECT, related_name="facturas"
+    )
+
     # Enlace directo a la venta o compra
     venta = models.OneToOneField(
         Venta,
@@ -21,6 +27,13 @@ class Factura(models.Model):
         blank=True,
         related_name="factura_sipv"
     )
+    compra = models.OneToOneField(
+        "compras.Compra",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="factura"
+    )
 
     # Venta → Cliente
     cliente = models.ForeignKey(
@@ -60,6 +73,13 @@ class Factura(models.Model):
 
     notas = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Paginación por llave de api_facturas_list (ORDER BY fecha DESC, id DESC)
+            models.Index(fields=["fecha", "id"], name="factura_fecha_id"),
+            models.Index(fields=["tipo", "fecha", "id"], name="factura_tipo_fecha_id"),
+        ]
+
     def __str__(self):
         return f"Factura {self.numero} ({self.tipo})"
 
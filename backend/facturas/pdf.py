@@ -0,0 +1,103 @@
+# facturas/pdf.py
+"""
+PDFs de factura generados fuera del request.
+
+La facturación en lote no renderiza los PDFs mientras crea las facturas:
+encolar_pdfs() los pasa a un pool de hilos del proceso que los guarda en
+el storage (MEDIA_ROOT/facturas/pdf/). factura_pdf sirve el archivo
+guardado si existe y si no lo genera al vuelo, así que un PDF que se
+pierde (worker reciclado antes de terminar la cola) solo cuesta generarlo
+cuando alguien lo abra.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlparse
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.template.loader import render_to_string
+from weasyprint import HTML, default_url_fetcher
+
+from .models import Factura
+
+
+logger = logging.getLogger("sipv.facturas")
+
+HILOS_PDF = 2
+FACTURAS_POR_TAREA = 50
+
+_pool = None
+_candado = threading.Lock()
+
+
+def ruta_pdf(factura):
+    return f"facturas/pdf/Factura-{factura.numero}.pdf"
+
+
+def _estaticos(url):
+    """
+    Sin request no hay base_url http: las rutas /static/... de la plantilla
+    se leen del disco (finders en desarrollo, STATIC_ROOT en producción).
+    """
+    ruta = unquote(urlparse(url).path)
+    if url.startswith("file:") and ruta.startswith(settings.STATIC_URL):
+        relativa = ruta[len(settings.STATIC_URL):]
+        archivo = finders.find(relativa) or str(settings.STATIC_ROOT / relativa)
+        return default_url_fetcher(f"file://{archivo}")
+    return default_url_fetcher(url)
+
+
+def generar_pdf(factura):
+    """Bytes del PDF de la factura (misma plantilla que factura_pdf)."""
+    html = render_to_string("facturas/factura_pdf.html", {"factura": factura})
+    return HTML(string=html, base_url="file:///", url_fetcher=_estaticos).write_pdf()
+
+
+def guardar_pdf(factura):
+    nombre = ruta_pdf(factura)
+    if default_storage.exists(nombre):
+        default_storage.delete(nombre)
+    return default_storage.save(nombre, ContentFile(generar_pdf(factura)))
+
+
+def _generar(ids):
+    try:
+        for factura in (
+            Factura.objects.filter(pk__in=ids)
+            .select_related("rango_cai__secuencia")
+            .prefetch_related("detalles__producto")
+        ):
+            try:
+                guardar_pdf(factura)
+            except Exception:
+                logger.exception("No se pudo generar el PDF de la factura %s", factura.numero)
+    finally:
+        # Cada hilo tiene su propia conexión: no dejarla abierta
+        connection.close()
+    return len(ids)
+
+
+def _ejecutor():
+    global _pool
+    with _candado:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=HILOS_PDF, thread_name_prefix="pdf-factura")
+        return _pool
+
+
+def encolar_pdfs(ids):
+    """
+    Genera en segundo plano los PDFs de las facturas `ids`, en tareas de
+    FACTURAS_POR_TAREA. Devuelve los futures (el comando los espera; las
+    vistas no).
+    """
+    ids = list(ids)
+    pool = _ejecutor()
+    return [
+        pool.submit(_generar, ids[i:i + FACTURAS_POR_TAREA])
+        for i in range(0, len(ids), FACTURAS_POR_TAREA)
+    ]
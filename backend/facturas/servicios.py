@@ -0,0 +1,127 @@
+# facturas/servicios.py
+"""
+Creación de facturas a partir de ventas, en lote.
+
+La usan la sincronización del POS y cualquier proceso que facture varias
+ventas a la vez: una consulta para los detalles, un bulk_create para las
+facturas y otro para sus líneas, sin importar cuántas ventas sean.
+
+facturar_pendientes() es la facturación de cierre del día: factura por
+bloques las ventas PAGADA que quedaron sin factura en un rango de fechas
+(tiendas con SIPV_FACTURAR_AL_COBRAR=False no facturan al cobrar).
+"""
+from django.conf import settings
+from django.db import connection, transaction
+
+from common.fechas import rango_fechas
+from common.fragmentos import incrementar_generacion
+
+from .models import Factura, FacturaDetalle
+
+
+# Ventas por transacción en facturar_pendientes y filas por INSERT
+LOTE = 500
+
+
+def numero_factura_venta(venta):
+    return f"FV-{venta.numero}"
+
+
+def facturar_ventas(ventas, usuario=None):
+    """
+    Crea la factura (y sus líneas) de cada venta que aún no tenga.
+    Devuelve {venta_id: factura} con las facturas creadas.
+
+    Con SIPV_NUMERACION_SAR reserva un bloque de números fiscales seguidos,
+    en el orden de `ventas`; llamarla dentro de una transacción (ver
+    sar/numeracion.py).
+    """
+    from ventas.models import VentaDetalle
+
+    ventas = [v for v in ventas if v.pk]
+    if not ventas:
+        return {}
+
+    ya_facturadas = set(
+        Factura.objects.filter(venta__in=ventas).values_list("venta_id", flat=True)
+    )
+    ventas = [v for v in ventas if v.pk not in ya_facturadas]
+    if not ventas:
+        return {}
+
+    facturas = [
+        Factura(
+            tipo="VENTA",
+            numero=numero_factura_venta(v),
+            venta=v,
+            cliente_id=v.cliente_id,
+            subtotal=v.subtotal,
+            impuesto=v.impuesto,
+            total=v.total,
+            metodo_pago=v.metodo_pago,
+            referencia_pago=v.referencia_pago,
+            efectivo_recibido=v.efectivo_recibido,
+            cambio_entregado=v.cambio_entregado,
+            creado_por=usuario,
+        )
+        for v in ventas
+    ]
+    if settings.SIPV_NUMERACION_SAR:
+        from sar.numeracion import reservar_numeros
+
+        for f, (numero, rango) in zip(facturas, reservar_numeros(len(facturas))):
+            f.numero_fiscal, f.rango_cai = numero, rango
+    Factura.objects.bulk_create(facturas, batch_size=LOTE)
+
+    # MySQL no devuelve los ids de un bulk_create
+    if not connection.features.can_return_rows_from_bulk_insert:
+        ids = dict(
+            Factura.objects.filter(numero__in=[f.numero for f in facturas])
+            .values_list("numero", "pk")
+        )
+        for f in facturas:
+            f.pk = ids[f.numero]
+
+    por_venta = {f.venta_id: f for f in facturas}
+    FacturaDetalle.objects.bulk_create([
+        FacturaDetalle(
+            factura=por_venta[d.venta_id],
+            producto_id=d.producto_id,
+            cantidad=d.cantidad,
+            precio_unitario=d.precio_unitario,
+            subtotal=d.subtotal,
+            impuesto=d.impuesto,
+            total=d.total,
+        )
+        for d in VentaDetalle.objects.filter(venta_id__in=por_venta).order_by("pk")
+    ], batch_size=LOTE)
+    # bulk_create no dispara facturas/signals.py
+    incrementar_generacion("facturas")
+    return por_venta
+
+
+def ventas_sin_factura(desde=None, hasta=None):
+    """Ventas PAGADA sin factura, de los días locales desde..hasta (incluidos)."""
+    from ventas.models import Venta
+
+    return Venta.objects.filter(
+        estado="PAGADA", factura_sipv__isnull=True, **rango_fechas("creado", desde, hasta)
+    )
+
+
+def facturar_pendientes(desde=None, hasta=None, usuario=None, lote=LOTE):
+    """
+    Factura las ventas de ventas_sin_factura() en bloques de `lote`, cada
+    bloque en su transacción con las ventas bloqueadas (select_for_update):
+    dos corridas a la vez, o un cobro con factura al mismo tiempo, no
+    duplican facturas. Devuelve los ids de las facturas creadas.
+    """
+    from ventas.models import Venta
+
+    ids = list(ventas_sin_factura(desde, hasta).order_by("pk").values_list("pk", flat=True))
+    creadas = []
+    for i in range(0, len(ids), lote):
+        with transaction.atomic():
+            ventas = Venta.objects.select_for_update().filter(pk__in=ids[i:i + lote]).order_by("pk")
+            creadas.extend(f.pk for f in facturar_ventas(ventas, usuario).values())
+    return creadas
@@ -0,0 +1,15 @@
+# facturas/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from common.fragmentos import incrementar_generacion
+from .models import Factura, FacturaDetalle
+
+
+@receiver(post_save, sender=Factura)
+@receiver(post_delete, sender=Factura)
+@receiver(post_save, sender=FacturaDetalle)
+@receiver(post_delete, sender=FacturaDetalle)
+def invalidar_facturas(sender, instance, **kwargs):
+    # ETag de api_facturas_list (common/condicional.py)
+    incrementar_generacion("facturas")
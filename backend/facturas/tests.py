@@ -1,3 +1,89 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from common.consultas import PresupuestoConsultasExcedido
+
+from . import views
+from .models import Factura
+
+
+CACHES_PRUEBA = {
+    alias: {"BACKEND": "common.cache_backends.MemoriaConContadores", "LOCATION": f"pruebas-{alias}"}
+    for alias in ["default", *settings.CACHE_NAMESPACES]
+}
+
+
+@override_settings(CACHES=CACHES_PRUEBA, SIPV_PRESUPUESTO_CONSULTAS_ESTRICTO=True)
+class ApiFacturasListTests(TestCase):
+    URL = "/facturas/api/list/"
+
+    def setUp(self):
+        for alias in CACHES_PRUEBA:
+            caches[alias].clear()
+        # Cinco facturas con la misma hora: el cursor tiene que desempatar por id
+        ahora = timezone.now()
+        for i in range(5):
+            Factura.objects.create(numero=f"FV-{i:06d}", tipo="VENTA", total=i)
+        Factura.objects.update(fecha=ahora)
+        Factura.objects.create(numero="FC-1", tipo="COMPRA")
+        Factura.objects.filter(numero="FC-1").update(fecha=ahora - timedelta(days=40))
+
+    def _get(self, **params):
+        respuesta = self.client.get(self.URL, params)
+        if respuesta.streaming:
+            return respuesta.status_code, json.loads(b"".join(respuesta.streaming_content))
+        return respuesta.status_code, respuesta.json()
+
+    def test_recorrido_por_cursor(self):
+        vistos, despues = [], None
+        for _ in range(10):
+            params = {"limite": 2, **({"despues": despues} if despues else {})}
+            status, datos = self._get(**params)
+            self.assertEqual(status, 200)
+            vistos += [f["id"] for f in datos["facturas"]]
+            despues = datos["siguiente"]
+            if despues is None:
+                break
+        esperados = list(Factura.objects.order_by("-fecha", "-id").values_list("id", flat=True))
+        self.assertEqual(vistos, esperados)
+
+    def test_limite_maximo(self):
+        with mock.patch("facturas.views.LIMITE_API_MAX", 3):
+            status, datos = self._get(limite=5000)
+        self.assertEqual(len(datos["facturas"]), 3)
+        self.assertIsNotNone(datos["siguiente"])
+
+    def test_filtros(self):
+        _, datos = self._get(tipo="COMPRA")
+        self.assertEqual([f["numero"] for f in datos["facturas"]], ["FC-1"])
+        hoy = timezone.localdate().isoformat()
+        _, datos = self._get(desde=hoy, hasta=hoy)
+        self.assertEqual(len(datos["facturas"]), 5)
+
+    def test_parametros_invalidos(self):
+        for params in (
+            {"tipo": "OTRO"}, {"desde": "2024-13-01"}, {"cliente": "abc"},
+            {"limite": "0"}, {"limite": "diez"}, {"despues": "no-es-un-cursor"},
+        ):
+            with self.subTest(params):
+                status, datos = self._get(**params)
+                self.assertEqual(status, 400)
+                self.assertFalse(datos["ok"])
+
+    def test_cuenta_las_consultas_del_cuerpo(self):
+        with self.assertLogs("sipv.consultas", "INFO") as logs:
+            self._get(limite=2)
+        registro = logs.records[-1]
+        self.assertEqual(registro.vista, "facturas.views.api_facturas_list")
+        self.assertGreaterEqual(registro.consultas, 1)
+
+    def test_presupuesto_incluye_el_cuerpo(self):
+        with mock.patch.object(views.api_facturas_list, "presupuesto_consultas", (0, 0)):
+            with self.assertRaises(PresupuestoConsultasExcedido):
+                self._get(limite=2)
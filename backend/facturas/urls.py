@@ -14,6 +14,7 @@ urlpatterns = [
     path("api/list/", views.api_facturas_list, name="api_list"),
     path("<int:pk>/pdf/", views.factura_pdf, name="factura_pdf"),
     path("api/crear/", views.api_factura_crear, name="api_crear"),
+    path("api/facturar-lote/", views.api_facturar_lote, name="api_facturar_lote"),
     path("venta/<int:pk>/pdf/", views.factura_venta_pdf, name="venta_pdf"),
     path("compra/<int:pk>/pdf/", views.factura_compra_pdf, name="compra_pdf"),
     path("<int:pk>/ticket/", views.factura_ticket, name="factura_ticket"),
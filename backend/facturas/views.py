@@ -1,19 +1,31 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 from .models import Factura, FacturaDetalle
+from .pdf import encolar_pdfs, ruta_pdf
+from .servicios import facturar_pendientes
+from sar.numeracion import NumeracionAgotada
 from maestros.models import Producto, Proveedor
 from ventas.models import Cliente
 from django.contrib.auth.decorators import login_required, permission_required
+from django.core.files.storage import default_storage
+from django.db import transaction
 from django.db.models import Q
+from common.condicional import condicional
+from common.consultas import presupuesto_consultas
+from common.fechas import leer_fecha, rango_parametros
+from common.impuestos import calcular, decimal
+from common.json_rapido import codificador, dumps, fecha_iso, lista_por_partes
 
 
 from django.http import HttpResponse
 from weasyprint import HTML, CSS
 from django.template.loader import render_to_string
 from django.conf import settings
-from django.utils.dateparse import parse_date
 
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
@@ -40,20 +52,8 @@ def facturas_list(request):
     if tipo:
         qs = qs.filter(tipo=tipo)
 
-    # FILTRO: Fecha Desde
-
-    desde = request.GET.get("desde")
-    if desde:
-        fecha_desde = parse_date(desde)
-        qs = qs.filter(fecha__date__gte=fecha_desde)
-
-
-    # FILTRO: Fecha Hasta
-
-    hasta = request.GET.get("hasta")
-    if hasta:
-        fecha_hasta = parse_date(hasta)
-        qs = qs.filter(fecha__date__lte=fecha_hasta)
+    # FILTRO: Fechas desde / hasta (días locales completos)
+    qs = qs.filter(**rango_parametros(request.GET, "fecha"))
 
     return render(request, "facturas/list.html", {
         "facturas": qs,
@@ -69,24 +69,127 @@ def factura_detalle(request, pk):
     })
 
 
+# Mismo formato que daba JsonResponse: total como texto ("150.00"), fecha ISO
+_FACTURA_LISTA = codificador(
+    ("id", None), ("tipo", None), ("numero", None), ("fecha", fecha_iso), ("total", str),
+)
+
+
+LIMITE_API = 200
+LIMITE_API_MAX = 2000
+
+
+def _cursor(fecha, pk):
+    return urlsafe_b64encode(f"{fecha.isoformat()}|{pk}".encode()).decode()
+
+
+def _leer_cursor(valor):
+    """(fecha, id) de un cursor de api_facturas_list, o ValueError."""
+    # binascii.Error y UnicodeDecodeError también son ValueError
+    fecha, pk = urlsafe_b64decode(valor.encode()).decode().split("|")
+    return datetime.fromisoformat(fecha), int(pk)
+
+
+def _filtros_api(request):
+    """Filtros de api_facturas_list → dict para filter(). ValueError si alguno no es válido."""
+    filtros = {}
+    tipo = request.GET.get("tipo")
+    if tipo:
+        if tipo not in dict(Factura.TIPO_CHOICES):
+            raise ValueError("tipo debe ser VENTA o COMPRA")
+        filtros["tipo"] = tipo
+
+    # Días locales completos; FechaInvalida es un ValueError
+    filtros.update(rango_parametros(request.GET, "fecha", estricto=True))
+
+    for parametro in ("cliente", "proveedor"):
+        valor = request.GET.get(parametro)
+        if valor:
+            if not valor.isdigit():
+                raise ValueError(f"{parametro} debe ser un id numérico")
+            filtros[f"{parametro}_id"] = int(valor)
+    return filtros
+
+
+@presupuesto_consultas(2, max_repetidas=0)
+@condicional("facturas")
 def api_facturas_list(request):
-    facturas = Factura.objects.order_by("-fecha").values(
+    """
+    Facturas de la más reciente a la más antigua, por páginas.
+
+      ?tipo=VENTA|COMPRA  ?desde=AAAA-MM-DD  ?hasta=AAAA-MM-DD
+      ?cliente=<id>  ?proveedor=<id>  ?limite=200 (máx. 2000)
+      ?despues=<cursor>   el "siguiente" de la página anterior
+
+    Paginación por llave (fecha, id) sobre el índice factura_fecha_id: cada
+    página cuesta lo mismo sin importar qué tan atrás vaya, sin OFFSET ni
+    COUNT(*). La respuesta se genera por partes mientras se leen las filas;
+    el middleware cuenta esas consultas (y revisa el presupuesto) al enviar
+    la última parte.
+    """
+    try:
+        filtros = _filtros_api(request)
+    except ValueError as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+
+    limite = request.GET.get("limite", str(LIMITE_API))
+    if not limite.isdigit() or int(limite) < 1:
+        return JsonResponse({"ok": False, "error": "limite debe ser un entero mayor a 0"}, status=400)
+    limite = min(int(limite), LIMITE_API_MAX)
+
+    cursor = None
+    if request.GET.get("despues"):
+        try:
+            cursor = _leer_cursor(request.GET["despues"])
+        except ValueError:
+            return JsonResponse({"ok": False, "error": "Cursor inválido"}, status=400)
+
+    qs = Factura.objects.filter(**filtros)
+    if cursor:
+        fecha, pk = cursor
+        qs = qs.filter(Q(fecha__lt=fecha) | Q(fecha=fecha, pk__lt=pk))
+    # Una fila de más para saber si hay otra página
+    filas = qs.order_by("-fecha", "-id").values_list(
         "id", "tipo", "numero", "fecha", "total"
-    )
+    )[:limite + 1]
+
+    def contenido():
+        estado = {"ultima": None, "hay_mas": False}
 
-    return JsonResponse({"ok": True, "facturas": list(facturas)})
+        def pagina():
+            for n, fila in enumerate(filas.iterator(chunk_size=500)):
+                if n == limite:
+                    estado["hay_mas"] = True
+                    return
+                estado["ultima"] = fila
+                yield fila
+
+        yield b'{"ok":true,"facturas":'
+        yield from lista_por_partes(pagina(), _FACTURA_LISTA)
+        siguiente = None
+        if estado["hay_mas"]:
+            pk, _, _, fecha, _ = estado["ultima"]
+            siguiente = _cursor(fecha, pk)
+        yield b',"siguiente":' + dumps(siguiente) + b"}"
+
+    return StreamingHttpResponse(contenido(), content_type="application/json")
 
 @login_required
 def factura_pdf(request, pk):
     factura = get_object_or_404(
-        Factura.objects.prefetch_related("detalles__producto"), pk=pk
+        Factura.objects.select_related("rango_cai__secuencia").prefetch_related("detalles__producto"), pk=pk
     )
 
-    html = render_to_string("facturas/factura_pdf.html", {
-        "factura": factura
-    })
-
-    pdf_file = HTML(string=html, base_url=request.build_absolute_uri()).write_pdf()
+    # Generado por la facturación en lote (facturas/pdf.py)
+    guardado = ruta_pdf(factura)
+    if default_storage.exists(guardado):
+        with default_storage.open(guardado) as f:
+            pdf_file = f.read()
+    else:
+        html = render_to_string("facturas/factura_pdf.html", {
+            "factura": factura
+        })
+        pdf_file = HTML(string=html, base_url=request.build_absolute_uri()).write_pdf()
 
     response = HttpResponse(pdf_file, content_type="application/pdf")
     response['Content-Disposition'] = f'inline; filename="Factura-{factura.numero}.pdf"'
@@ -107,6 +210,10 @@ def api_factura_crear(request):
     if not numero or not tipo:
         return JsonResponse({"ok": False, "error": "Datos incompletos"}, status=400)
 
+    productos = Producto.objects.in_bulk([item["producto_id"] for item in lineas])
+    if len(productos) != len({item["producto_id"] for item in lineas}):
+        return JsonResponse({"ok": False, "error": "Producto inválido"}, status=400)
+
     proveedor = Proveedor.objects.filter(id=proveedor_id).first()
     cliente = Cliente.objects.filter(id=cliente_id).first()
 
@@ -121,37 +228,55 @@ def api_factura_crear(request):
         total=0
     )
 
-    total_sub = 0
-    total_imp = 0
-
-    for item in lineas:
-        prod = Producto.objects.get(id=item["producto_id"])
-        cant = item["cantidad"]
-        precio = prod.precio_venta
-        subtotal = cant * precio
-        impuesto = subtotal * prod.impuesto
+    items = [(productos[item["producto_id"]], decimal(item["cantidad"])) for item in lineas]
+    totales = calcular((cant, prod.precio_venta, prod.impuesto) for prod, cant in items)
 
-        FacturaLinea.objects.create(
+    FacturaDetalle.objects.bulk_create([
+        FacturaDetalle(
             factura=factura,
             producto=prod,
             cantidad=cant,
-            precio_unitario=precio,
+            precio_unitario=prod.precio_venta,
             subtotal=subtotal,
             impuesto=impuesto,
-            total=subtotal + impuesto
+            total=total,
         )
+        for (prod, cant), (subtotal, impuesto, total) in zip(items, totales.lineas)
+    ])
 
-        total_sub += subtotal
-        total_imp += impuesto
-
-    factura.subtotal = total_sub
-    factura.impuesto = total_imp
-    factura.total = total_sub + total_imp
+    factura.subtotal = totales.subtotal
+    factura.impuesto = totales.impuesto
+    factura.total = totales.total
     factura.save()
 
     return JsonResponse({"ok": True, "factura_id": factura.id})
 
 
+@require_POST
+@login_required
+@permission_required("facturas.add_factura", raise_exception=True)
+def api_facturar_lote(request):
+    """
+    Facturación de cierre: factura las ventas PAGADA sin factura de los días
+    {"desde": "AAAA-MM-DD", "hasta": "AAAA-MM-DD"} (por defecto, hoy) y deja
+    sus PDFs en cola.
+    """
+    try:
+        data = json.loads(request.body or b"{}")
+        desde = leer_fecha(data.get("desde"), "desde")
+        hasta = leer_fecha(data.get("hasta"), "hasta")
+    except (ValueError, AttributeError):
+        return JsonResponse({"ok": False, "error": "Fechas inválidas (AAAA-MM-DD)"}, status=400)
+    if desde is None and hasta is None:
+        desde = hasta = timezone.localdate()
+
+    try:
+        ids = facturar_pendientes(desde, hasta, usuario=request.user)
+    except NumeracionAgotada as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=409)
+    if ids:
+        transaction.on_commit(lambda: encolar_pdfs(ids))
+    return JsonResponse({"ok": True, "facturas": len(ids), "pdfs_en_cola": len(ids)})
 
 
 def factura_venta_pdf(request, pk):
@@ -176,7 +301,7 @@ def factura_compra_pdf(request, pk):
 @login_required
 def factura_ticket(request, pk):
     factura = get_object_or_404(
-        Factura.objects.prefetch_related("detalles__producto"), pk=pk
+        Factura.objects.select_related("rango_cai__secuencia").prefetch_related("detalles__producto"), pk=pk
     )
 
     html = render_to_string("facturas/ticket_pdf.html", {
@@ -0,0 +1,51 @@
+# gunicorn.conf.py
+"""
+Perfil de producción de gunicorn para SIPV.
+
+    gunicorn -c gunicorn.conf.py backend.wsgi:application
+
+Workers con hilos (gthread): las vistas pasan buena parte del tiempo
+esperando a MySQL, así que cada proceso atiende varios requests a la vez
+sin multiplicar la memoria. Todo se puede ajustar por variables de entorno.
+"""
+import multiprocessing
+import os
+
+
+def _entero(nombre, defecto):
+    valor = os.getenv(nombre)
+    return int(valor) if valor else defecto
+
+
+_cpus = multiprocessing.cpu_count()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# (2 × CPU) + 1 procesos, 4 hilos cada uno
+workers = _entero("GUNICORN_WORKERS", _cpus * 2 + 1)
+threads = _entero("GUNICORN_THREADS", 4)
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+# Cargar Django una vez en el master y hacer fork: arranque más rápido y
+# memoria compartida (copy-on-write) entre workers
+preload_app = True
+
+timeout = _entero("GUNICORN_TIMEOUT", 60)          # PDFs y reportes largos
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers de vez en cuando (fugas de memoria de librerías de PDF)
+max_requests = _entero("GUNICORN_MAX_REQUESTS", 2000)
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    # Con preload_app, una conexión abierta en el master quedaría compartida
+    # por todos los workers: que cada uno abra la suya
+    from django.db import connections
+
+    connections.close_all()
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_movimientoinventario_usuario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['referencia'], name='movimiento_referencia'),
+        ),
+    ]
@@ -22,7 +22,11 @@ class MovimientoInventario(TimeStampedModel):
     usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
 
     class Meta:
-        indexes = [models.Index(fields=["producto","creado"])]
+        indexes = [
+            models.Index(fields=["producto","creado"]),
+            # Idempotencia de materializar_movimientos y búsqueda por referencia
+            models.Index(fields=["referencia"], name="movimiento_referencia"),
+        ]
 
 class Existencia(models.Model):
     producto = models.OneToOneField(Producto, on_delete=models.CASCADE, related_name='existencia')
@@ -6,6 +6,8 @@ from django.db import connection
 from django.db.utils import OperationalError, ProgrammingError
 from decimal import Decimal
 
+from common.fragmentos import incrementar_generacion
+from maestros.cambios import registrar_cambios
 from .models import MovimientoInventario, Existencia
 
 def _tabla_existe(nombre):
@@ -54,7 +56,14 @@ def _recalcular_existencia(producto_id: int):
 @receiver(post_save, sender=MovimientoInventario)
 def on_mov_guardado(sender, instance, **kwargs):
     _recalcular_existencia(instance.producto_id)
+    incrementar_generacion("inventario")
 
 @receiver(post_delete, sender=MovimientoInventario)
 def on_mov_borrado(sender, instance, **kwargs):
     _recalcular_existencia(instance.producto_id)
+    incrementar_generacion("inventario")
+
+@receiver(post_save, sender=Existencia)
+def on_existencia_guardada(sender, instance, **kwargs):
+    # El stock va en el catálogo que descargan las terminales
+    registrar_cambios([instance.producto_id])
@@ -22,6 +22,10 @@ from compras.models import CompraDetalle
 from ventas.models import VentaDetalle
 
 from common.permisos import permisos_modulos
+from common.condicional import condicional
+from common.fechas import rango_fechas, rango_parametros
+from common.consultas import presupuesto_consultas
+from common.fragmentos import widget
 
 
 
@@ -49,12 +53,21 @@ def annotate_stock(qs_productos):
 
 
 @login_required
+@presupuesto_consultas(8, max_repetidas=0)
+@condicional("inventario", "ventas", "compras", "maestros", diario=True)
 def dashboard_data(request):
-    from decimal import Decimal
+    data = widget(
+        "inventario:dashboard_data", _datos_dashboard,
+        grupos=("inventario", "ventas", "compras", "maestros"),
+    )
+    return JsonResponse(data)
+
+
+def _datos_dashboard():
     dec3 = DecimalField(max_digits=14, decimal_places=3)
 
     # Últimos 30 días
-    hoy = timezone.now().date()
+    hoy = timezone.localdate()
     desde = hoy - timedelta(days=29)
 
     labels = [(desde + timedelta(days=i)) for i in range(30)]
@@ -92,8 +105,7 @@ def dashboard_data(request):
     ventas_qs = (
         VentaDetalle.objects
         .filter(
-            venta__creado__gte=desde,
-            venta__creado__lte=hoy + timedelta(days=1) 
+            **rango_fechas("venta__creado", desde, hoy)
         )
         .annotate(d=TruncDate("venta__creado"))
         .values("d")
@@ -162,7 +174,7 @@ def dashboard_data(request):
         cantidad__lt=F("producto__stock_minimo")
     ).count()
 
-    return JsonResponse({
+    return {
         "compras_ventas": {
             "labels": labels_str,
             "compras": compras_series,
@@ -180,13 +192,18 @@ def dashboard_data(request):
             "total_items": total_items,
             "con_alerta": con_alerta,
         },
-    })
+    }
 
 
 
 
 @login_required
 def dashboard(request):
+    ctx = widget("inventario:dashboard", _kpis_dashboard, grupos=("inventario", "maestros"))
+    return render(request, 'inventario/dashboard.html', ctx)
+
+
+def _kpis_dashboard():
     # Base sin anotar 
     qs_base = Producto.objects.filter(activo=True)
 
@@ -194,12 +211,12 @@ def dashboard(request):
     qs_stock = annotate_stock(qs_base)
 
     # Usa SIEMPRE el queryset anotado cuando referencies "stock"
-    bajo_min = qs_stock.filter(stock__lt=F('stock_minimo')).select_related('categoria')[:10]
+    bajo_min = list(qs_stock.filter(stock__lt=F('stock_minimo')).select_related('categoria')[:10])
     total_items = qs_base.count()  
     con_alerta = qs_stock.filter(stock__lt=F('stock_minimo')).count()
 
     # Movimientos recientes
-    movs = MovimientoInventario.objects.select_related('producto').order_by('-creado')[:10]
+    movs = list(MovimientoInventario.objects.select_related('producto').order_by('-creado')[:10])
 
 
     exist_qs = Existencia.objects.select_related('producto').filter(producto__activo=True)
@@ -236,8 +253,7 @@ def dashboard(request):
         'inv_bajos': bajos,
     }
 
-
-    return render(request, 'inventario/dashboard.html', ctx)
+    return ctx
 
 
 
@@ -249,8 +265,6 @@ def stock_list(request):
     precio_max = request.GET.get("precio_max")
     stock_min = request.GET.get("stock_min")
     stock_max = request.GET.get("stock_max")
-    fecha_desde = request.GET.get("fecha_desde")
-    fecha_hasta = request.GET.get("fecha_hasta")
     ordering = request.GET.get("ordering", "nombre")
     export = request.GET.get("export")
 
@@ -271,11 +285,7 @@ def stock_list(request):
     if precio_max:
         productos = productos.filter(precio_venta__lte=precio_max)
 
-    if fecha_desde:
-        productos = productos.filter(creado__date__gte=fecha_desde)
-
-    if fecha_hasta:
-        productos = productos.filter(creado__date__lte=fecha_hasta)
+    productos = productos.filter(**rango_parametros(request.GET, "creado", "fecha_desde", "fecha_hasta"))
 
 
     productos = annotate_stock(productos)
@@ -422,8 +432,6 @@ def stock_table_partial(request):
     precio_max = request.GET.get("precio_max")
     stock_min = request.GET.get("stock_min")
     stock_max = request.GET.get("stock_max")
-    fecha_desde = request.GET.get("fecha_desde")
-    fecha_hasta = request.GET.get("fecha_hasta")
     ordering = request.GET.get("ordering", "nombre")
 
     productos = Producto.objects.filter(activo=True).select_related(
@@ -452,11 +460,7 @@ def stock_table_partial(request):
     if stock_max:
         productos = productos.filter(existencia__cantidad__lte=stock_max)
 
-    if fecha_desde:
-        productos = productos.filter(creado__date__gte=fecha_desde)
-
-    if fecha_hasta:
-        productos = productos.filter(creado__date__lte=fecha_hasta)
+    productos = productos.filter(**rango_parametros(request.GET, "creado", "fecha_desde", "fecha_hasta"))
 
  
     from inventario.utils import annotate_stock
@@ -490,8 +494,6 @@ def movimientos_partial(request):
     producto_id = request.GET.get("producto")
     proveedor = request.GET.get("proveedor")
     tipo = request.GET.get("tipo")
-    fecha_desde = request.GET.get("fecha_desde")
-    fecha_hasta = request.GET.get("fecha_hasta")
 
     movs = MovimientoInventario.objects.select_related(
         "producto", "producto__proveedor"
@@ -513,11 +515,7 @@ def movimientos_partial(request):
     if tipo:
         movs = movs.filter(tipo=tipo)
 
-    if fecha_desde:
-        movs = movs.filter(creado__date__gte=fecha_desde)
-
-    if fecha_hasta:
-        movs = movs.filter(creado__date__lte=fecha_hasta)
+    movs = movs.filter(**rango_parametros(request.GET, "creado", "fecha_desde", "fecha_hasta"))
 
     movs = movs.order_by("-creado")[:300]
 
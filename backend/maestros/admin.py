@@ -1,7 +1,7 @@
 # maestros/admin.py
 from unfold.admin import ModelAdmin
 from django.contrib import admin
-from .models import Categoria, Proveedor, Producto
+from .models import Categoria, Proveedor, Producto, ReglaPrecio, HistorialPrecio
 
 @admin.register(Categoria)
 class CategoriaAdmin(ModelAdmin):
@@ -20,3 +20,26 @@ class ProductoAdmin(ModelAdmin):
     list_display = ("id","nombre","codigo_barras","precio_venta","stock_minimo","activo","creado")
     list_filter = ("activo","categoria")
     search_fields = ("nombre","codigo_barras")
+
+
+@admin.register(ReglaPrecio)
+class ReglaPrecioAdmin(ModelAdmin):
+    list_display = ("id","nombre","categoria","proveedor","porcentaje","terminacion","aplicada","productos_afectados")
+    list_filter = ("aplicada","categoria","proveedor")
+    search_fields = ("nombre",)
+    readonly_fields = ("aplicada","aplicada_por","productos_afectados","creado_por")
+
+@admin.register(HistorialPrecio)
+class HistorialPrecioAdmin(ModelAdmin):
+    list_display = ("id","producto","precio_anterior","precio_nuevo","regla","usuario","fecha")
+    list_filter = ("regla",)
+    search_fields = ("producto__nombre","producto__codigo_barras")
+    list_select_related = ("producto","regla","usuario")
+    raw_id_fields = ("producto",)
+
+    # Auditoría: solo lectura
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
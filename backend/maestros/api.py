@@ -1,18 +1,31 @@
 from rest_framework import viewsets
+
+from common.api import CatalogoViewSetMixin, EscrituraMasivaMixin
+from common.catalogo import invalidar_catalogo
+from common.fragmentos import incrementar_generacion
+from .cambios import registrar_cambios
 from .models import Categoria, Proveedor, Producto
 from .serializers import CategoriaSerializer, ProveedorSerializer, ProductoSerializer
 
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(CatalogoViewSetMixin, viewsets.ModelViewSet):
     queryset = Categoria.objects.all()
     serializer_class = CategoriaSerializer
 
 
-class ProveedorViewSet(viewsets.ModelViewSet):
+class ProveedorViewSet(CatalogoViewSetMixin, viewsets.ModelViewSet):
     queryset = Proveedor.objects.all()
     serializer_class = ProveedorSerializer
 
 
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(EscrituraMasivaMixin, CatalogoViewSetMixin, viewsets.ModelViewSet):
+    # proveedor_nombre / categoria_nombre: select_related automático
     queryset = Producto.objects.all()
     serializer_class = ProductoSerializer
+    llave_upsert = "codigo_barras"
+
+    def despues_de_guardar(self, creados, actualizados):
+        # Lo que harían las señales de post_save (maestros/signals.py)
+        registrar_cambios([p.pk for p in creados + actualizados if p.pk is not None])
+        incrementar_generacion("maestros")
+        invalidar_catalogo()
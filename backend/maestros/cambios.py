@@ -0,0 +1,59 @@
+# maestros/cambios.py
+"""
+Bitácora de cambios del catálogo (CambioCatalogo).
+
+Las señales registran los cambios fila por fila (Producto, Existencia);
+los procesos masivos (importación, reglas de precio, sincronización de
+ventas) llaman a registrar_cambios() con todos los ids de una vez.
+"""
+from datetime import timedelta
+
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import CambioCatalogo
+
+
+# Un id asignado dentro de una transacción todavía abierta puede ser menor
+# que uno ya confirmado. La versión que se entrega a las terminales se
+# queda este margen atrás: lo reciente se vuelve a mandar en el siguiente
+# delta (reaplicar el estado actual de un producto no hace daño).
+MARGEN_VERSION = timedelta(seconds=30)
+
+LOTE = 1000
+
+
+def registrar_cambios(producto_ids):
+    ids = sorted(set(producto_ids))
+    if ids:
+        CambioCatalogo.objects.bulk_create(
+            [CambioCatalogo(producto_id=pid) for pid in ids], batch_size=LOTE
+        )
+
+
+def version_actual():
+    limite = timezone.now() - MARGEN_VERSION
+    return CambioCatalogo.objects.filter(fecha__lte=limite).aggregate(v=Max("id"))["v"] or 0
+
+
+def productos_cambiados(desde):
+    """
+    Ids de productos con cambios posteriores a la versión `desde`, o None
+    si la bitácora ya fue depurada más allá de esa versión (hay que bajar
+    el catálogo completo).
+    """
+    primero = CambioCatalogo.objects.aggregate(m=Min("id"))["m"]
+    if primero is not None and desde < primero - 1:
+        return None
+    return set(
+        CambioCatalogo.objects.filter(id__gt=desde)
+        .values_list("producto_id", flat=True)
+        .distinct()
+    )
+
+
+def depurar(dias):
+    """Borra los cambios más viejos que `dias`; devuelve cuántos borró."""
+    limite = timezone.now() - timedelta(days=dias)
+    borrados, _ = CambioCatalogo.objects.filter(fecha__lt=limite).delete()
+    return borrados
@@ -1,5 +1,5 @@
 from django import forms
-from .models import Categoria, Producto, Proveedor
+from .models import Categoria, Producto, Proveedor, ReglaPrecio
 import re
 from django.core.files.uploadedfile import InMemoryUploadedFile, TemporaryUploadedFile
 
@@ -134,6 +134,29 @@ class ProductoForm(forms.ModelForm):
         }
 
 
+class ReglaPrecioForm(forms.ModelForm):
+    class Meta:
+        model = ReglaPrecio
+        fields = [
+            "nombre",
+            "categoria",
+            "proveedor",
+            "base",
+            "porcentaje",
+            "terminacion",
+            "solo_activos",
+        ]
+        widgets = {
+            "nombre": forms.TextInput(attrs=WIDGET_INPUT),
+            "categoria": forms.Select(attrs=WIDGET_SELECT),
+            "proveedor": forms.Select(attrs=WIDGET_SELECT),
+            "base": forms.Select(attrs=WIDGET_SELECT),
+            "porcentaje": forms.NumberInput(attrs={**WIDGET_INPUT, "step": "0.01"}),
+            "terminacion": forms.NumberInput(attrs={**WIDGET_INPUT, "step": "0.01", "placeholder": "0.95"}),
+            "solo_activos": forms.CheckboxInput(attrs=WIDGET_CHECKBOX),
+        }
+
+
 class ProveedorForm(forms.ModelForm):
     class Meta:
         model = Proveedor
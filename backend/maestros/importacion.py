@@ -0,0 +1,368 @@
+# maestros/importacion.py
+"""
+Importación / actualización masiva de productos desde CSV o XLSX.
+
+El archivo se lee en streaming y se procesa por lotes: cada lote se valida
+completo (reglas de Producto.clean vía validar_producto), se consultan de
+una vez los códigos de barras existentes y todo el lote (nuevos y
+existentes) se escribe con un solo bulk_create(update_conflicts=True);
+en bases sin upsert se usa bulk_update + bulk_create.
+Las filas con error no detienen la importación: se reportan con su número
+de fila y el resto se aplica.
+
+Solo se escriben las columnas que trae el archivo; una lista de precios con
+`codigo_barras,precio_venta` no toca nombre, costo ni categoría.
+"""
+import csv
+import io
+import unicodedata
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from common.catalogo import invalidar_catalogo
+from common.fragmentos import incrementar_generacion
+from .cambios import registrar_cambios
+from .models import Categoria, Proveedor, Producto, validar_producto
+
+
+TAMANO_LOTE = 1000
+
+# Encabezado normalizado → campo de Producto
+ALIAS_COLUMNAS = {
+    "codigo_barras": "codigo_barras",
+    "codigo": "codigo_barras",
+    "codigo_de_barras": "codigo_barras",
+    "barcode": "codigo_barras",
+    "sku": "codigo_barras",
+    "nombre": "nombre",
+    "descripcion": "nombre",
+    "precio_venta": "precio_venta",
+    "precio": "precio_venta",
+    "costo_promedio": "costo_promedio",
+    "costo": "costo_promedio",
+    "stock_minimo": "stock_minimo",
+    "minimo": "stock_minimo",
+    "impuesto": "impuesto",
+    "isv": "impuesto",
+    "categoria": "categoria",
+    "proveedor": "proveedor",
+    "activo": "activo",
+}
+
+# Campo decimal → (dígitos enteros permitidos, decimales)
+DECIMALES = {
+    "precio_venta": (10, 2),
+    "costo_promedio": (10, 2),
+    "stock_minimo": (9, 3),
+    "impuesto": (2, 2),
+}
+
+VERDADEROS = {"1", "si", "sí", "s", "true", "x", "activo"}
+FALSOS = {"0", "no", "n", "false", "inactivo"}
+
+
+class ErrorImportacion(Exception):
+    pass
+
+
+@dataclass
+class ResultadoImportacion:
+    creados: int = 0
+    actualizados: int = 0
+    filas: int = 0
+    simulado: bool = False
+    errores: list = field(default_factory=list)   # (fila, codigo, campo, mensaje)
+
+    @property
+    def con_error(self):
+        return len({e[0] for e in self.errores})
+
+
+# ---------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------
+
+def _normalizar_encabezado(texto):
+    texto = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode()
+    return "_".join(texto.strip().lower().replace("-", " ").split())
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    # Excel entrega los códigos numéricos como float: 7401234567890.0
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+
+def leer_archivo(archivo, nombre="", encoding="utf-8-sig"):
+    """
+    Devuelve (columnas, filas). `filas` es un generador de
+    (numero_fila, {campo: texto}); el número de fila es el del archivo
+    (el encabezado es la fila 1).
+    """
+    nombre = nombre or getattr(archivo, "name", "")
+    if Path(nombre).suffix.lower() in (".xlsx", ".xlsm"):
+        filas = _filas_xlsx(archivo)
+    else:
+        filas = _filas_csv(archivo, encoding)
+
+    encabezado = next(filas, None)
+    if not encabezado:
+        raise ErrorImportacion("El archivo está vacío.")
+
+    columnas = [ALIAS_COLUMNAS.get(_normalizar_encabezado(c)) for c in encabezado]
+    if "codigo_barras" not in columnas:
+        raise ErrorImportacion("El archivo debe tener una columna 'codigo_barras'.")
+
+    def generar():
+        for numero, valores in enumerate(filas, start=2):
+            datos = {
+                campo: _texto(valor)
+                for campo, valor in zip(columnas, valores)
+                if campo
+            }
+            if any(datos.values()):
+                yield numero, datos
+
+    return [c for c in columnas if c], generar()
+
+
+def _filas_csv(archivo, encoding):
+    binario = getattr(archivo, "file", archivo)
+    texto = io.TextIOWrapper(binario, encoding=encoding, newline="")
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t|")
+    except csv.Error:
+        dialecto = csv.excel
+    try:
+        yield from csv.reader(texto, dialecto)
+    finally:
+        texto.detach()
+
+
+def _filas_xlsx(archivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErrorImportacion(
+            "Para importar XLSX instale openpyxl (pip install openpyxl) o exporte a CSV."
+        )
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        yield from libro.active.iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+
+# ---------------------------------------------------------
+# Conversión y validación por lote
+# ---------------------------------------------------------
+
+def _decimal(texto, campo):
+    limpio = texto.replace("L", "").replace(" ", "").replace("%", "")
+    if "," in limpio and "." in limpio:
+        limpio = limpio.replace(",", "")       # 1,250.50
+    else:
+        limpio = limpio.replace(",", ".")      # 1250,50
+    try:
+        valor = Decimal(limpio)
+    except InvalidOperation:
+        raise ValueError("No es un número válido.")
+
+    # Igual que el formulario: 15 → 0.15
+    if campo == "impuesto" and valor > 1:
+        valor = valor / 100
+
+    enteros, decimales = DECIMALES[campo]
+    valor = valor.quantize(Decimal(1).scaleb(-decimales))
+    if abs(valor) >= Decimal(10) ** enteros:
+        raise ValueError("El número es demasiado grande.")
+    return valor
+
+
+def _booleano(texto):
+    t = texto.lower()
+    if t in VERDADEROS:
+        return True
+    if t in FALSOS:
+        return False
+    raise ValueError("Use si/no o 1/0.")
+
+
+class _Catalogos:
+    """Categorías y proveedores por nombre, cargados una sola vez."""
+
+    def __init__(self, columnas):
+        self.categorias = {}
+        self.proveedores = {}
+        if "categoria" in columnas:
+            for pk, nombre in Categoria.objects.values_list("pk", "nombre"):
+                self.categorias[nombre.strip().lower()] = pk
+        if "proveedor" in columnas:
+            for pk, nombre in Proveedor.objects.order_by("pk").values_list("pk", "nombre"):
+                self.proveedores[nombre.strip().lower()] = pk
+
+
+def _convertir_fila(datos, catalogos):
+    """Devuelve ({campo_modelo: valor}, {campo: error}). Celdas vacías se ignoran."""
+    valores, errores = {}, {}
+
+    for campo, texto in datos.items():
+        if texto == "":
+            continue
+        try:
+            if campo in DECIMALES:
+                valores[campo] = _decimal(texto, campo)
+            elif campo == "activo":
+                valores[campo] = _booleano(texto)
+            elif campo == "categoria":
+                pk = catalogos.categorias.get(texto.lower())
+                if pk is None:
+                    raise ValueError(f"La categoría '{texto}' no existe.")
+                valores["categoria_id"] = pk
+            elif campo == "proveedor":
+                pk = catalogos.proveedores.get(texto.lower())
+                if pk is None:
+                    raise ValueError(f"El proveedor '{texto}' no existe.")
+                valores["proveedor_id"] = pk
+            elif campo == "nombre":
+                if len(texto) > 150:
+                    raise ValueError("El nombre no puede pasar de 150 caracteres.")
+                valores[campo] = texto
+            else:
+                valores[campo] = texto
+        except ValueError as e:
+            errores[campo] = str(e)
+
+    errores.update(validar_producto(**{
+        c: valores[c] for c in
+        ("codigo_barras", "precio_venta", "costo_promedio", "stock_minimo", "impuesto")
+        if c in valores and c not in errores
+    }))
+    return valores, errores
+
+
+# ---------------------------------------------------------
+# Escritura
+# ---------------------------------------------------------
+
+def _campos_modelo(columnas):
+    campos = []
+    for c in columnas:
+        if c == "codigo_barras":
+            continue
+        campos.append(f"{c}_id" if c in ("categoria", "proveedor") else c)
+    return list(dict.fromkeys(campos))
+
+
+def importar_productos(columnas, filas, lote=TAMANO_LOTE, simular=False):
+    """
+    Aplica las filas de leer_archivo(). Con `simular=True` valida todo y
+    cuenta lo que se crearía / actualizaría sin escribir.
+    """
+    resultado = ResultadoImportacion(simulado=simular)
+    catalogos = _Catalogos(columnas)
+    campos = _campos_modelo(columnas)
+    vistos = set()
+
+    pendientes = []
+    for numero, datos in filas:
+        resultado.filas += 1
+        codigo = datos.get("codigo_barras", "")
+
+        if not codigo:
+            resultado.errores.append((numero, "", "codigo_barras", "Falta el código de barras."))
+            continue
+        if codigo in vistos:
+            resultado.errores.append((numero, codigo, "codigo_barras", "Código repetido en el archivo."))
+            continue
+        vistos.add(codigo)
+
+        valores, errores = _convertir_fila(datos, catalogos)
+        if errores:
+            for campo, mensaje in errores.items():
+                resultado.errores.append((numero, codigo, campo, mensaje))
+            continue
+
+        pendientes.append((numero, valores))
+        if len(pendientes) >= lote:
+            _aplicar_lote(pendientes, campos, resultado, simular)
+            pendientes = []
+
+    if pendientes:
+        _aplicar_lote(pendientes, campos, resultado, simular)
+
+    # Los bulk_* no disparan post_save: invalidar a mano
+    if not simular and (resultado.creados or resultado.actualizados):
+        incrementar_generacion("maestros")
+        invalidar_catalogo()
+
+    resultado.errores.sort(key=lambda e: e[0])
+    return resultado
+
+
+def _aplicar_lote(pendientes, campos, resultado, simular):
+    codigos = [valores["codigo_barras"] for _, valores in pendientes]
+    existentes = Producto.objects.in_bulk(codigos, field_name="codigo_barras")
+
+    ahora = timezone.now()
+    actualizar, crear = [], []
+
+    for numero, valores in pendientes:
+        producto = existentes.get(valores["codigo_barras"])
+        if producto is not None:
+            for campo, valor in valores.items():
+                setattr(producto, campo, valor)
+            producto.actualizado = ahora
+            actualizar.append(producto)
+        elif "nombre" not in valores:
+            resultado.errores.append((
+                numero, valores["codigo_barras"], "nombre",
+                "Producto nuevo sin nombre.",
+            ))
+        else:
+            crear.append(Producto(**valores))
+
+    resultado.actualizados += len(actualizar)
+    resultado.creados += len(crear)
+    if simular or not (actualizar or crear):
+        return
+
+    campos_update = campos + ["actualizado"]
+    with transaction.atomic():
+        if connection.features.supports_update_conflicts:
+            _upsert(actualizar + crear, campos_update)
+        else:
+            Producto.objects.bulk_update(actualizar, campos_update)
+            Producto.objects.bulk_create(crear)
+
+        # El upsert no devuelve ids confiables: los nuevos se buscan por código
+        ids = [p.pk for p in actualizar]
+        if crear:
+            ids += Producto.objects.filter(
+                codigo_barras__in=[p.codigo_barras for p in crear]
+            ).values_list("pk", flat=True)
+        registrar_cambios(ids)
+
+
+def _upsert(productos, campos_update):
+    """
+    Un solo INSERT … ON CONFLICT/ON DUPLICATE KEY UPDATE por lote, que solo
+    reescribe las columnas del archivo. Es mucho más rápido que bulk_update
+    (un CASE WHEN por campo) y además cubre el caso de que otro proceso
+    inserte el mismo código entre la consulta y la escritura. MySQL no acepta
+    columnas de conflicto (usa cualquier índice único); SQLite/PostgreSQL
+    las exigen.
+    """
+    kwargs = {"update_conflicts": True, "update_fields": campos_update}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs["unique_fields"] = ["codigo_barras"]
+    Producto.objects.bulk_create(productos, **kwargs)
@@ -0,0 +1,73 @@
+# maestros/management/commands/bench_escritura_masiva.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from maestros.api import ProductoViewSet
+
+
+class _Deshacer(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara crear productos por la API de uno en uno contra /bulk/ "
+        "(crear y upsert). Corre dentro de una transacción que se deshace."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=2000)
+        parser.add_argument("--lote", type=int, default=500,
+                            help="Objetos por request en /bulk/ (por defecto 500)")
+
+    def handle(self, *args, **opts):
+        n, lote = opts["productos"], opts["lote"]
+        if lote > ProductoViewSet.max_lote:
+            raise CommandError(f"--lote máximo {ProductoViewSet.max_lote}")
+
+        fabrica = APIRequestFactory()
+        crear = ProductoViewSet.as_view({"post": "create"})
+        masivo = ProductoViewSet.as_view({"post": "bulk", "put": "bulk"})
+
+        def payload(prefijo, precio):
+            return [
+                {"codigo_barras": f"{prefijo}{i:08d}", "nombre": f"Bench {i}", "precio_venta": precio}
+                for i in range(n)
+            ]
+
+        def por_lotes(vista, metodo, datos):
+            for i in range(0, len(datos), lote):
+                r = vista(getattr(fabrica, metodo)("/", datos[i:i + lote], format="json"))
+                if r.status_code != 200 or not r.data["ok"]:
+                    raise CommandError(f"/bulk/ respondió {r.status_code}: {r.data}")
+
+        tiempos = {}
+        try:
+            with transaction.atomic():
+                inicio = time.perf_counter()
+                for item in payload("91", "10.00"):
+                    r = crear(fabrica.post("/", item, format="json"))
+                    if r.status_code != 201:
+                        raise CommandError(f"create respondió {r.status_code}: {r.data}")
+                tiempos["uno por uno (POST)"] = time.perf_counter() - inicio
+
+                inicio = time.perf_counter()
+                por_lotes(masivo, "post", payload("92", "10.00"))
+                tiempos[f"bulk crear (lotes de {lote})"] = time.perf_counter() - inicio
+
+                inicio = time.perf_counter()
+                por_lotes(masivo, "put", payload("92", "12.50"))
+                tiempos[f"bulk upsert (lotes de {lote})"] = time.perf_counter() - inicio
+                raise _Deshacer
+        except _Deshacer:
+            pass
+
+        base = tiempos["uno por uno (POST)"]
+        for nombre, seg in tiempos.items():
+            self.stdout.write(
+                f"{nombre:32} {seg:7.2f} s  {n / seg:9.0f} productos/s  ×{base / seg:.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS("Sin cambios en la base de datos (transacción deshecha)."))
@@ -0,0 +1,18 @@
+# maestros/management/commands/depurar_cambios_catalogo.py
+from django.core.management.base import BaseCommand
+
+from maestros.cambios import depurar
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra la bitácora de cambios del catálogo más vieja que N días. "
+        "Las terminales con una versión anterior bajan el catálogo completo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=7)
+
+    def handle(self, *args, **opts):
+        borrados = depurar(opts["dias"])
+        self.stdout.write(self.style.SUCCESS(f"{borrados} cambios borrados."))
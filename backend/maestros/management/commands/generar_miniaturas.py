@@ -0,0 +1,61 @@
+# maestros/management/commands/generar_miniaturas.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from common.fragmentos import incrementar_generacion
+from maestros.miniaturas import generar_miniatura
+from maestros.models import Producto
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera las miniaturas JPEG/WebP de los productos con imagen. Por "
+        "defecto solo los que aún no tienen miniatura (imágenes anteriores)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--todas", action="store_true",
+                            help="Regenera también las miniaturas existentes")
+        parser.add_argument("--lote", type=int, default=200,
+                            help="Productos por escritura en la base de datos (por defecto 200)")
+
+    def handle(self, *args, **opts):
+        inicio = time.monotonic()
+        qs = Producto.objects.exclude(Q(imagen="") | Q(imagen__isnull=True))
+        if not opts["todas"]:
+            qs = qs.filter(Q(imagen_miniatura="") | Q(imagen_miniatura__isnull=True))
+        qs = qs.only("id", "imagen", "imagen_miniatura").order_by("id")
+
+        total = qs.count()
+        self.stdout.write(f"Productos a procesar: {total}")
+
+        generadas = fallidas = 0
+        pendientes = []
+        for producto in qs.iterator(chunk_size=opts["lote"]):
+            nombre = generar_miniatura(producto)
+            if nombre is None:
+                fallidas += 1
+                continue
+            producto.imagen_miniatura = nombre
+            pendientes.append(producto)
+            if len(pendientes) >= opts["lote"]:
+                generadas += self._guardar(pendientes)
+                pendientes = []
+                self.stdout.write(f"  {generadas}/{total}")
+        generadas += self._guardar(pendientes)
+        if generadas:
+            # imagen_thumb_url cambió: ETag de /api/v1/productos/
+            incrementar_generacion("maestros")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Miniaturas generadas: {generadas}, con error: {fallidas} "
+            f"({time.monotonic() - inicio:.1f} s)"
+        ))
+
+    def _guardar(self, productos):
+        # Sin Producto.save(): no toca `actualizado` ni la bitácora de cambios
+        if productos:
+            Producto.objects.bulk_update(productos, ["imagen_miniatura"])
+        return len(productos)
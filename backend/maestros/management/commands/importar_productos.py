@@ -0,0 +1,56 @@
+# maestros/management/commands/importar_productos.py
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from maestros.importacion import (
+    TAMANO_LOTE, ErrorImportacion, importar_productos, leer_archivo,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea o actualiza productos desde un CSV/XLSX, usando codigo_barras "
+        "como llave. Solo se escriben las columnas presentes en el archivo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Ruta del CSV o XLSX")
+        parser.add_argument("--lote", type=int, default=TAMANO_LOTE,
+                            help=f"Filas por lote (por defecto {TAMANO_LOTE})")
+        parser.add_argument("--simular", action="store_true",
+                            help="Valida y cuenta sin escribir en la base de datos")
+        parser.add_argument("--encoding", default="utf-8-sig",
+                            help="Codificación del CSV (p. ej. latin-1)")
+        parser.add_argument("--errores", metavar="RUTA",
+                            help="Guarda los errores por fila en un CSV")
+
+    def handle(self, *args, **opts):
+        inicio = time.monotonic()
+        try:
+            with open(opts["archivo"], "rb") as archivo:
+                columnas, filas = leer_archivo(archivo, opts["archivo"], opts["encoding"])
+                resultado = importar_productos(
+                    columnas, filas, lote=opts["lote"], simular=opts["simular"]
+                )
+        except (OSError, ErrorImportacion, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        for fila, codigo, campo, mensaje in resultado.errores[:50]:
+            self.stderr.write(f"Fila {fila} [{codigo}] {campo}: {mensaje}")
+        if len(resultado.errores) > 50:
+            self.stderr.write(f"… y {len(resultado.errores) - 50} errores más")
+
+        if opts["errores"] and resultado.errores:
+            with open(opts["errores"], "w", newline="", encoding="utf-8") as f:
+                escritor = csv.writer(f)
+                escritor.writerow(["fila", "codigo_barras", "campo", "mensaje"])
+                escritor.writerows(resultado.errores)
+
+        prefijo = "SIMULACIÓN — " if resultado.simulado else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefijo}{resultado.filas} filas en {time.monotonic() - inicio:.1f}s: "
+            f"{resultado.creados} creados, {resultado.actualizados} actualizados, "
+            f"{resultado.con_error} con error."
+        ))
@@ -0,0 +1,57 @@
+# Generated by Django 4.2 on 2026-10-19 11:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('maestros', '0005_producto_imagen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReglaPrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('nombre', models.CharField(max_length=120)),
+                ('base', models.CharField(choices=[('PRECIO', 'Precio de venta actual'), ('COSTO', 'Costo promedio (margen sobre costo)')], default='PRECIO', max_length=10)),
+                ('porcentaje', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('terminacion', models.DecimalField(blank=True, decimal_places=2, help_text='Centavos finales, p. ej. 0.95 → 10.95, 11.95… (vacío = redondeo a 2 decimales)', max_digits=3, null=True)),
+                ('solo_activos', models.BooleanField(default=True)),
+                ('aplicada', models.DateTimeField(blank=True, null=True)),
+                ('productos_afectados', models.PositiveIntegerField(default=0)),
+                ('aplicada_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reglas_precio_aplicadas', to=settings.AUTH_USER_MODEL)),
+                ('categoria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reglas_precio', to='maestros.categoria')),
+                ('creado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reglas_precio_creadas', to=settings.AUTH_USER_MODEL)),
+                ('proveedor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reglas_precio', to='maestros.proveedor')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='HistorialPrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precio_anterior', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('precio_nuevo', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historial_precios', to='maestros.producto')),
+                ('regla', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historial', to='maestros.reglaprecio')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cambios_precio', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-fecha', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='historialprecio',
+            index=models.Index(fields=['producto', '-fecha'], name='historial_producto_fecha'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maestros', '0007_cambiocatalogo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='imagen_miniatura',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='productos/miniaturas/'),
+        ),
+    ]
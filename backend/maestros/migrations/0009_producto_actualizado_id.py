@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maestros', '0008_producto_imagen_miniatura'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['actualizado', 'id'], name='producto_actualizado_id'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# maestros/miniaturas.py
+"""
+Miniaturas de las imágenes de producto.
+
+Se generan una vez, al subir la imagen (Producto.save), o en bloque con
+`manage.py generar_miniaturas` para las imágenes anteriores. Cada imagen
+produce dos archivos del mismo tamaño fijo (recorte centrado):
+
+    productos/miniaturas/<nombre>-<hash>.jpg    (Producto.imagen_miniatura)
+    productos/miniaturas/<nombre>-<hash>.webp   (mismo nombre, otra extensión)
+
+Las listas piden la WebP y usan la JPEG de respaldo. Pillow no copia EXIF
+(GPS, cámara) ni perfiles ICC al volver a codificar, así que las miniaturas
+salen sin metadatos. El nombre lleva un hash del contenido, así que se
+pueden cachear indefinidamente (ver common.views.media).
+"""
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger("sipv.maestros")
+
+# 2× el tamaño en que se muestran las tarjetas (h-40) para pantallas retina
+TAMANO = (320, 320)
+CALIDAD_JPEG = 80
+CALIDAD_WEBP = 78
+CARPETA = "productos/miniaturas"
+
+
+def ruta_webp(nombre_jpeg):
+    return os.path.splitext(nombre_jpeg)[0] + ".webp"
+
+
+def _codificar(origen):
+    """(bytes JPEG, bytes WebP) de la miniatura de `origen`."""
+    from PIL import Image, ImageOps
+
+    with Image.open(origen) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ("RGBA", "LA", "P"):
+            # Fondo blanco para PNG con transparencia
+            img = img.convert("RGBA")
+            fondo = Image.new("RGB", img.size, (255, 255, 255))
+            fondo.paste(img, mask=img.getchannel("A"))
+            img = fondo
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+
+        img = ImageOps.fit(img, TAMANO, Image.LANCZOS)
+
+        jpeg = BytesIO()
+        img.save(jpeg, "JPEG", quality=CALIDAD_JPEG, optimize=True, progressive=True)
+        webp = BytesIO()
+        img.save(webp, "WEBP", quality=CALIDAD_WEBP, method=6)
+        return jpeg.getvalue(), webp.getvalue()
+
+
+def generar_miniatura(producto):
+    """
+    Crea las miniaturas JPEG y WebP de producto.imagen en el storage.
+    Devuelve el nombre de la JPEG, o None si la imagen no se pudo leer.
+    """
+    if not producto.imagen:
+        return None
+    try:
+        producto.imagen.open("rb")
+        try:
+            jpeg, webp = _codificar(producto.imagen)
+        finally:
+            producto.imagen.close()
+    except (OSError, ValueError) as e:
+        logger.warning("No se pudo generar la miniatura de %s: %s", producto.imagen.name, e)
+        return None
+
+    base = os.path.splitext(os.path.basename(producto.imagen.name))[0]
+    huella = hashlib.sha1(jpeg).hexdigest()[:10]
+    nombre = f"{CARPETA}/{base}-{huella}.jpg"
+
+    storage = producto.imagen.storage
+    if not storage.exists(nombre):
+        nombre = storage.save(nombre, ContentFile(jpeg))
+    if not storage.exists(ruta_webp(nombre)):
+        storage.save(ruta_webp(nombre), ContentFile(webp))
+    return nombre
@@ -1,5 +1,6 @@
 # maestros/models.py
 from django.db import models
+from django.conf import settings
 from common.models import TimeStampedModel
 from django.core.exceptions import ValidationError
 import re
@@ -55,6 +56,10 @@ class Producto(TimeStampedModel):
     codigo_barras = models.CharField(max_length=50, unique=True, blank=True, null=True)
     nombre = models.CharField(max_length=150)
     imagen = models.ImageField(upload_to="productos/", blank=True, null=True)
+    # Generada al subir la imagen (maestros/miniaturas.py); es la que usan las listas
+    imagen_miniatura = models.ImageField(
+        upload_to="productos/miniaturas/", blank=True, null=True, editable=False
+    )
 
     proveedor = models.ForeignKey(
         Proveedor,
@@ -74,31 +79,186 @@ class Producto(TimeStampedModel):
     activo = models.BooleanField(default=True)
     impuesto = models.DecimalField(max_digits=4, decimal_places=2, default=0.15)
 
+    class Meta:
+        indexes = [
+            # Orden del cursor de /api/v1/productos/ y filtro updated_since
+            models.Index(fields=["actualizado", "id"], name="producto_actualizado_id"),
+        ]
+
     def __str__(self):
         return self.nombre
 
+    @property
+    def miniatura_url(self):
+        if self.imagen_miniatura:
+            return self.imagen_miniatura.url
+        return self.imagen.url if self.imagen else ""
+
+    @property
+    def miniatura_webp_url(self):
+        if not self.imagen_miniatura:
+            return ""
+        from .miniaturas import ruta_webp
+
+        return self.imagen_miniatura.storage.url(ruta_webp(self.imagen_miniatura.name))
+
+    def save(self, *args, **kwargs):
+        # Imagen recién asignada (aún sin escribir en el storage) → nueva miniatura
+        imagen_nueva = bool(self.imagen) and not self.imagen._committed
+        if not self.imagen:
+            self.imagen_miniatura = None
+
+        super().save(*args, **kwargs)
+
+        if imagen_nueva:
+            from .miniaturas import generar_miniatura
+
+            self.imagen_miniatura = generar_miniatura(self)
+            # update(): sin volver a disparar las señales de post_save
+            Producto.objects.filter(pk=self.pk).update(imagen_miniatura=self.imagen_miniatura)
+
     def clean(self):
-        # Código de barras opcional, pero si viene debe ser numérico
-        if self.codigo_barras:
-            if not self.codigo_barras.isdigit():
-                raise ValidationError({"codigo_barras": "El código de barras debe contener solo números."})
-            if not (8 <= len(self.codigo_barras) <= 50):
-                raise ValidationError({"codigo_barras": "El código de barras debe tener entre 8 y 50 dígitos."})
+        errores = validar_producto(
+            codigo_barras=self.codigo_barras,
+            precio_venta=self.precio_venta,
+            costo_promedio=self.costo_promedio,
+            stock_minimo=self.stock_minimo,
+            impuesto=self.impuesto,
+        )
+        if errores:
+            raise ValidationError(errores)
+        super().clean()
+
+
+def validar_producto(codigo_barras=None, precio_venta=None, costo_promedio=None,
+                     stock_minimo=None, impuesto=None):
+    """
+    Reglas de Producto.clean sin instancia: devuelve {campo: mensaje}.
+    Los campos en None no se validan (la importación masiva solo valida
+    las columnas que trae el archivo).
+    """
+    errores = {}
+
+    # Código de barras opcional, pero si viene debe ser numérico
+    if codigo_barras:
+        if not codigo_barras.isdigit():
+            errores["codigo_barras"] = "El código de barras debe contener solo números."
+        elif not (8 <= len(codigo_barras) <= 50):
+            errores["codigo_barras"] = "El código de barras debe tener entre 8 y 50 dígitos."
+
+    # Precios y costos no negativos
+    if precio_venta is not None and precio_venta < 0:
+        errores["precio_venta"] = "El precio de venta no puede ser negativo."
+
+    if costo_promedio is not None and costo_promedio < 0:
+        errores["costo_promedio"] = "El costo promedio no puede ser negativo."
+
+    # Stock mínimo no negativo
+    if stock_minimo is not None and stock_minimo < 0:
+        errores["stock_minimo"] = "El stock mínimo no puede ser negativo."
+
+    # Impuesto permitido en Honduras (0% a 15%)
+    if impuesto is not None and not (Decimal("0") <= Decimal(str(impuesto)) <= Decimal("0.15")):
+        errores["impuesto"] = "El impuesto debe estar entre 0.00 y 0.15 (15%)."
+
+    return errores
+
+
+class ReglaPrecio(TimeStampedModel):
+    """
+    Cambio masivo de precio: "+8% a la categoría X del proveedor Y,
+    terminado en .95". Se previsualiza y se aplica con un solo UPDATE
+    (ver maestros/precios.py).
+    """
+    BASES = (
+        ("PRECIO", "Precio de venta actual"),
+        ("COSTO", "Costo promedio (margen sobre costo)"),
+    )
+
+    nombre = models.CharField(max_length=120)
+    categoria = models.ForeignKey(
+        Categoria, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="reglas_precio"
+    )
+    proveedor = models.ForeignKey(
+        Proveedor, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="reglas_precio"
+    )
+    base = models.CharField(max_length=10, choices=BASES, default="PRECIO")
+    porcentaje = models.DecimalField(max_digits=6, decimal_places=2)
+    terminacion = models.DecimalField(
+        max_digits=3, decimal_places=2, null=True, blank=True,
+        help_text="Centavos finales, p. ej. 0.95 → 10.95, 11.95… (vacío = redondeo a 2 decimales)"
+    )
+    solo_activos = models.BooleanField(default=True)
 
-        # Precios y costos no negativos
-        if self.precio_venta < 0:
-            raise ValidationError({"precio_venta": "El precio de venta no puede ser negativo."})
+    creado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="reglas_precio_creadas"
+    )
+    aplicada = models.DateTimeField(null=True, blank=True)
+    aplicada_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="reglas_precio_aplicadas"
+    )
+    productos_afectados = models.PositiveIntegerField(default=0)
 
-        if self.costo_promedio < 0:
-            raise ValidationError({"costo_promedio": "El costo promedio no puede ser negativo."})
+    def __str__(self):
+        return self.nombre
 
-        # Stock mínimo no negativo
-        if self.stock_minimo < 0:
-            raise ValidationError({"stock_minimo": "El stock mínimo no puede ser negativo."})
+    def clean(self):
+        if self.porcentaje is not None and self.porcentaje <= -100:
+            raise ValidationError({"porcentaje": "El porcentaje debe ser mayor a -100%."})
 
-        # Impuesto permitido en Honduras (0% a 15%)
+        if self.terminacion is not None and not (Decimal("0") <= self.terminacion < Decimal("1")):
+            raise ValidationError({"terminacion": "La terminación debe estar entre 0.00 y 0.99."})
 
-        if not (Decimal("0") <= self.impuesto <= Decimal("0.15")):
-            raise ValidationError({"impuesto": "El impuesto debe estar entre 0.00 y 0.15 (15%)."})
         super().clean()
 
+
+class HistorialPrecio(models.Model):
+    producto = models.ForeignKey(
+        Producto, on_delete=models.CASCADE, related_name="historial_precios"
+    )
+    regla = models.ForeignKey(
+        ReglaPrecio, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="historial"
+    )
+    precio_anterior = models.DecimalField(max_digits=12, decimal_places=2)
+    precio_nuevo = models.DecimalField(max_digits=12, decimal_places=2)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="cambios_precio"
+    )
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-fecha", "-id"]
+        indexes = [
+            models.Index(fields=["producto", "-fecha"], name="historial_producto_fecha"),
+        ]
+
+    def __str__(self):
+        return f"{self.producto} {self.precio_anterior} → {self.precio_nuevo}"
+
+
+class CambioCatalogo(models.Model):
+    """
+    Bitácora de cambios del catálogo del POS (producto o su existencia).
+    El id es la versión: una terminal que bajó la versión N pide los
+    productos con cambios de id > N. No es FK para conservar los borrados.
+    """
+    producto_id = models.BigIntegerField()
+    fecha = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"#{self.pk} producto {self.producto_id}"
@@ -0,0 +1,137 @@
+# maestros/precios.py
+"""
+Motor de reglas de precio.
+
+El precio nuevo se calcula en la base de datos con una expresión
+(base × (1 + %/100), redondeada o llevada a la terminación), así que
+previsualizar es un SELECT con esa anotación y aplicar es un solo UPDATE
+sobre el mismo filtro, dentro de una transacción y con las filas bloqueadas.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Ceil, Greatest, Round
+from django.utils import timezone
+
+from common.catalogo import invalidar_catalogo
+from common.fragmentos import incrementar_generacion
+from .cambios import registrar_cambios
+from .models import HistorialPrecio, Producto, ReglaPrecio
+
+
+LIMITE_PREVIA = 200
+LOTE_HISTORIAL = 1000
+
+_PRECIO = DecimalField(max_digits=12, decimal_places=2)
+# El factor no puede ir como _PRECIO: el valor se cuantiza a 2 decimales al
+# pasarlo a la base de datos y +7.5% se convertiría en +8%
+_FACTOR = DecimalField(max_digits=12, decimal_places=6)
+
+
+class ReglaYaAplicada(Exception):
+    """La regla ya se aplicó (p. ej. otro request ganó un doble clic)."""
+
+
+def productos_regla(regla):
+    filtro = Q()
+    if regla.categoria_id:
+        filtro &= Q(categoria_id=regla.categoria_id)
+    if regla.proveedor_id:
+        filtro &= Q(proveedor_id=regla.proveedor_id)
+    if regla.solo_activos:
+        filtro &= Q(activo=True)
+    return Producto.objects.filter(filtro)
+
+
+def expresion_precio(regla):
+    base = F("costo_promedio") if regla.base == "COSTO" else F("precio_venta")
+    factor = Value(Decimal(1) + regla.porcentaje / Decimal(100), output_field=_FACTOR)
+    precio = ExpressionWrapper(base * factor, output_field=_PRECIO)
+
+    if regla.terminacion is None:
+        return Round(precio, 2, output_field=_PRECIO)
+
+    # El menor precio ≥ al calculado que termina en .95 (10.50 → 10.95,
+    # 10.97 → 11.95). Nunca negativo.
+    terminacion = Value(regla.terminacion, output_field=_PRECIO)
+    precio = ExpressionWrapper(Ceil(precio - terminacion) + terminacion, output_field=_PRECIO)
+    return Greatest(precio, Value(Decimal("0"), output_field=_PRECIO), output_field=_PRECIO)
+
+
+def previsualizar(regla, limite=LIMITE_PREVIA):
+    """Primeras filas afectadas con su precio nuevo, más totales del cambio."""
+    qs = productos_regla(regla).annotate(precio_nuevo=expresion_precio(regla))
+
+    filas = list(
+        qs.select_related("categoria", "proveedor")
+        .order_by("nombre")
+        .only("id", "codigo_barras", "nombre", "precio_venta", "costo_promedio",
+              "categoria__nombre", "proveedor__nombre")[:limite]
+    )
+    totales = qs.aggregate(
+        antes=Sum("precio_venta"),
+        despues=Sum("precio_nuevo"),
+    )
+    return {
+        "filas": filas,
+        "total": qs.count(),
+        "suma_antes": totales["antes"] or Decimal("0"),
+        "suma_despues": totales["despues"] or Decimal("0"),
+    }
+
+
+def aplicar_regla(regla, usuario=None):
+    """
+    Aplica la regla en una transacción: bloquea las filas, guarda los
+    precios anteriores, hace un solo UPDATE y registra el historial de las
+    filas cuyo precio cambió. Los caches del catálogo se invalidan una vez,
+    al confirmar. Devuelve el número de productos con precio distinto.
+
+    La regla se bloquea primero: de dos requests a la vez, el segundo espera
+    y al ver `aplicada` lanza ReglaYaAplicada sin tocar los precios.
+    """
+    ahora = timezone.now()
+
+    with transaction.atomic():
+        if ReglaPrecio.objects.select_for_update().filter(pk=regla.pk).values_list(
+            "aplicada", flat=True
+        ).get() is not None:
+            raise ReglaYaAplicada("Esta regla ya fue aplicada.")
+
+        qs = productos_regla(regla)
+        anteriores = dict(
+            qs.select_for_update().order_by("pk").values_list("pk", "precio_venta")
+        )
+        if not anteriores:
+            return 0
+
+        qs.update(precio_venta=expresion_precio(regla), actualizado=ahora)
+
+        historial = [
+            HistorialPrecio(
+                producto_id=pk,
+                regla=regla,
+                precio_anterior=anteriores[pk],
+                precio_nuevo=nuevo,
+                usuario=usuario,
+            )
+            for pk, nuevo in qs.values_list("pk", "precio_venta").iterator(chunk_size=LOTE_HISTORIAL)
+            if pk in anteriores and nuevo != anteriores[pk]
+        ]
+        HistorialPrecio.objects.bulk_create(historial, batch_size=LOTE_HISTORIAL)
+        registrar_cambios(h.producto_id for h in historial)
+
+        regla.aplicada = ahora
+        regla.aplicada_por = usuario
+        regla.productos_afectados = len(historial)
+        regla.save(update_fields=["aplicada", "aplicada_por", "productos_afectados", "actualizado"])
+
+        transaction.on_commit(_invalidar_caches)
+
+    return len(historial)
+
+
+def _invalidar_caches():
+    incrementar_generacion("maestros")
+    invalidar_catalogo()
@@ -1,11 +1,13 @@
 from rest_framework import serializers
-from .models import Categoria, Proveedor, Producto
+
+from common.api import CamposDinamicosMixin
+from .models import Categoria, Proveedor, Producto, validar_producto
 
 
 # --------------------------------------
 # CATEGORÍAS
 # --------------------------------------
-class CategoriaSerializer(serializers.ModelSerializer):
+class CategoriaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Categoria
         fields = [
@@ -22,7 +24,7 @@ class CategoriaSerializer(serializers.ModelSerializer):
 # --------------------------------------
 # PROVEEDORES
 # --------------------------------------
-class ProveedorSerializer(serializers.ModelSerializer):
+class ProveedorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Proveedor
         fields = [
@@ -43,13 +45,15 @@ class ProveedorSerializer(serializers.ModelSerializer):
 # --------------------------------------
 # PRODUCTOS
 # --------------------------------------
-class ProductoSerializer(serializers.ModelSerializer):
+class ProductoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     proveedor_nombre = serializers.CharField(
         source="proveedor.nombre", read_only=True
     )
     categoria_nombre = serializers.CharField(
         source="categoria.nombre", read_only=True
     )
+    imagen_thumb_url = serializers.SerializerMethodField()
+    imagen_thumb_webp_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Producto
@@ -58,6 +62,8 @@ class ProductoSerializer(serializers.ModelSerializer):
             "codigo_barras",
             "nombre",
             "imagen",
+            "imagen_thumb_url",
+            "imagen_thumb_webp_url",
             "proveedor",
             "proveedor_nombre",
             "categoria",
@@ -71,3 +77,31 @@ class ProductoSerializer(serializers.ModelSerializer):
             "actualizado",
         ]
         read_only_fields = ["id", "creado", "actualizado"]
+        # Columnas que leen los campos calculados (ver common.api)
+        fuentes = {
+            "imagen_thumb_url": ("imagen", "imagen_miniatura"),
+            "imagen_thumb_webp_url": ("imagen_miniatura",),
+        }
+
+    def validate(self, attrs):
+        # Mismas reglas que Producto.clean y la importación masiva
+        errores = validar_producto(**{
+            campo: attrs[campo]
+            for campo in ("codigo_barras", "precio_venta", "costo_promedio", "stock_minimo", "impuesto")
+            if campo in attrs
+        })
+        if errores:
+            raise serializers.ValidationError(errores)
+        return attrs
+
+    def _absoluta(self, url):
+        request = self.context.get("request")
+        if url and request is not None:
+            return request.build_absolute_uri(url)
+        return url or None
+
+    def get_imagen_thumb_url(self, obj):
+        return self._absoluta(obj.miniatura_url)
+
+    def get_imagen_thumb_webp_url(self, obj):
+        return self._absoluta(obj.miniatura_webp_url)
@@ -0,0 +1,25 @@
+# maestros/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from common.catalogo import invalidar_catalogo
+from common.fragmentos import incrementar_generacion
+from .cambios import registrar_cambios
+from .models import Categoria, Proveedor, Producto
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+@receiver(post_save, sender=Proveedor)
+@receiver(post_delete, sender=Proveedor)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def invalidar_dashboards_maestros(sender, instance, **kwargs):
+    incrementar_generacion("maestros")
+    invalidar_catalogo()
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+def registrar_cambio_producto(sender, instance, **kwargs):
+    registrar_cambios([instance.pk])
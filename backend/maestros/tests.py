@@ -1,3 +1,61 @@
+import json
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from .models import HistorialPrecio, Producto, ReglaPrecio
+from .precios import ReglaYaAplicada, aplicar_regla, previsualizar
+
+
+class PermisosApiProductosTests(TestCase):
+    def test_bulk_anonimo(self):
+        lote = [{"nombre": "Café 400 g", "codigo_barras": "7421000000017", "precio_venta": "95.00"}]
+        respuesta = self.client.post("/api/v1/productos/bulk/", json.dumps(lote), content_type="application/json")
+        self.assertIn(respuesta.status_code, (401, 403))
+        self.assertFalse(Producto.objects.exists())
+
+
+class ReglasPrecioTests(TestCase):
+    def _productos(self, *precios):
+        return [
+            Producto.objects.create(nombre=f"Producto {i}", codigo_barras=f"74210000{i:04d}", precio_venta=Decimal(p))
+            for i, p in enumerate(precios)
+        ]
+
+    def _precios(self):
+        return list(Producto.objects.order_by("pk").values_list("precio_venta", flat=True))
+
+    def test_terminacion_95(self):
+        self._productos("10.00", "10.97", "10.95", "9.00", "0.50")
+        regla = ReglaPrecio.objects.create(nombre="Redondeo", porcentaje=Decimal("0"), terminacion=Decimal("0.95"))
+        precios = {p.precio_venta: p.precio_nuevo for p in previsualizar(regla)["filas"]}
+        self.assertEqual(precios, {
+            Decimal("10.00"): Decimal("10.95"),
+            Decimal("10.97"): Decimal("11.95"),
+            Decimal("10.95"): Decimal("10.95"),   # ya termina en .95: no sube
+            Decimal("9.00"): Decimal("9.95"),
+            Decimal("0.50"): Decimal("0.95"),
+        })
+
+        regla = ReglaPrecio.objects.create(nombre="+5% .95", porcentaje=Decimal("5"), terminacion=Decimal("0.95"))
+        aplicar_regla(regla)
+        # 10.50, 11.5185, 11.4975, 9.45, 0.525
+        self.assertEqual(self._precios(), [Decimal(p) for p in ("10.95", "11.95", "11.95", "9.95", "0.95")])
+
+    def test_redondeo_a_centavos(self):
+        self._productos("10.00", "9.99")
+        aplicar_regla(ReglaPrecio.objects.create(nombre="+7.5%", porcentaje=Decimal("7.5")))
+        self.assertEqual(self._precios(), [Decimal("10.75"), Decimal("10.74")])   # 10.73925 → 10.74
+
+    def test_se_aplica_una_sola_vez(self):
+        self._productos("100.00", "50.00")
+        regla = ReglaPrecio.objects.create(nombre="+8%", porcentaje=Decimal("8"))
+        # Doble clic: los dos requests leyeron la regla antes de que se aplicara
+        otra_copia = ReglaPrecio.objects.get(pk=regla.pk)
+
+        self.assertEqual(aplicar_regla(regla), 2)
+        with self.assertRaises(ReglaYaAplicada):
+            aplicar_regla(otra_copia)
+
+        self.assertEqual(self._precios(), [Decimal("108.00"), Decimal("54.00")])
+        self.assertEqual(HistorialPrecio.objects.filter(regla=regla).count(), 2)
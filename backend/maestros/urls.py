@@ -19,6 +19,7 @@ urlpatterns = [
     # -----------------------------------------------------
     path("productos/", views.productos_lista, name="productos_lista"),
     path("productos/nuevo/", views.productos_crear, name="productos_crear"),
+    path("productos/importar/", views.productos_importar, name="productos_importar"),
     path("productos/<int:pk>/editar/", views.productos_editar, name="productos_editar"),
     path("productos/<int:pk>/eliminar/", views.productos_eliminar, name="productos_eliminar"),
 
@@ -28,6 +29,13 @@ urlpatterns = [
     # Buscador AJAX (si lo usas)
     path("productos/buscar/", views.productos_buscar, name="productos_buscar"),
 
+    # -----------------------------------------------------
+    # REGLAS DE PRECIO
+    # -----------------------------------------------------
+    path("precios/", views.reglas_precio_lista, name="reglas_precio_lista"),
+    path("precios/nueva/", views.reglas_precio_crear, name="reglas_precio_crear"),
+    path("precios/<int:pk>/", views.reglas_precio_previa, name="reglas_precio_previa"),
+
     # -----------------------------------------------------
     # PROVEEDORES
     # -----------------------------------------------------
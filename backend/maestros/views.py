@@ -1,31 +1,34 @@
 from rest_framework import viewsets
-from .models import Categoria, Proveedor, Producto
+from .models import Categoria, Proveedor, Producto, ReglaPrecio
 from .serializers import CategoriaSerializer, ProveedorSerializer, ProductoSerializer
 from django.db.models import Q
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, permission_required
 
-from .forms import CategoriaForm, ProductoForm, ProveedorForm
+from .forms import CategoriaForm, ProductoForm, ProveedorForm, ReglaPrecioForm
 from ventas.models import Cliente
 from .forms import ClienteForm
+from common.fragmentos import widget
+from .importacion import ErrorImportacion, importar_productos, leer_archivo
+from .precios import ReglaYaAplicada, aplicar_regla, previsualizar
 
 
 
 @login_required
 @permission_required("maestros.view_categoria", raise_exception=True)
 def maestros_dashboard(request):
-    total_productos = Producto.objects.count()
-    total_proveedores = Proveedor.objects.count()
-    total_categorias = Categoria.objects.count()
-    total_clientes = Cliente.objects.count()   # 👈 NEW
-
-    return render(request, "maestros/dashboard.html", {
-        "total_productos": total_productos,
-        "total_proveedores": total_proveedores,
-        "total_categorias": total_categorias,
-        "total_clientes": total_clientes,       # 👈 NEW
-    })
+    ctx = widget("maestros:dashboard", _totales_dashboard, grupos=("maestros",), ttl=300)
+    return render(request, "maestros/dashboard.html", ctx)
+
+
+def _totales_dashboard():
+    return {
+        "total_productos": Producto.objects.count(),
+        "total_proveedores": Proveedor.objects.count(),
+        "total_categorias": Categoria.objects.count(),
+        "total_clientes": Cliente.objects.count(),
+    }
 
 
 
@@ -180,6 +183,30 @@ def productos_detalle(request, pk):
 
 
 
+@login_required
+@permission_required(["maestros.add_producto", "maestros.change_producto"], raise_exception=True)
+def productos_importar(request):
+    resultado = None
+
+    if request.method == "POST":
+        archivo = request.FILES.get("archivo")
+        if not archivo:
+            messages.error(request, "Seleccione un archivo CSV o XLSX.")
+        else:
+            try:
+                columnas, filas = leer_archivo(archivo, archivo.name)
+                resultado = importar_productos(
+                    columnas, filas, simular=bool(request.POST.get("simular"))
+                )
+            except (ErrorImportacion, UnicodeDecodeError) as e:
+                messages.error(request, f"No se pudo leer el archivo: {e}")
+
+    return render(request, "maestros/productos/importar.html", {
+        "resultado": resultado,
+        "errores": resultado.errores[:500] if resultado else [],
+    })
+
+
 @login_required
 @permission_required("maestros.view_producto", raise_exception=True)
 def productos_buscar(request):
@@ -199,6 +226,68 @@ def productos_buscar(request):
 
 
 
+# ---------------------------------------------------------
+# REGLAS DE PRECIO
+# ---------------------------------------------------------
+
+@login_required
+@permission_required("maestros.view_reglaprecio", raise_exception=True)
+def reglas_precio_lista(request):
+    reglas = (
+        ReglaPrecio.objects
+        .select_related("categoria", "proveedor", "aplicada_por")
+        .order_by("-id")
+    )
+    return render(request, "maestros/precios/list.html", {"reglas": reglas})
+
+
+@login_required
+@permission_required("maestros.add_reglaprecio", raise_exception=True)
+def reglas_precio_crear(request):
+    form = ReglaPrecioForm(request.POST or None)
+
+    if request.method == "POST" and form.is_valid():
+        regla = form.save(commit=False)
+        regla.creado_por = request.user
+        regla.save()
+        return redirect("maestros:reglas_precio_previa", pk=regla.pk)
+
+    return render(request, "maestros/precios/form.html", {
+        "form": form,
+        "titulo": "Nueva regla de precio",
+        "boton": "Previsualizar",
+        "volver_url": "maestros:reglas_precio_lista",
+    })
+
+
+@login_required
+@permission_required("maestros.view_reglaprecio", raise_exception=True)
+def reglas_precio_previa(request, pk):
+    regla = get_object_or_404(
+        ReglaPrecio.objects.select_related("categoria", "proveedor"), pk=pk
+    )
+
+    if request.method == "POST":
+        if not request.user.has_perm("maestros.change_producto"):
+            messages.error(request, "No tiene permiso para cambiar precios.")
+        elif regla.aplicada:
+            messages.error(request, "Esta regla ya fue aplicada.")
+        else:
+            try:
+                n = aplicar_regla(regla, request.user)
+            except ReglaYaAplicada as e:
+                messages.error(request, str(e))
+                return redirect("maestros:reglas_precio_previa", pk=regla.pk)
+            messages.success(request, f"Regla aplicada: {n} productos cambiaron de precio.")
+            return redirect("maestros:reglas_precio_lista")
+
+    return render(request, "maestros/precios/previa.html", {
+        "regla": regla,
+        "previa": None if regla.aplicada else previsualizar(regla),
+        "historial": regla.historial.select_related("producto")[:200] if regla.aplicada else [],
+    })
+
+
 # ---------------------------------------------------------
 # PROVEEDORES
 # ---------------------------------------------------------
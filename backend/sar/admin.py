@@ -1,3 +1,26 @@
 # sar/admin.py
-from unfold.admin import ModelAdmin
+from unfold.admin import ModelAdmin, TabularInline
 from django.contrib import admin
+
+from .models import RangoCAI, SecuenciaFiscal
+
+
+class RangoCAIInline(TabularInline):
+    model = RangoCAI
+    extra = 0
+    fields = ("cai", "inicio", "fin", "fecha_limite", "umbral_alerta", "activo")
+
+
+@admin.register(SecuenciaFiscal)
+class SecuenciaFiscalAdmin(ModelAdmin):
+    list_display = ("prefijo", "rango", "siguiente", "actualizado")
+    # El contador solo lo mueve sar/numeracion.py
+    readonly_fields = ("rango", "siguiente")
+    inlines = [RangoCAIInline]
+
+
+@admin.register(RangoCAI)
+class RangoCAIAdmin(ModelAdmin):
+    list_display = ("cai", "secuencia", "rango_autorizado", "fecha_limite", "activo")
+    list_filter = ("activo", "secuencia")
+    search_fields = ("cai",)
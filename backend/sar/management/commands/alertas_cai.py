@@ -0,0 +1,40 @@
+# sar/management/commands/alertas_cai.py
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sar.numeracion import estado_secuencias
+
+
+logger = logging.getLogger("sipv.sar")
+
+
+class Command(BaseCommand):
+    help = (
+        "Revisa los rangos CAI de cada punto de emisión: avisa si quedan pocos "
+        "números (umbral_alerta del rango) o si el CAI está por vencer. Para "
+        "cron diario; termina con error si hay avisos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=30,
+                            help="Avisar si el CAI vence en estos días o menos (por defecto 30)")
+
+    def handle(self, *args, **opts):
+        con_aviso = 0
+        for fila in estado_secuencias(opts["dias"]):
+            prefijo = fila["secuencia"].prefijo
+            if fila["avisos"]:
+                con_aviso += 1
+                mensaje = f"{prefijo}: {'; '.join(fila['avisos'])}"
+                logger.warning("Alerta CAI %s", mensaje)
+                self.stdout.write(self.style.ERROR(f"  ✗ {mensaje}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"  ✓ {prefijo}: {fila['restantes']} números, "
+                    f"CAI vigente {fila['dias']} días más"
+                ))
+
+        if con_aviso:
+            raise CommandError(f"{con_aviso} punto(s) de emisión con alertas de CAI")
+        self.stdout.write(self.style.SUCCESS("Rangos CAI sin alertas."))
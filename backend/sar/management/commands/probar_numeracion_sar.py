@@ -0,0 +1,117 @@
+# sar/management/commands/probar_numeracion_sar.py
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from sar.models import RangoCAI, SecuenciaFiscal
+from sar.numeracion import reservar_numeros
+
+
+ESTABLECIMIENTO = "999"
+
+
+class _Deshacer(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de concurrencia de la numeración fiscal: varios hilos (cajas) "
+        "reservan números a la vez, algunos deshacen su transacción, y al "
+        "final se verifica que los números confirmados no tengan huecos ni "
+        "duplicados. Usa puntos de emisión de prueba (establecimiento 999) que "
+        "borra al terminar. Correr contra MySQL/PostgreSQL: SQLite no bloquea filas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hilos", type=int, default=8, help="Cajas en paralelo (por defecto 8)")
+        parser.add_argument("--reservas", type=int, default=200,
+                            help="Reservas por caja (por defecto 200)")
+        parser.add_argument("--puntos", type=int, default=1,
+                            help="Puntos de emisión compartidos por las cajas (por defecto 1)")
+        parser.add_argument("--deshacer", type=float, default=0.1,
+                            help="Fracción de reservas que se deshacen (por defecto 0.1)")
+
+    def handle(self, *args, **opts):
+        if SecuenciaFiscal.objects.filter(establecimiento=ESTABLECIMIENTO).exists():
+            raise CommandError(f"Ya existen secuencias del establecimiento {ESTABLECIMIENTO}; no se tocan.")
+
+        puntos = [f"{i + 1:03d}" for i in range(opts["puntos"])]
+        total = opts["hilos"] * opts["reservas"] * 3
+        for punto in puntos:
+            secuencia = SecuenciaFiscal.objects.create(establecimiento=ESTABLECIMIENTO, punto_emision=punto)
+            # Dos rangos seguidos: la prueba también cruza de un CAI al siguiente
+            mitad = total // 2
+            for inicio, fin in ((1, mitad), (mitad + 1, total)):
+                RangoCAI.objects.create(
+                    secuencia=secuencia, cai=f"PRUEBA-{uuid.uuid4().hex[:20]}",
+                    inicio=inicio, fin=fin,
+                    fecha_limite=timezone.localdate() + timedelta(days=1),
+                )
+
+        confirmados = {p: [] for p in puntos}
+        errores = []
+        candado = threading.Lock()
+
+        def caja(semilla):
+            rnd = random.Random(semilla)
+            try:
+                for _ in range(opts["reservas"]):
+                    punto = rnd.choice(puntos)
+                    cantidad = rnd.randint(1, 3)
+                    try:
+                        with transaction.atomic():
+                            numeros = reservar_numeros(
+                                cantidad, establecimiento=ESTABLECIMIENTO, punto_emision=punto
+                            )
+                            if rnd.random() < opts["deshacer"]:
+                                raise _Deshacer
+                    except _Deshacer:
+                        continue
+                    with candado:
+                        confirmados[punto].extend(int(n.rsplit("-", 1)[1]) for n, _ in numeros)
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connection.close()
+
+        inicio = time.monotonic()
+        try:
+            hilos = [threading.Thread(target=caja, args=(i,)) for i in range(opts["hilos"])]
+            for h in hilos:
+                h.start()
+            for h in hilos:
+                h.join()
+            segundos = time.monotonic() - inicio
+
+            fallas = [f"{type(e).__name__}: {e}" for e in errores]
+            for punto, numeros in confirmados.items():
+                secuencia = SecuenciaFiscal.objects.get(establecimiento=ESTABLECIMIENTO, punto_emision=punto)
+                esperados = list(range(1, len(numeros) + 1))
+                if len(set(numeros)) != len(numeros):
+                    fallas.append(f"{secuencia.prefijo}: números duplicados")
+                if sorted(numeros) != esperados:
+                    fallas.append(f"{secuencia.prefijo}: huecos en la numeración")
+                if secuencia.siguiente != len(numeros) + 1:
+                    fallas.append(
+                        f"{secuencia.prefijo}: el contador quedó en {secuencia.siguiente}, "
+                        f"se esperaba {len(numeros) + 1}"
+                    )
+                self.stdout.write(f"  {secuencia.prefijo}: {len(numeros)} números confirmados")
+        finally:
+            secuencias = SecuenciaFiscal.objects.filter(establecimiento=ESTABLECIMIENTO)
+            secuencias.update(rango=None)
+            RangoCAI.objects.filter(secuencia__in=secuencias).delete()
+            secuencias.delete()
+
+        reservas = sum(len(n) for n in confirmados.values())
+        self.stdout.write(f"{reservas} números en {segundos:.2f} s ({reservas / segundos:.0f}/s)")
+        if fallas:
+            raise CommandError("; ".join(fallas[:10]))
+        self.stdout.write(self.style.SUCCESS("Sin huecos ni duplicados."))
@@ -0,0 +1,65 @@
+# Generated by Django 4.2 on 2026-10-19 11:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('sar', '0002_remove_factura_control_fiscal_remove_factura_venta_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RangoCAI',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('cai', models.CharField(max_length=40, unique=True, verbose_name='CAI')),
+                ('inicio', models.PositiveBigIntegerField()),
+                ('fin', models.PositiveBigIntegerField()),
+                ('fecha_limite', models.DateField(verbose_name='Fecha límite de emisión')),
+                ('umbral_alerta', models.PositiveIntegerField(default=100)),
+                ('activo', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Rango CAI',
+                'verbose_name_plural': 'Rangos CAI',
+                'ordering': ['secuencia', 'inicio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SecuenciaFiscal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('establecimiento', models.CharField(default='001', max_length=3)),
+                ('punto_emision', models.CharField(default='001', max_length=3)),
+                ('tipo_documento', models.CharField(choices=[('01', 'Factura')], default='01', max_length=2)),
+                ('siguiente', models.PositiveBigIntegerField(default=0)),
+                ('rango', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='sar.rangocai')),
+            ],
+            options={
+                'verbose_name': 'Secuencia fiscal',
+                'verbose_name_plural': 'Secuencias fiscales',
+            },
+        ),
+        migrations.AddField(
+            model_name='rangocai',
+            name='secuencia',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='rangos', to='sar.secuenciafiscal'),
+        ),
+        migrations.AddConstraint(
+            model_name='secuenciafiscal',
+            constraint=models.UniqueConstraint(fields=('establecimiento', 'punto_emision', 'tipo_documento'), name='secuencia_fiscal_unica'),
+        ),
+        migrations.AddConstraint(
+            model_name='rangocai',
+            constraint=models.CheckConstraint(check=models.Q(('fin__gte', models.F('inicio'))), name='rango_cai_fin_mayor'),
+        ),
+    ]
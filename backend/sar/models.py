@@ -1,2 +1,94 @@
 # sar/models.py
-from django.db import models, transaction
+"""
+Control fiscal SAR: rangos de numeración autorizados (CAI) y la secuencia
+de cada punto de emisión.
+
+Número fiscal: EEE-PPP-TT-NNNNNNNN (establecimiento, punto de emisión,
+tipo de documento y correlativo de 8 dígitos). Cada punto de emisión
+(caja) tiene su SecuenciaFiscal; los números se reservan con
+sar/numeracion.py.
+"""
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.utils import timezone
+
+from common.models import TimeStampedModel
+
+
+class SecuenciaFiscal(TimeStampedModel):
+    TIPOS_DOCUMENTO = (
+        ("01", "Factura"),
+    )
+
+    establecimiento = models.CharField(max_length=3, default="001")
+    punto_emision = models.CharField(max_length=3, default="001")
+    tipo_documento = models.CharField(max_length=2, choices=TIPOS_DOCUMENTO, default="01")
+
+    # Rango en uso y el correlativo que se entrega a continuación
+    rango = models.ForeignKey(
+        "RangoCAI", null=True, blank=True, on_delete=models.PROTECT, related_name="+"
+    )
+    siguiente = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Secuencia fiscal"
+        verbose_name_plural = "Secuencias fiscales"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["establecimiento", "punto_emision", "tipo_documento"],
+                name="secuencia_fiscal_unica",
+            ),
+        ]
+
+    def __str__(self):
+        return self.prefijo
+
+    @property
+    def prefijo(self):
+        return f"{self.establecimiento}-{self.punto_emision}-{self.tipo_documento}"
+
+    def formatear(self, correlativo):
+        return f"{self.prefijo}-{correlativo:08d}"
+
+
+class RangoCAI(TimeStampedModel):
+    secuencia = models.ForeignKey(SecuenciaFiscal, on_delete=models.PROTECT, related_name="rangos")
+    cai = models.CharField("CAI", max_length=40, unique=True)
+    inicio = models.PositiveBigIntegerField()
+    fin = models.PositiveBigIntegerField()
+    fecha_limite = models.DateField("Fecha límite de emisión")
+
+    # Quedando esta cantidad de números se avisa (log y alertas_cai)
+    umbral_alerta = models.PositiveIntegerField(default=100)
+    activo = models.BooleanField(default=True)
+
+    class Meta:
+        verbose_name = "Rango CAI"
+        verbose_name_plural = "Rangos CAI"
+        ordering = ["secuencia", "inicio"]
+        constraints = [
+            models.CheckConstraint(check=models.Q(fin__gte=models.F("inicio")), name="rango_cai_fin_mayor"),
+        ]
+
+    def __str__(self):
+        return f"{self.cai} ({self.rango_autorizado})"
+
+    @property
+    def rango_autorizado(self):
+        """Como se imprime en la factura: desde … al …"""
+        return f"{self.secuencia.formatear(self.inicio)} al {self.secuencia.formatear(self.fin)}"
+
+    @property
+    def vigente(self):
+        return self.activo and self.fecha_limite >= timezone.localdate()
+
+    def clean(self):
+        if self.inicio is None or self.fin is None or self.secuencia_id is None:
+            return
+        if self.inicio < 1 or self.fin < self.inicio:
+            raise ValidationError("El rango debe ir de un correlativo mayor a 0 hasta uno igual o mayor.")
+        traslape = RangoCAI.objects.filter(
+            secuencia_id=self.secuencia_id, inicio__lte=self.fin, fin__gte=self.inicio
+        ).exclude(pk=self.pk)
+        if traslape.exists():
+            raise ValidationError("El rango se traslapa con otro CAI del mismo punto de emisión.")
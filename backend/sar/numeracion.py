@@ -0,0 +1,128 @@
+# sar/numeracion.py
+"""
+Reserva de números fiscales.
+
+reservar_numeros() bloquea la fila de la SecuenciaFiscal del punto de
+emisión (select_for_update), toma los correlativos siguientes y avanza el
+contador con un solo UPDATE: O(1) por factura (o por bloque, en la
+facturación en lote) sin importar cuántas facturas existan.
+
+Debe llamarse dentro de la misma transacción que crea las facturas: si la
+transacción se deshace, el contador también, y no quedan huecos. El
+bloqueo dura hasta el commit, pero solo frena a las cajas del mismo punto
+de emisión; cada caja debería tener el suyo (SIPV_PUNTO_EMISION).
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SecuenciaFiscal
+
+
+logger = logging.getLogger("sipv.sar")
+
+
+class NumeracionAgotada(Exception):
+    """No hay un rango CAI vigente con números disponibles."""
+
+
+def _rango_siguiente(secuencia, desde, hoy):
+    return (
+        secuencia.rangos.filter(activo=True, fecha_limite__gte=hoy, fin__gte=desde)
+        .order_by("inicio")
+        .first()
+    )
+
+
+def _avisar(secuencia, rango, antes, despues):
+    if despues == 0:
+        logger.warning("Rango CAI %s agotado (%s)", rango.cai, secuencia.prefijo)
+    elif antes > rango.umbral_alerta >= despues:
+        logger.warning(
+            "Rango CAI %s (%s): quedan %s números", rango.cai, secuencia.prefijo, despues
+        )
+
+
+def reservar_numeros(cantidad=1, establecimiento=None, punto_emision=None, tipo_documento="01"):
+    """
+    Reserva `cantidad` números consecutivos del punto de emisión. Devuelve
+    [(numero_fiscal, rango), ...]. Si el rango en uso se agota o vence, sigue
+    con el siguiente rango registrado; si no hay, lanza NumeracionAgotada y
+    no reserva nada.
+    """
+    establecimiento = establecimiento or settings.SIPV_ESTABLECIMIENTO
+    punto_emision = punto_emision or settings.SIPV_PUNTO_EMISION
+    hoy = timezone.localdate()
+
+    with transaction.atomic():
+        try:
+            secuencia = SecuenciaFiscal.objects.select_for_update().select_related("rango").get(
+                establecimiento=establecimiento,
+                punto_emision=punto_emision,
+                tipo_documento=tipo_documento,
+            )
+        except SecuenciaFiscal.DoesNotExist:
+            raise NumeracionAgotada(
+                f"No hay secuencia fiscal para {establecimiento}-{punto_emision}-{tipo_documento}"
+            )
+
+        rango, n = secuencia.rango, secuencia.siguiente
+        reservados = []
+        while len(reservados) < cantidad:
+            if rango is None or not rango.vigente or n > rango.fin:
+                rango = _rango_siguiente(secuencia, n, hoy)
+                if rango is None:
+                    raise NumeracionAgotada(
+                        f"El punto de emisión {secuencia.prefijo} no tiene un rango CAI "
+                        "vigente con números disponibles."
+                    )
+                n = max(n, rango.inicio)
+
+            tomar = min(cantidad - len(reservados), rango.fin - n + 1)
+            reservados.extend((secuencia.formatear(i), rango) for i in range(n, n + tomar))
+            _avisar(secuencia, rango, rango.fin - n + 1, rango.fin - n - tomar + 1)
+            n += tomar
+
+        SecuenciaFiscal.objects.filter(pk=secuencia.pk).update(
+            rango=rango, siguiente=n, actualizado=timezone.now()
+        )
+    return reservados
+
+
+def estado_secuencias(dias_aviso=30):
+    """
+    Situación de cada punto de emisión para alertas_cai: números que le
+    quedan (rango en uso y los ya registrados) y días hasta la fecha
+    límite del rango en uso.
+    """
+    hoy = timezone.localdate()
+    estado = []
+    for secuencia in SecuenciaFiscal.objects.prefetch_related("rangos").order_by(
+        "establecimiento", "punto_emision", "tipo_documento"
+    ):
+        vigentes = [
+            r for r in secuencia.rangos.all()
+            if r.activo and r.fecha_limite >= hoy and r.fin >= secuencia.siguiente
+        ]
+        restantes = sum(r.fin - max(r.inicio, secuencia.siguiente) + 1 for r in vigentes)
+        actual = vigentes[0] if vigentes else None
+        dias = (actual.fecha_limite - hoy).days if actual else None
+
+        avisos = []
+        if actual is None:
+            avisos.append("sin rango CAI vigente")
+        else:
+            if restantes <= actual.umbral_alerta:
+                avisos.append(f"quedan {restantes} números")
+            if dias <= dias_aviso:
+                avisos.append(f"el CAI {actual.cai} vence en {dias} días ({actual.fecha_limite})")
+        estado.append({
+            "secuencia": secuencia,
+            "rango": actual,
+            "restantes": restantes,
+            "dias": dias,
+            "avisos": avisos,
+        })
+    return estado
@@ -1,3 +1,112 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from unittest import skipIf
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import RangoCAI, SecuenciaFiscal
+from .numeracion import NumeracionAgotada, reservar_numeros
+
+
+def _secuencia(punto="001", rangos=((1, 100),), dias=30):
+    secuencia = SecuenciaFiscal.objects.create(establecimiento="001", punto_emision=punto)
+    for i, (inicio, fin) in enumerate(rangos):
+        RangoCAI.objects.create(
+            secuencia=secuencia, cai=f"CAI-{punto}-{i}", inicio=inicio, fin=fin,
+            fecha_limite=timezone.localdate() + timedelta(days=dias),
+        )
+    return secuencia
+
+
+def _correlativos(reservados):
+    return [int(numero.rsplit("-", 1)[1]) for numero, _ in reservados]
+
+
+class ReservarNumerosTests(TestCase):
+    def test_numeros_consecutivos(self):
+        secuencia = _secuencia()
+        primeros = reservar_numeros(3, punto_emision="001")
+        segundos = reservar_numeros(2, punto_emision="001")
+
+        self.assertEqual(primeros[0][0], "001-001-01-00000001")
+        self.assertEqual(_correlativos(primeros + segundos), [1, 2, 3, 4, 5])
+        secuencia.refresh_from_db()
+        self.assertEqual(secuencia.siguiente, 6)
+
+    def test_sigue_con_el_siguiente_rango(self):
+        _secuencia(rangos=((1, 3), (10, 20)))
+        reservados = reservar_numeros(5, punto_emision="001")
+
+        self.assertEqual(_correlativos(reservados), [1, 2, 3, 10, 11])
+        self.assertEqual([r.cai for _, r in reservados], ["CAI-001-0"] * 3 + ["CAI-001-1"] * 2)
+
+    def test_agotada_no_reserva_nada(self):
+        secuencia = _secuencia(rangos=((1, 3),))
+        with self.assertRaises(NumeracionAgotada):
+            reservar_numeros(4, punto_emision="001")
+        secuencia.refresh_from_db()
+        self.assertEqual(secuencia.siguiente, 0)
+        self.assertEqual(_correlativos(reservar_numeros(3, punto_emision="001")), [1, 2, 3])
+
+    def test_rango_vencido(self):
+        _secuencia(dias=-1)
+        with self.assertRaises(NumeracionAgotada):
+            reservar_numeros(punto_emision="001")
+
+    def test_transaccion_deshecha_no_deja_hueco(self):
+        _secuencia()
+        try:
+            with transaction.atomic():
+                reservar_numeros(2, punto_emision="001")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(_correlativos(reservar_numeros(1, punto_emision="001")), [1])
+
+    def test_puntos_de_emision_independientes(self):
+        _secuencia("001")
+        _secuencia("002")
+        reservar_numeros(2, punto_emision="001")
+        self.assertEqual(reservar_numeros(1, punto_emision="002")[0][0], "001-002-01-00000001")
+
+
+@skipIf(connection.vendor == "sqlite", "SQLite no bloquea filas con select_for_update")
+class ReservarNumerosConcurrenciaTests(TransactionTestCase):
+    CAJAS = 8
+    RESERVAS = 25
+
+    def test_cajas_en_paralelo_sin_huecos_ni_duplicados(self):
+        secuencia = _secuencia(rangos=((1, 150), (151, 2000)))
+        confirmados, errores = [], []
+        candado = threading.Lock()
+
+        def caja(n):
+            try:
+                for i in range(self.RESERVAS):
+                    try:
+                        with transaction.atomic():
+                            numeros = _correlativos(reservar_numeros(2, punto_emision="001"))
+                            if (n + i) % 7 == 0:
+                                raise RuntimeError    # la venta no se confirma
+                    except RuntimeError:
+                        continue
+                    with candado:
+                        confirmados.extend(numeros)
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=caja, args=(n,)) for n in range(self.CAJAS)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+
+        self.assertEqual(errores, [])
+        self.assertEqual(len(set(confirmados)), len(confirmados))
+        self.assertEqual(sorted(confirmados), list(range(1, len(confirmados) + 1)))
+        secuencia.refresh_from_db()
+        self.assertEqual(secuencia.siguiente, len(confirmados) + 1)
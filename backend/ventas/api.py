@@ -1,9 +1,26 @@
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.permissions import DjangoModelPermissions
 
-from .models import CuentaPorCobrar, Abono
-from .serializers import CuentaPorCobrarSerializer, AbonoSerializer
+from common.api import EscrituraMasivaMixin
+from common.fragmentos import incrementar_generacion
+from common.impuestos import CERO
+from .models import Cliente, CuentaPorCobrar, Abono
+from .serializers import ClienteSerializer, CuentaPorCobrarSerializer, AbonoSerializer
+
+
+class ClienteViewSet(EscrituraMasivaMixin, viewsets.ModelViewSet):
+    queryset = Cliente.objects.all()
+    serializer_class = ClienteSerializer
+    # Datos personales: sesión para leer, permisos del modelo para escribir
+    permission_classes = [DjangoModelPermissions]
+    llave_upsert = "email"
+
+    def despues_de_guardar(self, creados, actualizados):
+        incrementar_generacion("maestros")
 
 
 class CuentaPorCobrarViewSet(viewsets.ModelViewSet):
@@ -31,9 +48,47 @@ class CuentaPorCobrarViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class AbonoViewSet(viewsets.ModelViewSet):
+class AbonoViewSet(EscrituraMasivaMixin, viewsets.ModelViewSet):
     queryset = Abono.objects.all()
     serializer_class = AbonoSerializer
+    # Un abono ya aplicado no se edita: el saldo se descuenta solo al crearlo
+    metodos_masivos = ("POST",)
+
+    def validar_lote(self, pendientes):
+        """
+        Mismas reglas que Abono.clean, contra el saldo que va quedando al
+        aplicar los abonos del lote en orden. Las cuentas quedan bloqueadas
+        hasta el final de la transacción.
+        """
+        cuentas = {datos["cuenta"].pk for datos, _ in pendientes.values()}
+        saldos = dict(
+            CuentaPorCobrar.objects.select_for_update()
+            .filter(pk__in=cuentas).values_list("pk", "saldo_pendiente")
+        )
+        errores = {}
+        for i, (datos, _) in sorted(pendientes.items()):
+            cuenta_id = datos["cuenta"].pk
+            if saldos[cuenta_id] <= 0:
+                errores[i] = {"monto": ["Esta cuenta ya está pagada. No se pueden registrar más abonos."]}
+            elif datos["monto"] > saldos[cuenta_id]:
+                errores[i] = {"monto": ["El abono no puede ser mayor al saldo pendiente."]}
+            else:
+                saldos[cuenta_id] -= datos["monto"]
+        return errores
+
+    def despues_de_guardar(self, creados, actualizados):
+        # Lo que hace Abono.save() por cada abono, en un solo UPDATE
+        abonado = {}
+        for abono in creados:
+            abonado[abono.cuenta_id] = abonado.get(abono.cuenta_id, CERO) + abono.monto
+        if abonado:
+            CuentaPorCobrar.objects.filter(pk__in=abonado).update(
+                saldo_pendiente=F("saldo_pendiente") - Case(
+                    *[When(pk=pk, then=Value(monto)) for pk, monto in abonado.items()],
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                ),
+                actualizado=timezone.now(),
+            )
 
 @action(detail=False, methods=["get"])
 def reporte(self, request):
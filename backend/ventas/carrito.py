@@ -0,0 +1,231 @@
+# ventas/carrito.py
+"""
+Canasta de una orden en BORRADOR, guardada en el cache "carritos".
+
+Mientras se vende, agregar / cambiar / quitar una línea solo toca el cache:
+los totales se ajustan sumando y restando la línea (sin Sum() sobre todas
+las líneas) y no se escribe nada en la base de datos. Venta y VentaDetalle
+se escriben una sola vez, al cobrar (api_completar_venta) o al aparcar la
+orden explícitamente.
+
+Si la canasta no está en el cache (expiró o se reinició el servidor) se
+reconstruye desde las líneas guardadas de la venta, así que una orden
+aparcada se puede retomar desde cualquier terminal.
+
+Cada línea se identifica por el id del producto.
+"""
+import time
+from contextlib import contextmanager
+from django.core.cache import caches
+from django.db import transaction
+
+from common.impuestos import CERO, calcular_linea
+from .models import Venta, VentaDetalle
+
+
+TTL_CARRITO = 12 * 60 * 60
+TTL_CANDADO = 5
+ESPERA_CANDADO = 2.0
+
+
+class CarritoOcupado(Exception):
+    pass
+
+
+class OrdenCerrada(Exception):
+    pass
+
+
+def _cache():
+    return caches["carritos"]
+
+
+def _clave(venta_id):
+    return f"venta:{venta_id}"
+
+
+@contextmanager
+def bloqueado(venta_id):
+    """
+    Dos escaneos seguidos llegan casi juntos: sin candado el segundo
+    pisaría la canasta que guardó el primero.
+    """
+    cache = _cache()
+    candado = f"{_clave(venta_id)}:candado"
+    limite = time.monotonic() + ESPERA_CANDADO
+    while not cache.add(candado, 1, TTL_CANDADO):
+        if time.monotonic() > limite:
+            raise CarritoOcupado("La orden está siendo modificada, intente de nuevo.")
+        time.sleep(0.02)
+    try:
+        yield
+    finally:
+        cache.delete(candado)
+
+
+def _linea_desde_producto(p, precio):
+    existencia = getattr(p, "existencia", None)
+    return {
+        "producto_id": p.id,
+        "nombre": p.nombre,
+        "codigo": p.codigo_barras or "",
+        "categoria": p.categoria.nombre if p.categoria else "",
+        "proveedor": p.proveedor.nombre if p.proveedor else "",
+        "tasa": p.impuesto,
+        "stock": existencia.cantidad if existencia else CERO,
+        "precio": precio,
+        "cantidad": CERO,
+        "subtotal": CERO,
+        "impuesto": CERO,
+        "total": CERO,
+    }
+
+
+def _nuevo(venta_id):
+    return {
+        "venta_id": venta_id,
+        "lineas": {},
+        "subtotal": CERO,
+        "impuesto": CERO,
+        "total": CERO,
+    }
+
+
+def obtener(venta):
+    """Canasta de la venta: del cache o reconstruida desde la base de datos."""
+    carrito = _cache().get(_clave(venta.pk))
+    if carrito is not None:
+        return carrito
+
+    carrito = _nuevo(venta.pk)
+    detalles = venta.detalles.select_related(
+        "producto__categoria", "producto__proveedor", "producto__existencia"
+    ).order_by("pk")
+    for d in detalles:
+        linea = _linea_desde_producto(d.producto, d.precio_unitario)
+        linea.update(cantidad=d.cantidad, subtotal=d.subtotal, impuesto=d.impuesto, total=d.total)
+        carrito["lineas"][str(d.producto_id)] = linea
+        carrito["subtotal"] += d.subtotal
+        carrito["impuesto"] += d.impuesto
+        carrito["total"] += d.total
+    return carrito
+
+
+def cargar(venta_id):
+    """
+    Canasta por id de venta. Con la canasta en cache no se consulta la
+    base de datos. Lanza Venta.DoesNotExist u OrdenCerrada.
+    """
+    carrito = _cache().get(_clave(venta_id))
+    if carrito is not None:
+        return carrito
+
+    venta = Venta.objects.get(pk=venta_id)
+    if venta.estado != "BORRADOR":
+        raise OrdenCerrada("La orden ya no está en borrador.")
+    return obtener(venta)
+
+
+def en_cache(venta_id):
+    return _cache().get(_clave(venta_id))
+
+
+async def aen_cache(venta_id):
+    return await _cache().aget(_clave(venta_id))
+
+
+def guardar(carrito):
+    _cache().set(_clave(carrito["venta_id"]), carrito, TTL_CARRITO)
+
+
+def descartar(venta_id):
+    _cache().delete(_clave(venta_id))
+
+
+def fijar_cantidad(carrito, linea, cantidad):
+    """Cambia la cantidad de la línea y ajusta los totales con la diferencia."""
+    carrito["subtotal"] -= linea["subtotal"]
+    carrito["impuesto"] -= linea["impuesto"]
+    carrito["total"] -= linea["total"]
+
+    linea["cantidad"] = cantidad
+    linea["subtotal"], linea["impuesto"], linea["total"] = calcular_linea(
+        cantidad, linea["precio"], linea["tasa"]
+    )
+
+    carrito["subtotal"] += linea["subtotal"]
+    carrito["impuesto"] += linea["impuesto"]
+    carrito["total"] += linea["total"]
+    return linea
+
+
+def agregar(carrito, producto, cantidad):
+    clave = str(producto.id)
+    linea = carrito["lineas"].get(clave)
+    if linea is None:
+        linea = carrito["lineas"][clave] = _linea_desde_producto(producto, producto.precio_venta)
+    else:
+        # Refrescar el stock mostrado con el que se acaba de leer
+        existencia = getattr(producto, "existencia", None)
+        linea["stock"] = existencia.cantidad if existencia else CERO
+    return fijar_cantidad(carrito, linea, linea["cantidad"] + cantidad)
+
+
+def quitar(carrito, producto_id):
+    linea = carrito["lineas"].pop(str(producto_id), None)
+    if linea:
+        carrito["subtotal"] -= linea["subtotal"]
+        carrito["impuesto"] -= linea["impuesto"]
+        carrito["total"] -= linea["total"]
+    return linea
+
+
+def persistir(venta, carrito):
+    """Escribe las líneas y los totales de la canasta en la venta (una vez)."""
+    with transaction.atomic():
+        venta.detalles.all().delete()
+        VentaDetalle.objects.bulk_create([
+            VentaDetalle(
+                venta=venta,
+                producto_id=l["producto_id"],
+                cantidad=l["cantidad"],
+                precio_unitario=l["precio"],
+                subtotal=l["subtotal"],
+                impuesto=l["impuesto"],
+                total=l["total"],
+            )
+            for l in carrito["lineas"].values()
+        ])
+        venta.subtotal = carrito["subtotal"]
+        venta.impuesto = carrito["impuesto"]
+        venta.total = carrito["total"]
+        venta.save(update_fields=["subtotal", "impuesto", "total", "actualizado"])
+
+
+def a_json(carrito):
+    """Formato que espera el detalle del POS (mismo que api_lineas)."""
+    return {
+        "lineas": [
+            {
+                "id": l["producto_id"],
+                "producto_id": l["producto_id"],
+                "nombre": l["nombre"],
+                "codigo": l["codigo"],
+                "categoria": l["categoria"],
+                "proveedor": l["proveedor"],
+                "impuesto": float(l["tasa"]),
+                "stock": float(l["stock"]),
+                "cantidad": float(l["cantidad"]),
+                "precio": float(l["precio"]),
+                "subtotal": float(l["subtotal"]),
+                "impuesto_valor": float(l["impuesto"]),
+                "total": float(l["total"]),
+            }
+            for l in carrito["lineas"].values()
+        ],
+        "totales": {
+            "subtotal": float(carrito["subtotal"]),
+            "impuesto": float(carrito["impuesto"]),
+            "total": float(carrito["total"]),
+        },
+    }
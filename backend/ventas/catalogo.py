@@ -0,0 +1,88 @@
+# ventas/catalogo.py
+"""
+Catálogo compacto para búsqueda local en las terminales POS.
+
+Formato columnar (una lista por columna, no un objeto por producto) y
+comprimido con gzip: 50k productos caben en unos cientos de KB. Con
+`since=<versión>` solo van los productos que cambiaron (precio, datos o
+existencia) desde esa versión, más los ids que hay que borrar localmente.
+
+El catálogo completo se guarda en el cache "catalogo" con la versión en
+la clave: muchas terminales descargándolo a la vez lo calculan una sola vez.
+"""
+import gzip
+import json
+
+from django.core.cache import caches
+
+from maestros.cambios import productos_cambiados, version_actual
+from maestros.models import Producto
+
+
+COLUMNAS = ("id", "codigo", "nombre", "precio", "impuesto", "stock")
+_CAMPOS = ("id", "codigo_barras", "nombre", "precio_venta", "impuesto", "existencia__cantidad")
+
+TTL_SNAPSHOT = 60 * 60
+MAX_DELTA = 5000   # más cambios que esto: sale más barato el completo
+NIVEL_GZIP = 6
+
+
+def _columnas(filas):
+    datos = {c: [] for c in COLUMNAS}
+    for pid, codigo, nombre, precio, impuesto, stock in filas:
+        datos["id"].append(pid)
+        datos["codigo"].append(codigo or "")
+        datos["nombre"].append(nombre)
+        datos["precio"].append(float(precio))
+        datos["impuesto"].append(float(impuesto))
+        datos["stock"].append(float(stock or 0))
+    return datos
+
+
+def _comprimir(payload):
+    cuerpo = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return gzip.compress(cuerpo.encode("utf-8"), compresslevel=NIVEL_GZIP)
+
+
+def snapshot_completo():
+    """(versión, bytes gzip) del catálogo activo completo."""
+    version = version_actual()
+    clave = f"snapshot:{version}"
+    cache = caches["catalogo"]
+
+    comprimido = cache.get(clave)
+    if comprimido is None:
+        filas = Producto.objects.filter(activo=True).order_by("id").values_list(*_CAMPOS)
+        comprimido = _comprimir({
+            "version": version,
+            "completo": True,
+            "columnas": COLUMNAS,
+            "datos": _columnas(filas.iterator(chunk_size=5000)),
+            "eliminados": [],
+        })
+        cache.set(clave, comprimido, TTL_SNAPSHOT)
+    return version, comprimido
+
+
+def snapshot_delta(desde):
+    """
+    (versión, bytes gzip) con los cambios posteriores a `desde`. Si la
+    bitácora ya no llega tan atrás, devuelve el catálogo completo.
+    """
+    version = version_actual()
+    ids = productos_cambiados(desde)
+    if ids is None or len(ids) > MAX_DELTA:
+        return snapshot_completo()
+
+    filas = list(
+        Producto.objects.filter(pk__in=ids, activo=True).order_by("id").values_list(*_CAMPOS)
+    )
+    vigentes = {f[0] for f in filas}
+    return version, _comprimir({
+        "version": version,
+        "completo": False,
+        "columnas": COLUMNAS,
+        "datos": _columnas(filas),
+        # Borrados o desactivados: la terminal los quita de su copia
+        "eliminados": sorted(ids - vigentes),
+    })
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0007_cuentaporcobrar_abono'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venta',
+            name='uuid_cliente',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
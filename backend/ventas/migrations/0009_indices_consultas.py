@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0008_venta_uuid_cliente'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cuentaporcobrar',
+            index=models.Index(fields=['saldo_pendiente', 'fecha_vencimiento'], name='cxc_saldo_vencimiento'),
+        ),
+        migrations.AddIndex(
+            model_name='cuentaporcobrar',
+            index=models.Index(fields=['creado'], name='cxc_creado'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['creado'], name='venta_creado'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['estado', 'creado'], name='venta_estado_creado'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['metodo_pago', 'creado'], name='venta_metodo_creado'),
+        ),
+    ]
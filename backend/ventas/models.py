@@ -123,6 +123,19 @@ class Venta(TimeStampedModel):
     referencia_pago = models.CharField(max_length=100, blank=True, null=True)
     codigo_recogida = models.CharField(max_length=12, blank=True)
 
+    # UUID generado por la terminal: hace idempotente la sincronización
+    # (reenviar la misma venta no la duplica)
+    uuid_cliente = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Dashboards y reportes por día / mes (con rangos, ver common/fechas.py)
+            models.Index(fields=["creado"], name="venta_creado"),
+            # Listado de ventas filtrado por estado o método de pago y fechas
+            models.Index(fields=["estado", "creado"], name="venta_estado_creado"),
+            models.Index(fields=["metodo_pago", "creado"], name="venta_metodo_creado"),
+        ]
+
     def __str__(self):
         return f"Venta {self.numero}"
 
@@ -177,6 +190,14 @@ class CuentaPorCobrar(TimeStampedModel):
     saldo_pendiente = models.DecimalField(max_digits=12, decimal_places=2)
     fecha_vencimiento = models.DateField()
 
+    class Meta:
+        indexes = [
+            # Cartera vigente / vencida: saldo > 0 y vencimiento antes/después de hoy
+            models.Index(fields=["saldo_pendiente", "fecha_vencimiento"], name="cxc_saldo_vencimiento"),
+            # Crédito diario del dashboard de cartera
+            models.Index(fields=["creado"], name="cxc_creado"),
+        ]
+
     def __str__(self):
         return f"CC {self.venta.numero} - {self.cliente.nombre}"
 
@@ -1,5 +1,38 @@
+import re
+
 from rest_framework import serializers
-from .models import CuentaPorCobrar, Abono
+from .models import Cliente, CuentaPorCobrar, Abono
+
+
+class ClienteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Cliente
+        fields = [
+            "id",
+            "nombre",
+            "email",
+            "telefono",
+            "es_invitado",
+            "creado",
+            "actualizado",
+        ]
+        read_only_fields = ["id", "creado", "actualizado"]
+
+    # Mismas reglas que Cliente.clean
+    def validate_nombre(self, nombre):
+        if not re.fullmatch(r"[A-Za-zÁÉÍÓÚÜÑáéíóúüñ0-9\s#/\.\-_]+", nombre):
+            raise serializers.ValidationError("El nombre contiene caracteres no válidos.")
+        return nombre
+
+    def validate_telefono(self, telefono):
+        if telefono:
+            if not re.fullmatch(r"\d{8}", telefono):
+                raise serializers.ValidationError("El teléfono debe contener exactamente 8 dígitos.")
+            if telefono[0] not in "23789":
+                raise serializers.ValidationError(
+                    "El teléfono debe iniciar con 2, 3, 7, 8 o 9 (formato Honduras)."
+                )
+        return telefono
 
 
 class CuentaPorCobrarSerializer(serializers.ModelSerializer):
@@ -25,3 +58,8 @@ class AbonoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Abono
         fields = "__all__"
+
+    def validate_monto(self, monto):
+        if monto <= 0:
+            raise serializers.ValidationError("El abono debe ser mayor a 0.")
+        return monto
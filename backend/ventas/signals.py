@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Venta, CuentaPorCobrar
+from common.fragmentos import incrementar_generacion
+from .models import Venta, CuentaPorCobrar, Cliente
 
 @receiver(post_save, sender=Venta)
 def crear_cuenta_por_cobrar(sender, instance, created, **kwargs):
@@ -26,3 +27,18 @@ def crear_cuenta_por_cobrar(sender, instance, created, **kwargs):
     )
 
     print("CuentaPorCobrar creada para venta:", instance.numero)
+
+
+@receiver(post_save, sender=Venta)
+@receiver(post_delete, sender=Venta)
+def invalidar_dashboards_venta(sender, instance, **kwargs):
+    # Los borradores cambian en cada escaneo; en los dashboards se ven por TTL
+    if instance.estado == "BORRADOR":
+        return
+    incrementar_generacion("ventas")
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+def invalidar_dashboards_cliente(sender, instance, **kwargs):
+    incrementar_generacion("maestros")
@@ -0,0 +1,351 @@
+# ventas/sincronizacion.py
+"""
+Sincronización de ventas desde las terminales POS.
+
+Una terminal manda en un solo POST una canasta completa o un lote de ventas
+hechas sin conexión. Cada venta trae un UUID generado en la terminal; si
+ya existe, se devuelve la venta guardada en vez de crear otra, así que
+reenviar el lote tras un timeout es seguro.
+
+Todo el lote se valida en memoria con una consulta de productos y una de
+clientes, y las ventas válidas se escriben con bulk_create (ventas,
+detalles, movimientos, cuentas por cobrar y facturas) más un UPDATE de
+existencias para todos los productos. Una venta inválida no detiene a las
+demás: el resultado es por venta.
+
+Las ventas offline ya ocurrieron, así que la falta de stock no las rechaza:
+se registran y se avisa en el resultado. Lo mismo sin números fiscales
+(NumeracionAgotada): se guardan sin factura, con aviso, y las factura
+facturar_pendientes cuando haya un rango CAI vigente.
+"""
+import logging
+import uuid
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from common.fragmentos import incrementar_generacion
+from common.impuestos import calcular, dinero
+from facturas.servicios import facturar_ventas
+from inventario.models import Existencia, MovimientoInventario
+from maestros.cambios import registrar_cambios
+from maestros.models import Producto
+from sar.numeracion import NumeracionAgotada
+from .models import Cliente, CuentaPorCobrar, Venta, VentaDetalle
+
+
+logger = logging.getLogger("sipv.ventas")
+
+MAX_VENTAS_LOTE = 200
+METODOS = {m for m, _ in Venta.METODOS_PAGO}
+DIAS_CREDITO = 30
+INTENTOS = 3
+
+_CANTIDAD = DecimalField(max_digits=14, decimal_places=3)
+
+
+class VentaInvalida(Exception):
+    pass
+
+
+def _id(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _decimal(valor, campo):
+    try:
+        return Decimal(str(valor))
+    except (InvalidOperation, TypeError):
+        raise VentaInvalida(f"'{campo}' no es un número válido.")
+
+
+# ---------------------------------------------------------
+# Validación (en memoria)
+# ---------------------------------------------------------
+
+def _preparar(dato, productos, clientes, ahora):
+    """Convierte una venta del lote en objetos sin guardar. Lanza VentaInvalida."""
+    lineas = dato.get("lineas")
+    if not lineas or not isinstance(lineas, list):
+        raise VentaInvalida("La venta no tiene líneas.")
+
+    metodo = dato.get("metodo_pago", "EFECTIVO")
+    if metodo not in METODOS:
+        raise VentaInvalida(f"Método de pago no válido: {metodo}.")
+
+    cliente_id = _id(dato.get("cliente_id"))
+    if cliente_id and cliente_id not in clientes:
+        raise VentaInvalida(f"El cliente {cliente_id} no existe.")
+    if metodo == "CREDITO" and not cliente_id:
+        raise VentaInvalida("Las ventas a crédito requieren cliente.")
+
+    referencia = (dato.get("referencia") or "").strip()
+    if metodo in ("TARJETA", "TRANSFERENCIA") and not referencia:
+        raise VentaInvalida("Debe ingresar la referencia del pago.")
+
+    detalles, avisos = [], []
+
+    for linea in lineas:
+        prod = productos.get(_id(linea.get("producto_id")))
+        if prod is None:
+            raise VentaInvalida(f"El producto {linea.get('producto_id')} no existe.")
+
+        cantidad = _decimal(linea.get("cantidad", 0), "cantidad")
+        if cantidad <= 0:
+            raise VentaInvalida(f"Cantidad inválida para {prod.nombre}.")
+
+        # Precio cobrado en la terminal (offline puede ser uno ya cambiado)
+        precio = prod.precio_venta
+        if linea.get("precio") is not None:
+            precio = dinero(_decimal(linea["precio"], "precio"))
+            if precio != prod.precio_venta:
+                avisos.append(f"Precio de {prod.nombre} distinto al catálogo ({prod.precio_venta}).")
+
+        detalles.append(VentaDetalle(producto=prod, cantidad=cantidad, precio_unitario=precio))
+
+    totales = calcular((d.cantidad, d.precio_unitario, d.producto.impuesto) for d in detalles)
+    for d, (subtotal, impuesto, total_linea) in zip(detalles, totales.lineas):
+        d.subtotal, d.impuesto, d.total = subtotal, impuesto, total_linea
+
+    total = totales.total
+    efectivo = dinero(_decimal(dato.get("efectivo", 0) or 0, "efectivo"))
+    if metodo == "EFECTIVO" and efectivo < total:
+        raise VentaInvalida("El efectivo recibido es insuficiente.")
+
+    creado = None
+    if dato.get("fecha"):
+        creado = parse_datetime(str(dato["fecha"]))
+        if creado is None:
+            raise VentaInvalida("Fecha inválida (use ISO 8601).")
+        if timezone.is_naive(creado):
+            creado = timezone.make_aware(creado)
+        creado = min(creado, ahora)
+
+    venta = Venta(
+        canal="POS",
+        estado="PAGADA",
+        subtotal=totales.subtotal,
+        impuesto=totales.impuesto,
+        total=total,
+        metodo_pago=metodo,
+        efectivo_recibido=efectivo,
+        cambio_entregado=max(Decimal("0"), efectivo - total) if metodo == "EFECTIVO" else Decimal("0"),
+        referencia_pago=referencia or None,
+        cliente_id=cliente_id,
+    )
+    return venta, detalles, creado, avisos
+
+
+# ---------------------------------------------------------
+# Escritura (en bloque)
+# ---------------------------------------------------------
+
+def _siguiente_numero():
+    # Los números van con ceros a la izquierda: el orden de texto sirve
+    ultimo = (
+        Venta.objects.select_for_update()
+        .exclude(numero="")
+        .order_by("-numero")
+        .values_list("numero", flat=True)
+        .first()
+    )
+    return int(ultimo) + 1 if ultimo and ultimo.isdigit() else 1
+
+
+def _guardar(pendientes, usuario, facturar):
+    """
+    pendientes: [(uuid, venta, detalles, creado)] ya validados. Devuelve
+    (ventas, motivo): motivo explica por qué quedaron sin factura, o None.
+    """
+    ahora = timezone.now()
+    numero = _siguiente_numero()
+
+    ventas = []
+    for i, (uid, venta, _, _) in enumerate(pendientes):
+        venta.numero = f"{numero + i:06d}"
+        venta.uuid_cliente = uid
+        venta.creado_por = usuario
+        venta.cajero = usuario
+        ventas.append(venta)
+    Venta.objects.bulk_create(ventas)
+
+    if not connection.features.can_return_rows_from_bulk_insert:
+        ids = dict(
+            Venta.objects.filter(uuid_cliente__in=[v.uuid_cliente for v in ventas])
+            .values_list("uuid_cliente", "pk")
+        )
+        for v in ventas:
+            v.pk = ids[v.uuid_cliente]
+
+    # creado es auto_now_add: la hora real de las ventas offline va en un UPDATE
+    fechas = [When(pk=v.pk, then=Value(creado)) for (_, v, _, creado) in pendientes if creado]
+    if fechas:
+        Venta.objects.filter(pk__in=[v.pk for v in ventas]).update(
+            creado=Case(*fechas, default=F("creado"))
+        )
+
+    detalles, movimientos = [], []
+    salidas = {}
+    for _, venta, lineas, _ in pendientes:
+        for d in lineas:
+            d.venta = venta
+            detalles.append(d)
+            movimientos.append(MovimientoInventario(
+                producto_id=d.producto_id,
+                tipo="SALIDA",
+                cantidad=d.cantidad,
+                costo_unitario=d.precio_unitario,
+                referencia=f"VENTA-{venta.numero}",
+                motivo="Venta POS",
+                usuario=usuario,
+            ))
+            salidas[d.producto_id] = salidas.get(d.producto_id, Decimal("0")) + d.cantidad
+
+    VentaDetalle.objects.bulk_create(detalles)
+    # bulk_create no dispara la señal que recalcula existencias: se descuenta abajo
+    MovimientoInventario.objects.bulk_create(movimientos)
+
+    Existencia.objects.bulk_create(
+        [Existencia(producto_id=pid, cantidad=0) for pid in salidas],
+        ignore_conflicts=True,
+    )
+    Existencia.objects.filter(producto_id__in=salidas).update(
+        cantidad=F("cantidad") - Case(
+            *[When(producto_id=pid, then=Value(q)) for pid, q in salidas.items()],
+            output_field=_CANTIDAD,
+        ),
+        actualizado=ahora,
+    )
+    registrar_cambios(salidas)
+
+    hoy = timezone.localdate()
+    CuentaPorCobrar.objects.bulk_create([
+        CuentaPorCobrar(
+            cliente_id=v.cliente_id,
+            venta=v,
+            monto_total=v.total,
+            saldo_pendiente=v.total,
+            fecha_vencimiento=hoy + timedelta(days=DIAS_CREDITO),
+        )
+        for v in ventas if v.metodo_pago == "CREDITO"
+    ])
+
+    if facturar:
+        try:
+            with transaction.atomic():
+                facturar_ventas(ventas, usuario)
+        except NumeracionAgotada as e:
+            logger.warning("%s ventas sincronizadas sin factura: %s", len(ventas), e)
+            return ventas, str(e)
+
+    return ventas, None
+
+
+def sincronizar_ventas(datos, usuario, facturar=True):
+    """
+    Procesa un lote de ventas de una terminal. Devuelve una lista de
+    resultados en el mismo orden del lote:
+      {"uuid", "estado": "creada" | "existente" | "error", "venta_id",
+       "numero", "error", "avisos"}
+    """
+    ahora = timezone.now()
+    resultados = [{"uuid": str(d.get("uuid", "")) if isinstance(d, dict) else ""} for d in datos]
+
+    # UUIDs
+    uuids = {}
+    for i, dato in enumerate(datos):
+        try:
+            uid = uuid.UUID(str(dato.get("uuid")))
+        except (ValueError, AttributeError):
+            resultados[i].update(estado="error", error="UUID inválido o ausente.")
+            continue
+        if uid in uuids.values():
+            resultados[i].update(estado="error", error="UUID repetido en el lote.")
+            continue
+        uuids[i] = uid
+
+    productos = Producto.objects.select_related("existencia").in_bulk({
+        _id(l.get("producto_id"))
+        for i in uuids
+        if isinstance(datos[i].get("lineas"), list)
+        for l in datos[i]["lineas"]
+        if isinstance(l, dict)
+    } - {None})
+    clientes = set(
+        Cliente.objects.filter(
+            pk__in={_id(datos[i].get("cliente_id")) for i in uuids} - {None}
+        ).values_list("pk", flat=True)
+    )
+
+    preparados = {}
+    for i, uid in uuids.items():
+        try:
+            venta, detalles, creado, avisos = _preparar(datos[i], productos, clientes, ahora)
+        except (VentaInvalida, AttributeError) as e:
+            mensaje = str(e) if isinstance(e, VentaInvalida) else "Formato de venta inválido."
+            resultados[i].update(estado="error", error=mensaje)
+            continue
+        preparados[i] = (uid, venta, detalles, creado)
+        if avisos:
+            resultados[i]["avisos"] = avisos
+
+    sin_factura = None
+    for intento in range(INTENTOS):
+        existentes = {
+            u: (pk, numero)
+            for u, pk, numero in Venta.objects.filter(
+                uuid_cliente__in=[p[0] for p in preparados.values()]
+            ).values_list("uuid_cliente", "pk", "numero")
+        }
+        nuevos = {i: p for i, p in preparados.items() if p[0] not in existentes}
+        try:
+            with transaction.atomic():
+                if nuevos:
+                    _, sin_factura = _guardar(list(nuevos.values()), usuario, facturar)
+            break
+        except IntegrityError:
+            # Otro request guardó el mismo UUID o tomó el mismo número: reintentar
+            for _, venta, detalles, _ in nuevos.values():
+                venta.pk = None
+                for d in detalles:
+                    d.pk = None
+            if intento == INTENTOS - 1:
+                raise
+
+    creadas = {i: p for i, p in preparados.items() if p[0] not in existentes}
+
+    demanda = {}
+    for _, _, detalles, _ in creadas.values():
+        for d in detalles:
+            demanda[d.producto_id] = demanda.get(d.producto_id, Decimal("0")) + d.cantidad
+    sin_stock = {
+        pid for pid, q in demanda.items()
+        if getattr(productos[pid], "existencia", None) is None
+        or productos[pid].existencia.cantidad < q
+    }
+
+    for i, (uid, venta, detalles, _) in preparados.items():
+        if i not in creadas:
+            pk, numero = existentes[uid]
+            resultados[i].update(estado="existente", venta_id=pk, numero=numero)
+            continue
+        resultados[i].update(estado="creada", venta_id=venta.pk, numero=venta.numero)
+        if sin_factura:
+            resultados[i].setdefault("avisos", []).append(f"Guardada sin factura: {sin_factura}")
+        for d in detalles:
+            if d.producto_id in sin_stock:
+                resultados[i].setdefault("avisos", []).append(
+                    f"Stock insuficiente para {d.producto.nombre}; la existencia quedó negativa."
+                )
+
+    if creadas:
+        incrementar_generacion("ventas", "inventario")
+
+    return resultados
@@ -1,3 +1,212 @@
-from django.test import TestCase
+import json
+import uuid
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from common.consultas import asegurar_presupuesto
+from facturas.models import Factura
+from facturas.servicios import facturar_pendientes
+from inventario.models import MovimientoInventario
+from maestros.models import Producto
+from sar.models import RangoCAI, SecuenciaFiscal
+
+from .models import Cliente, Venta
+
+
+# Cache en memoria por namespace: los tests no tocan CACHE_DIR ni Redis
+CACHES_PRUEBA = {
+    alias: {"BACKEND": "common.cache_backends.MemoriaConContadores", "LOCATION": f"pruebas-{alias}"}
+    for alias in ["default", *settings.CACHE_NAMESPACES]
+}
+
+
+@override_settings(CACHES=CACHES_PRUEBA, SIPV_PRESUPUESTO_CONSULTAS_ESTRICTO=True)
+class PresupuestoConsultasPOSTests(TestCase):
+    """
+    Las vistas calientes del POS no deben pasar de su @presupuesto_consultas
+    ni crecer con el número de líneas (N+1). Con el modo estricto el
+    middleware también falla si la vista excede el presupuesto declarado.
+    """
+
+    def setUp(self):
+        for alias in CACHES_PRUEBA:
+            caches[alias].clear()
+        self.usuario = User.objects.create_superuser("cajero", "cajero@sipv.test", "x")
+        self.client.force_login(self.usuario)
+        self.productos = [self._producto(i) for i in range(10)]
+        self.venta = Venta.objects.create(
+            numero="000001", creado_por=self.usuario, canal="POS", estado="BORRADOR",
+            subtotal=0, impuesto=0, total=0, descuento_total=0, metodo_pago="EFECTIVO",
+            efectivo_recibido=0, cambio_entregado=0,
+        )
+
+    def _producto(self, i):
+        producto = Producto.objects.create(
+            nombre=f"Producto {i}", codigo_barras=f"74100000{i:04d}",
+            precio_venta=Decimal("10.55") + i, impuesto=Decimal("0.15"),
+        )
+        MovimientoInventario.objects.create(producto=producto, tipo="ENTRADA", cantidad=100)
+        return producto
+
+    def _post(self, url, datos):
+        return self.client.post(url, json.dumps(datos), content_type="application/json")
+
+    def _agregar(self, productos):
+        for producto in productos:
+            respuesta = self._post("/ventas/api/linea/agregar/", {
+                "venta_id": self.venta.id, "producto_id": producto.id, "cantidad": 2,
+            })
+            self.assertEqual(respuesta.status_code, 200)
+
+    def _lineas_desde_base(self):
+        """Aparca la orden (persiste las líneas) y saca la canasta del cache."""
+        self._post(f"/ventas/api/detalle/{self.venta.id}/aparcar/", {})
+        caches["carritos"].clear()
+        with asegurar_presupuesto(4, max_repetidas=0) as registro:
+            respuesta = self.client.get(f"/ventas/api/lineas/{self.venta.id}/")
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json(), registro.total
+
+    def test_agregar_linea(self):
+        with asegurar_presupuesto(5, max_repetidas=0):
+            self._agregar(self.productos[:1])
+        # Con la canasta ya en cache: sesión + usuario + producto
+        with asegurar_presupuesto(3, max_repetidas=0):
+            self._agregar(self.productos[1:2])
+
+    def test_actualizar_y_eliminar_linea(self):
+        self._agregar(self.productos[:2])
+        with asegurar_presupuesto(4, max_repetidas=0):
+            respuesta = self._post("/ventas/api/linea/actualizar/", {
+                "venta_id": self.venta.id, "linea_id": self.productos[0].id, "cantidad": 5,
+            })
+        self.assertEqual(respuesta.status_code, 200)
+        with asegurar_presupuesto(4, max_repetidas=0):
+            respuesta = self._post("/ventas/api/linea/eliminar/", {
+                "venta_id": self.venta.id, "linea_id": self.productos[1].id,
+            })
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_lineas_desde_cache(self):
+        self._agregar(self.productos[:3])
+        with asegurar_presupuesto(2, max_repetidas=0):
+            respuesta = self.client.get(f"/ventas/api/lineas/{self.venta.id}/")
+        self.assertEqual(len(respuesta.json()["lineas"]), 3)
+
+    def test_lineas_desde_base_sin_n_mas_1(self):
+        self._agregar(self.productos[:2])
+        datos, con_dos = self._lineas_desde_base()
+        self.assertEqual(
+            [linea["id"] for linea in datos["lineas"]], [p.id for p in self.productos[:2]]
+        )
+
+        self._agregar(self.productos[2:])
+        datos, con_diez = self._lineas_desde_base()
+        self.assertEqual(len(datos["lineas"]), 10)
+        self.assertEqual(con_dos, con_diez)
+
+    def test_buscar_productos(self):
+        with asegurar_presupuesto(3, max_repetidas=0):
+            respuesta = self.client.get("/ventas/api/buscar-productos/", {"q": "Producto"})
+        self.assertEqual(len(respuesta.json()["results"]), 10)
+
+    def test_producto_info(self):
+        with asegurar_presupuesto(2, max_repetidas=0):
+            respuesta = self.client.get(f"/ventas/api/producto/{self.productos[0].id}/")
+        self.assertEqual(respuesta.json()["id"], self.productos[0].id)
+
+    def test_ventas_recientes(self):
+        for i in range(2, 12):
+            Venta.objects.create(
+                numero=f"{i:06d}", creado_por=self.usuario, canal="POS", estado="PAGADA",
+                subtotal=0, impuesto=0, total=0, descuento_total=0, metodo_pago="EFECTIVO",
+                efectivo_recibido=0, cambio_entregado=0,
+            )
+        with asegurar_presupuesto(2, max_repetidas=0):
+            respuesta = self.client.get("/ventas/api/recientes/")
+        self.assertEqual(len(respuesta.json()["recientes"]), 11)
+
+
+class PermisosApiClientesTests(TestCase):
+    """La API de clientes y los bulk/ no aceptan anónimos ni usuarios sin permiso."""
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Ana", email="ana@sipv.test")
+        self.lote = [{"nombre": "Luis", "email": "luis@sipv.test"}]
+
+    def _bulk(self, url, metodo="post"):
+        return getattr(self.client, metodo)(url, json.dumps(self.lote), content_type="application/json")
+
+    def test_anonimo(self):
+        self.assertIn(self.client.get("/ventas/api/v1/clientes/").status_code, (401, 403))
+        self.assertIn(self._bulk("/ventas/api/v1/clientes/bulk/").status_code, (401, 403))
+        self.assertIn(self._bulk("/ventas/api/v1/abonos/bulk/").status_code, (401, 403))
+        self.assertFalse(Cliente.objects.filter(email="luis@sipv.test").exists())
+
+    def test_sin_permiso_de_modelo(self):
+        self.client.force_login(User.objects.create_user("vendedor", password="x"))
+        self.assertEqual(self.client.get("/ventas/api/v1/clientes/").status_code, 200)
+        self.assertEqual(self._bulk("/ventas/api/v1/clientes/bulk/").status_code, 403)
+
+    def test_upsert_pide_agregar_y_cambiar(self):
+        usuario = User.objects.create_user("cartera", password="x")
+        usuario.user_permissions.add(Permission.objects.get(codename="change_cliente"))
+        self.client.force_login(usuario)
+        self.assertEqual(self._bulk("/ventas/api/v1/clientes/bulk/", "put").status_code, 403)
+
+        usuario.user_permissions.add(Permission.objects.get(codename="add_cliente"))
+        self.client.force_login(User.objects.get(pk=usuario.pk))
+        respuesta = self._bulk("/ventas/api/v1/clientes/bulk/", "put")
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()["creados"], 1)
+
+
+@override_settings(CACHES=CACHES_PRUEBA, SIPV_NUMERACION_SAR=True, SIPV_FACTURAR_AL_COBRAR=True)
+class SincronizacionSinNumeracionTests(TestCase):
+    """Sin rango CAI vigente, las ventas offline se guardan sin factura y con aviso."""
+
+    def setUp(self):
+        for alias in CACHES_PRUEBA:
+            caches[alias].clear()
+        self.client.force_login(User.objects.create_superuser("caja1", "caja1@sipv.test", "x"))
+        self.producto = Producto.objects.create(
+            nombre="Café 400 g", codigo_barras="7421000000017",
+            precio_venta=Decimal("95.00"), impuesto=Decimal("0.15"),
+        )
+
+    def _sincronizar(self, **extra):
+        lote = {"ventas": [{
+            "uuid": str(uuid.uuid4()), "metodo_pago": "EFECTIVO", "efectivo": "200",
+            "lineas": [{"producto_id": self.producto.id, "cantidad": 1}],
+        }], **extra}
+        return self.client.post("/ventas/api/sincronizar/", json.dumps(lote), content_type="application/json")
+
+    def test_guarda_sin_factura_y_avisa(self):
+        respuesta = self._sincronizar()
+        self.assertEqual(respuesta.status_code, 200)
+        resultado = respuesta.json()["resultados"][0]
+        self.assertEqual(resultado["estado"], "creada")
+        self.assertTrue(any(a.startswith("Guardada sin factura") for a in resultado["avisos"]))
+        self.assertEqual(Factura.objects.count(), 0)
+
+        # Con un rango registrado, la facturación de cierre la recoge
+        secuencia = SecuenciaFiscal.objects.create()
+        RangoCAI.objects.create(
+            secuencia=secuencia, cai="CAI-PRUEBA", inicio=1, fin=100,
+            fecha_limite=timezone.localdate() + timedelta(days=30),
+        )
+        self.assertEqual(len(facturar_pendientes()), 1)
+        self.assertEqual(Factura.objects.get().venta_id, resultado["venta_id"])
+
+    @override_settings(SIPV_FACTURAR_AL_COBRAR=False)
+    def test_sin_facturar_al_cobrar_no_factura(self):
+        resultado = self._sincronizar().json()["resultados"][0]
+        self.assertEqual(resultado["estado"], "creada")
+        self.assertFalse(any("sin factura" in a for a in resultado.get("avisos", [])))
+        self.assertEqual(Factura.objects.count(), 0)
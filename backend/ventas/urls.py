@@ -1,7 +1,7 @@
 # ventas/urls.py
 from django.urls import path
-from . import views
-from ventas.api import CuentaPorCobrarViewSet, AbonoViewSet
+from . import views, views_async
+from ventas.api import ClienteViewSet, CuentaPorCobrarViewSet, AbonoViewSet
 from rest_framework import routers
 from django.urls import path, include
 
@@ -10,21 +10,26 @@ app_name = "ventas"
 router = routers.DefaultRouter()
 router.register(r'cuentas-por-cobrar', CuentaPorCobrarViewSet)
 router.register(r'abonos', AbonoViewSet)
+router.register(r'clientes', ClienteViewSet)
 
 urlpatterns = [
     path("", views.dashboard, name="dashboard"),
-    path("api/buscar-productos/", views.api_buscar_productos, name="api_buscar_productos"),
+    path("api/buscar-productos/", views_async.api_buscar_productos, name="api_buscar_productos"),
     path("api/finalizar/", views.api_finalizar_venta, name="api_finalizar"),
     path("api/todos/", views.api_todos_productos, name="api_todos"),
     path("crear/", views.crear_orden, name="crear_orden"),
     path("detalle/<int:pk>/", views.detalle, name="detalle"),
     path("api/detalle/<int:pk>/completar/", views.api_completar_venta, name="api_completar"),
+    path("api/sincronizar/", views.api_sincronizar, name="api_sincronizar"),
+    path("api/catalogo/", views.api_catalogo, name="api_catalogo"),
     path("api/linea/agregar/", views.api_linea_agregar, name="linea_agregar"),
     path("api/linea/actualizar/", views.api_linea_actualizar, name="linea_actualizar"),
     path("api/linea/eliminar/", views.api_linea_eliminar, name="linea_eliminar"),
-    path("api/recientes/", views.ventas_recientes_api, name="ventas_recientes_api"),
-    path("api/lineas/<int:venta_id>/", views.api_lineas, name="api_lineas"),
+    path("api/recientes/", views_async.ventas_recientes_api, name="ventas_recientes_api"),
+    path("api/lineas/<int:venta_id>/", views_async.api_lineas, name="api_lineas"),
+    path("api/producto/<int:pk>/", views_async.api_producto_info, name="api_producto_info"),
     path("api/detalle/<int:pk>/cancelar/", views.api_cancelar_orden, name="api_cancelar"),
+    path("api/detalle/<int:pk>/aparcar/", views.api_aparcar_orden, name="api_aparcar"),
     path("api/detalle/<int:pk>/anular/", views.api_anular_orden, name="api_anular"),
     path("api/cliente-info/<int:cliente_id>/", views.api_cliente_info, name="api_cliente_info"),
     path("api/buscar-clientes/", views.api_buscar_clientes, name="api_buscar_clientes"),
@@ -1,8 +1,9 @@
 # ventas/views.py
 
 from django.contrib.auth.decorators import login_required, permission_required
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_POST
 
 from django.core.paginator import Paginator
@@ -14,18 +15,28 @@ from django.db.models import Q, Sum, F, Count
 from django.db.models.functions import TruncDate
 
 from decimal import Decimal
+import gzip
 import json
 from datetime import datetime, date
 
 from maestros.models import Producto
 from inventario.models import MovimientoInventario, Existencia
-from common.permisos import permisos_modulos
+from common.condicional import condicional
+from common.consultas import presupuesto_consultas
+from common.fechas import rango_dia, rango_mes, rango_parametros
+from common.fragmentos import widget
 from django.contrib.auth.models import User
 
 from .models import Venta, VentaDetalle, Cliente
-from facturas.models import Factura, FacturaDetalle
+from facturas.servicios import facturar_ventas
+from sar.numeracion import NumeracionAgotada
 from .models import CuentaPorCobrar, Abono
 from .forms import AbonoForm
+from .sincronizacion import MAX_VENTAS_LOTE, sincronizar_ventas
+from .catalogo import snapshot_completo, snapshot_delta
+from . import carrito as carrito_pos
+from common.impuestos import CERO, calcular_linea, decimal, dinero
+from common.json_rapido import RespuestaJSON, codificador, texto
 
 def dashboard(request):
     # ============================
@@ -39,13 +50,8 @@ def dashboard(request):
     cliente_filtro = request.GET.get("cliente")
     estado_filtro = request.GET.get("estado")
 
-    # Filtro por fecha inicio
-    if fecha_inicio:
-        ventas = ventas.filter(creado__date__gte=fecha_inicio)
-
-    # Filtro por fecha fin
-    if fecha_fin:
-        ventas = ventas.filter(creado__date__lte=fecha_fin)
+    # Filtro por fechas (días locales, inicio y fin incluidos)
+    ventas = ventas.filter(**rango_parametros(request.GET, "creado", "inicio", "fin"))
 
     # Filtro por usuario/cajero
     if usuario:
@@ -57,12 +63,31 @@ def dashboard(request):
     # Filtrar por estado
     if estado_filtro:
         ventas = ventas.filter(estado=estado_filtro)
+
+    # KPIs y gráficas no dependen de los filtros: se sirven del cache
+    kpis = widget("ventas:dashboard", _kpis_dashboard, grupos=("ventas",), ttl=30)
+
+    # ============================
+    # CONTEXTO FINAL
+    # ============================
+    contexto = {
+        "ventas": ventas.order_by("-creado"),
+
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        **kpis,
+    }
+
+    return render(request, "ventas/dashboard.html", contexto)
+
+
+def _kpis_dashboard():
     # ============================
     # TOTAL HOY
     # ============================
     hoy = timezone.localdate()
     total_dia = (
-        Venta.objects.filter(creado__date=hoy)
+        Venta.objects.filter(**rango_dia("creado", hoy))
         .aggregate(Sum("total"))["total__sum"] or 0
     )
 
@@ -71,7 +96,7 @@ def dashboard(request):
     # ============================
     hoy = timezone.localdate()
     total_mes = (
-        Venta.objects.filter(creado__year=hoy.year, creado__month=hoy.month)
+        Venta.objects.filter(**rango_mes("creado", hoy))
         .aggregate(Sum("total"))["total__sum"] or 0
     )
 
@@ -83,7 +108,7 @@ def dashboard(request):
     # ============================
     # VENTAS RECIENTES
     # ============================
-    recientes = Venta.objects.order_by("-creado")[:5]
+    recientes = list(Venta.objects.order_by("-creado")[:5])
 
 
     # === GRÁFICAS ===
@@ -115,30 +140,17 @@ def dashboard(request):
         "data": [float(v["total"]) for v in ventas_por_cajero],
     }
 
-
-
-
-
-    # ============================
-    # CONTEXTO FINAL
-    # ============================
-    contexto = {
-        "ventas": ventas.order_by("-creado"),
+    return {
         "recientes": recientes,
 
         "total_dia": total_dia,
         "total_mes": total_mes,
         "total_ventas": total_ventas,
 
-        "fecha_inicio": fecha_inicio,
-        "fecha_fin": fecha_fin,
-
         "grafica_dias": grafica_dias,
         "grafica_cajeros": grafica_cajeros,
     }
 
-    return render(request, "ventas/dashboard.html", contexto)
-
 
 
 
@@ -152,8 +164,7 @@ def pos_dashboard(request):
     """
     ctx = {}
     ctx["recientes"] = Venta.objects.select_related("cajero").order_by("-creado")[:10]
-    # para que la navbar sepa qué módulos mostrar
-    ctx |= permisos_modulos(request.user)
+    # los flags de la navbar los agrega el context processor permisos_modulos
     return render(request, "ventas/pos_dashboard.html", ctx)
 
 def recientes_ventas():
@@ -161,28 +172,6 @@ def recientes_ventas():
 
 
 
-@login_required
-def api_buscar_productos(request):
-    q = request.GET.get("q", "").strip()
-
-    productos = Producto.objects.filter(
-        Q(nombre__icontains=q) |
-        Q(codigo_barras__icontains=q)
-    ).values("id", "nombre", "precio_venta", "codigo_barras", "impuesto")[:20]
-
-    results = [
-        {
-            "id": p["id"],
-            "nombre": p["nombre"],
-            "precio": float(p["precio_venta"]),
-            "codigo": p["codigo_barras"] or "",
-            "impuesto": float(p["impuesto"])
-        }
-        for p in productos
-    ]
-
-    return JsonResponse({"ok": True, "results": results})
-
 @login_required
 def api_buscar_clientes(request):
     q = request.GET.get("q", "").strip()
@@ -203,20 +192,17 @@ def api_buscar_clientes(request):
 
     return JsonResponse({"results": data})
 
+_PRODUCTO_POS = codificador(("id", None), ("nombre", None), ("precio", float), ("codigo", texto))
+
+
 @login_required
+@condicional(catalogo=True)
 def api_todos_productos(request):
-    productos = Producto.objects.filter(activo=True).values(
+    productos = Producto.objects.filter(activo=True).values_list(
         "id", "nombre", "precio_venta", "codigo_barras"
     )[:50]
 
-    results = [{
-        "id": p["id"],
-        "nombre": p["nombre"],
-        "precio": float(p["precio_venta"]),
-        "codigo": p["codigo_barras"] or ""
-    } for p in productos]
-
-    return JsonResponse({"ok": True, "results": results})
+    return RespuestaJSON({"ok": True, "results": [_PRODUCTO_POS(p) for p in productos]})
 
 @login_required
 def api_agregar_linea(request):
@@ -262,11 +248,7 @@ def ventas_list(request):
             Q(cliente__nombre__icontains=q)
         )
 
-    if fecha_desde:
-        ventas = ventas.filter(creado__date__gte=fecha_desde)
-
-    if fecha_hasta:
-        ventas = ventas.filter(creado__date__lte=fecha_hasta)
+    ventas = ventas.filter(**rango_parametros(request.GET, "creado", "fecha_desde", "fecha_hasta"))
 
     if cajero:
         ventas = ventas.filter(cajero_id=cajero)
@@ -307,7 +289,6 @@ def ventas_list(request):
         "estado": estado,
     }
 
-    ctx |= permisos_modulos(request.user)
     return render(request, "ventas/ventas_list.html", ctx)
 
 
@@ -386,9 +367,7 @@ def api_crear_orden(request):
         cant = Decimal(str(item["cantidad"]))
         precio = Decimal(str(item["precio"]))
 
-        subtotal_line = cant * precio
-        impuesto_line = subtotal_line * Decimal("0.15")
-        total_line = subtotal_line + impuesto_line
+        subtotal_line, impuesto_line, total_line = calcular_linea(cant, precio, prod.impuesto)
 
         VentaDetalle.objects.create(
             venta=orden,
@@ -419,7 +398,7 @@ def api_finalizar_venta(request):
         return JsonResponse({"ok": False, "error": f"JSON inválido: {e}"}, status=400)
 
     lineas = data.get("lineas")
-    pago = Decimal(data.get("pago", 0))
+    pago = decimal(data.get("pago", 0))
 
     if not lineas or not isinstance(lineas, list):
         return JsonResponse({"ok": False, "error": "No hay líneas en la venta."}, status=400)
@@ -463,7 +442,7 @@ def api_finalizar_venta(request):
             for item in lineas:
 
                 prod_id = item.get("id")
-                cantidad = Decimal(item.get("cantidad", 0))
+                cantidad = decimal(item.get("cantidad", 0))
 
                 if not prod_id or cantidad <= 0:
                     return JsonResponse({"ok": False, "error": "Formato inválido en líneas."}, status=400)
@@ -484,12 +463,10 @@ def api_finalizar_venta(request):
                         "error": f"Stock insuficiente para {prod.nombre}. Disponible: {existencia}"
                     }, status=400)
 
-                # Impuesto por producto (tu POS lo manda)
-                impuesto_pct = Decimal(str(item.get("impuesto", prod.impuesto)))
-
-                subtotal_linea = cantidad * prod.precio_venta
-                impuesto_linea = subtotal_linea * impuesto_pct
-                total_linea = subtotal_linea + impuesto_linea
+                # La tasa es la del producto, no la que mande el cliente
+                subtotal_linea, impuesto_linea, total_linea = calcular_linea(
+                    cantidad, prod.precio_venta, prod.impuesto
+                )
 
                 # Crear detalle
                 VentaDetalle.objects.create(
@@ -544,7 +521,7 @@ def api_pago(request):
     venta_id = data.get("venta_id")
     metodo = data.get("metodo")
     ref = data.get("ref", "")
-    pago = Decimal(data.get("pago", 0))
+    pago = decimal(data.get("pago", 0))
     lineas = data.get("lineas", [])
 
     if not venta_id:
@@ -575,8 +552,7 @@ def api_pago(request):
 
             for l in lineas:
                 prod_id = l.get("id")
-                cantidad = Decimal(l.get("cantidad", 0))
-                impuesto_pct = Decimal(str(l.get("impuesto")))
+                cantidad = Decimal(str(l.get("cantidad", 0)))
 
                 if not prod_id or cantidad <= 0:
                     return JsonResponse({"ok": False, "error": "Línea inválida"}, status=400)
@@ -587,9 +563,7 @@ def api_pago(request):
                     return JsonResponse({"ok": False, "error": "Producto inválido"}, status=404)
 
                 precio = prod.precio_venta
-                subtotal = precio * cantidad
-                impuesto = subtotal * impuesto_pct
-                total = subtotal + impuesto
+                subtotal, impuesto, total = calcular_linea(cantidad, precio, prod.impuesto)
 
                 # Crear detalle actualizado
                 VentaDetalle.objects.create(
@@ -668,37 +642,61 @@ def api_pago(request):
         return JsonResponse({"ok": False, "error": str(e)}, status=500)
 
 
+@presupuesto_consultas(12)
 def detalle(request, pk):
-    venta = get_object_or_404(Venta, pk=pk)
+    venta = get_object_or_404(Venta.objects.select_related("factura_sipv"), pk=pk)
     detalles = venta.detalles.select_related("producto")
-    factura = Factura.objects.filter(numero=f"FV-{venta.numero}").first()
+    factura = getattr(venta, "factura_sipv", None)
 
+    # Los clientes se buscan por AJAX (api_buscar_clientes); no cargar la tabla completa
     return render(request, "ventas/detalle.html", {
         "venta": venta,
         "detalles": detalles,
-        "clientes": Cliente.objects.all().order_by("nombre"),
         "factura": factura,
     })
 
 
 
-@transaction.atomic
 def api_completar_venta(request, pk):
     if request.method != "POST":
         return JsonResponse({"ok": False, "error": "Método no permitido"}, status=405)
 
-    venta = get_object_or_404(Venta, pk=pk)
+    # El candado de la canasta se suelta después del commit (y del descarte
+    # del cache): un escaneo que llegue mientras se cobra espera y luego
+    # encuentra la orden cerrada, en vez de perderse
+    try:
+        with carrito_pos.bloqueado(pk):
+            return _completar_venta(request, pk)
+    except carrito_pos.CarritoOcupado as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=409)
+
+
+@transaction.atomic
+def _completar_venta(request, pk):
+    venta = get_object_or_404(Venta.objects.select_for_update(), pk=pk)
+
+    if venta.estado != "BORRADOR":
+        return JsonResponse({"ok": False, "error": "La orden ya no está en borrador."}, status=400)
+
+    # Primera y única escritura de las líneas: la canasta pasa a VentaDetalle
+    carrito = carrito_pos.obtener(venta)
+    if not carrito["lineas"]:
+        return JsonResponse({"ok": False, "error": "La orden no tiene productos."}, status=400)
+    carrito_pos.persistir(venta, carrito)
 
     data = json.loads(request.body.decode("utf-8"))
     metodo = data.get("metodo")
-    efectivo = data.get("efectivo", 0)
     referencia = data.get("referencia", "")
     cliente_id = data.get("cliente")
+    try:
+        efectivo = dinero(data.get("efectivo") or 0)
+    except ArithmeticError:
+        return JsonResponse({"ok": False, "error": "Monto de efectivo inválido."}, status=400)
 
     # -----------------------------
     # VALIDACIONES
     # -----------------------------
-    if metodo == "EFECTIVO" and float(efectivo) < float(venta.total):
+    if metodo == "EFECTIVO" and efectivo < venta.total:
         return JsonResponse({"ok": False, "error": "El efectivo recibido es insuficiente."}, status=400)
 
     if metodo in ("TARJETA", "TRANSFERENCIA") and not referencia:
@@ -712,7 +710,7 @@ def api_completar_venta(request, pk):
     # -----------------------------
     venta.metodo_pago = metodo
     venta.efectivo_recibido = efectivo
-    venta.cambio_entregado = max(0, float(efectivo) - float(venta.total))
+    venta.cambio_entregado = max(CERO, efectivo - venta.total)
     venta.referencia_pago = referencia
     venta.cajero = request.user
     if cliente_id:
@@ -745,104 +743,142 @@ def api_completar_venta(request, pk):
     # ============================================================
 
 
-    factura = Factura.objects.create(
-        tipo="VENTA",
-        numero=f"FV-{venta.numero}",
-        cliente=venta.cliente,
-        fecha=timezone.now(),
-        subtotal=venta.subtotal,
-        impuesto=venta.impuesto,
-        total=venta.total,
-        metodo_pago=venta.metodo_pago,
-        referencia_pago=venta.referencia_pago,
-        efectivo_recibido=venta.efectivo_recibido,
-        cambio_entregado=venta.cambio_entregado,
-        creado_por=request.user,
-        venta=venta,
-    )
-
-    # Crear líneas de factura
-    for det in venta.detalles.all():
-        FacturaDetalle.objects.create(
-            factura=factura,
-            producto=det.producto,
-            cantidad=det.cantidad,
-            precio_unitario=det.precio_unitario,
-            subtotal=det.subtotal,
-            impuesto=det.impuesto,
-            total=det.total
-        )
+    # Con SIPV_FACTURAR_AL_COBRAR=False la venta se factura en el cierre
+    # del día (facturar_pendientes); el cobro no espera la factura
+    factura_id = None
+    if settings.SIPV_FACTURAR_AL_COBRAR:
+        try:
+            factura_id = facturar_ventas([venta], request.user)[venta.pk].pk
+        except NumeracionAgotada as e:
+            # Sin número fiscal no se puede facturar: se deshace el cobro completo
+            transaction.set_rollback(True)
+            return JsonResponse({"ok": False, "error": str(e)}, status=409)
 
     # ============================================================
 
-    return JsonResponse({"ok": True, "venta": venta.numero, "factura_id": factura.id})
+    transaction.on_commit(lambda: carrito_pos.descartar(venta.pk))
+    return JsonResponse({"ok": True, "venta": venta.numero, "factura_id": factura_id})
 
 
     
+# ============================
+# SINCRONIZACIÓN DE TERMINALES
+# ============================
+@require_POST
+@login_required
+@permission_required("ventas.add_venta", raise_exception=True)
+def api_sincronizar(request):
+    """
+    Recibe una canasta completa o un lote de ventas hechas sin conexión:
+      {"ventas": [{"uuid", "lineas": [{"producto_id", "cantidad", "precio"?}],
+                   "metodo_pago", "efectivo", "referencia", "cliente_id", "fecha"?}],
+       "facturar": true}
+    Sin "facturar" se sigue SIPV_FACTURAR_AL_COBRAR. Es idempotente por uuid. Responde un resultado por venta, en el mismo orden.
+    """
+    try:
+        data = json.loads(request.body.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({"ok": False, "error": "JSON inválido"}, status=400)
+
+    ventas = data.get("ventas") if isinstance(data, dict) else None
+    if not isinstance(ventas, list) or not ventas:
+        return JsonResponse({"ok": False, "error": "No hay ventas en el lote."}, status=400)
+
+    if len(ventas) > MAX_VENTAS_LOTE:
+        return JsonResponse({
+            "ok": False,
+            "error": f"Máximo {MAX_VENTAS_LOTE} ventas por lote."
+        }, status=400)
+
+    resultados = sincronizar_ventas(ventas, request.user, facturar=data.get("facturar", settings.SIPV_FACTURAR_AL_COBRAR))
+    return JsonResponse({
+        "ok": all(r["estado"] != "error" for r in resultados),
+        "resultados": resultados,
+    })
+
+
+@login_required
+@presupuesto_consultas(6, max_repetidas=0)
+def api_catalogo(request):
+    """
+    Catálogo para búsqueda local en la terminal (ver ventas/catalogo.py).
+    Sin parámetros: completo. Con ?since=<versión>: solo los cambios.
+    """
+    since = request.GET.get("since", "")
+    if since:
+        if not since.isdigit():
+            return JsonResponse({"ok": False, "error": "since debe ser una versión numérica"}, status=400)
+        version, comprimido = snapshot_delta(int(since))
+    else:
+        version, comprimido = snapshot_completo()
+
+    if "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", ""):
+        response = HttpResponse(comprimido, content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(gzip.decompress(comprimido), content_type="application/json")
+
+    response["Vary"] = "Accept-Encoding"
+    response["X-Catalogo-Version"] = str(version)
+    return response
+
+
 # ============================
 # AGREGAR PRODUCTO A LA ORDEN
 # ============================
+# Las líneas de una orden en BORRADOR viven en ventas/carrito.py (cache);
+# la base de datos se escribe al cobrar o al aparcar la orden.
+
+def _json_body(request):
+    try:
+        return json.loads(request.body.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _cantidad(valor, defecto="1"):
+    try:
+        return Decimal(str(valor if valor is not None else defecto))
+    except (ArithmeticError, ValueError):
+        return None
+
+
 @require_POST
 @login_required
+@presupuesto_consultas(5, max_repetidas=0)   # sesión + usuario + producto (+2 si la canasta no está en cache)
 def api_linea_agregar(request):
-    data = json.loads(request.body.decode("utf-8"))
+    data = _json_body(request) or {}
     venta_id = data.get("venta_id")
     prod_id = data.get("producto_id")
-    cantidad = Decimal(str(data.get("cantidad", 1)))
+    cantidad = _cantidad(data.get("cantidad"))
 
-    if not venta_id or not prod_id:
+    if not venta_id or not prod_id or not cantidad or cantidad <= 0:
         return JsonResponse({"ok": False, "error": "Datos incompletos"}, status=400)
 
-    venta = get_object_or_404(Venta, pk=venta_id)
-    prod = get_object_or_404(Producto, pk=prod_id)
-
-    # Crear o sumar
-    linea, created = VentaDetalle.objects.get_or_create(
-        venta=venta,
-        producto=prod,
-        defaults={
-            "cantidad": cantidad,
-            "precio_unitario": prod.precio_venta,
-            "subtotal": cantidad * prod.precio_venta,
-            "impuesto": (cantidad * prod.precio_venta) * prod.impuesto,
-            "total": (cantidad * prod.precio_venta) * (1 + prod.impuesto),
-        }
-    )
-
-    # Si ya existía → sumar
-    if not created:
-        linea.cantidad += cantidad
-        linea.subtotal = linea.cantidad * prod.precio_venta
-        linea.impuesto = linea.subtotal * prod.impuesto
-        linea.total = linea.subtotal + linea.impuesto
-        linea.save()
-
-    # actualizar totales de la venta
-    totales = venta.detalles.aggregate(
-        subtotal=Sum("subtotal"),
-        impuesto=Sum("impuesto"),
-        total=Sum("total"),
+    prod = get_object_or_404(
+        Producto.objects.select_related("categoria", "proveedor", "existencia"), pk=prod_id
     )
 
-    venta.subtotal = totales["subtotal"] or 0
-    venta.impuesto = totales["impuesto"] or 0
-    venta.total = totales["total"] or 0
-    venta.save()
+    try:
+        with carrito_pos.bloqueado(venta_id):
+            carrito = carrito_pos.cargar(venta_id)
+            linea = carrito_pos.agregar(carrito, prod, cantidad)
+            carrito_pos.guardar(carrito)
+    except Venta.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "La orden no existe"}, status=404)
+    except (carrito_pos.OrdenCerrada, carrito_pos.CarritoOcupado) as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=409)
 
     return JsonResponse({
         "ok": True,
         "linea": {
-            "id": linea.id,
+            "id": prod.id,
             "producto": prod.nombre,
-            "cantidad": float(linea.cantidad),
-            "precio": float(prod.precio_venta),
-            "subtotal": float(linea.total),
+            "cantidad": float(linea["cantidad"]),
+            "precio": float(linea["precio"]),
+            "subtotal": float(linea["total"]),
         },
-        "totales": {
-            "subtotal": float(venta.subtotal),
-            "impuesto": float(venta.impuesto),
-            "total": float(venta.total),
-        }
+        "totales": carrito_pos.a_json(carrito)["totales"],
     })
 
 
@@ -851,41 +887,37 @@ def api_linea_agregar(request):
 # ============================
 @require_POST
 @login_required
+@presupuesto_consultas(4, max_repetidas=0)   # sesión + usuario (+2 si la canasta no está en cache)
 def api_linea_actualizar(request):
-    data = json.loads(request.body.decode("utf-8"))
-    linea_id = data.get("linea_id")
-    cantidad = Decimal(str(data.get("cantidad", 1)))
-
-    linea = get_object_or_404(VentaDetalle, pk=linea_id)
-    venta = linea.venta
-
-    # actualizar cantidad
-    linea.cantidad = cantidad
-    linea.subtotal = cantidad * linea.precio_unitario
-    linea.impuesto = linea.subtotal * linea.producto.impuesto
-    linea.total = linea.subtotal + linea.impuesto
-    linea.save()
-
-    # actualizar totales globales
-    totales = venta.detalles.aggregate(
-        subtotal=Sum("subtotal"),
-        impuesto=Sum("impuesto"),
-        total=Sum("total")
-    )
+    data = _json_body(request) or {}
+    venta_id = data.get("venta_id")
+    linea_id = data.get("linea_id")      # id del producto
+    cantidad = _cantidad(data.get("cantidad"))
 
-    venta.subtotal = totales["subtotal"] or 0
-    venta.impuesto = totales["impuesto"] or 0
-    venta.total = totales["total"] or 0
-    venta.save()
+    if not venta_id or not linea_id or cantidad is None:
+        return JsonResponse({"ok": False, "error": "Datos incompletos"}, status=400)
+
+    try:
+        with carrito_pos.bloqueado(venta_id):
+            carrito = carrito_pos.cargar(venta_id)
+            linea = carrito["lineas"].get(str(linea_id))
+            if linea is None:
+                return JsonResponse({"ok": False, "error": "La línea no existe"}, status=404)
+
+            if cantidad <= 0:
+                carrito_pos.quitar(carrito, linea_id)
+            else:
+                carrito_pos.fijar_cantidad(carrito, linea, cantidad)
+            carrito_pos.guardar(carrito)
+    except Venta.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "La orden no existe"}, status=404)
+    except (carrito_pos.OrdenCerrada, carrito_pos.CarritoOcupado) as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=409)
 
     return JsonResponse({
         "ok": True,
-        "linea_total": float(linea.total),
-        "totales": {
-            "subtotal": float(venta.subtotal),
-            "impuesto": float(venta.impuesto),
-            "total": float(venta.total),
-        }
+        "linea_total": float(linea["total"]) if cantidad > 0 else 0,
+        "totales": carrito_pos.a_json(carrito)["totales"],
     })
 
 
@@ -894,103 +926,53 @@ def api_linea_actualizar(request):
 # ============================
 @require_POST
 @login_required
+@presupuesto_consultas(4, max_repetidas=0)
 def api_linea_eliminar(request):
-    data = json.loads(request.body.decode("utf-8"))
-    linea_id = data.get("linea_id")
-
-    linea = get_object_or_404(VentaDetalle, pk=linea_id)
-    venta = linea.venta
-    linea.delete()
+    data = _json_body(request) or {}
+    venta_id = data.get("venta_id")
+    linea_id = data.get("linea_id")      # id del producto
 
-    # recalcular totales de la venta
-    totales = venta.detalles.aggregate(
-        subtotal=Sum("subtotal"),
-        impuesto=Sum("impuesto"),
-        total=Sum("total")
-    )
+    if not venta_id or not linea_id:
+        return JsonResponse({"ok": False, "error": "Datos incompletos"}, status=400)
 
-    venta.subtotal = totales["subtotal"] or 0
-    venta.impuesto = totales["impuesto"] or 0
-    venta.total = totales["total"] or 0
-    venta.save()
+    try:
+        with carrito_pos.bloqueado(venta_id):
+            carrito = carrito_pos.cargar(venta_id)
+            if carrito_pos.quitar(carrito, linea_id) is None:
+                return JsonResponse({"ok": False, "error": "La línea no existe"}, status=404)
+            carrito_pos.guardar(carrito)
+    except Venta.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "La orden no existe"}, status=404)
+    except (carrito_pos.OrdenCerrada, carrito_pos.CarritoOcupado) as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=409)
 
     return JsonResponse({
         "ok": True,
-        "totales": {
-            "subtotal": float(venta.subtotal),
-            "impuesto": float(venta.impuesto),
-            "total": float(venta.total),
-        }
+        "totales": carrito_pos.a_json(carrito)["totales"],
     })
 
-def ventas_recientes_api(request):
-    data = [
-        {
-            "id": v.id,
-            "numero": v.numero,
-            "fecha": v.creado.strftime("%Y-%m-%d %H:%M"),
-            "total": float(v.total),
-            "usuario": v.creado_por.get_full_name() if v.creado_por else "Sistema"
-        }
-        for v in Venta.objects.order_by("-creado")[:20]
-    ]
-    return JsonResponse({"recientes": data})
 
+# ============================
+# APARCAR ORDEN
+# ============================
+@require_POST
 @login_required
-def api_lineas(request, venta_id):
-    venta = get_object_or_404(Venta, pk=venta_id)
-
-    detalles = venta.detalles.select_related("producto__categoria", "producto__proveedor")
-
-    lineas = []
-    for d in detalles:
-
-        p = d.producto
-
-        # Stock real
-        stock = 0
-        if hasattr(p, "existencia") and p.existencia:
-            stock = float(p.existencia.cantidad)
-
-        lineas.append({
-            "id": d.id,
-            "producto_id": p.id,
-            "nombre": p.nombre,
-            "codigo": p.codigo_barras or "",
-            "categoria": p.categoria.nombre if p.categoria else "",
-            "proveedor": p.proveedor.nombre if p.proveedor else "",
-            "impuesto": float(p.impuesto),  # porcentaje real (0.15)
-            "stock": stock,
-
-            # Datos de la línea
-            "cantidad": float(d.cantidad),
-            "precio": float(d.precio_unitario),
-            "subtotal": float(d.subtotal),
-            "impuesto_valor": float(d.impuesto),
-            "total": float(d.total),
-        })
-
-    totales = {
-        "subtotal": float(venta.subtotal),
-        "impuesto": float(venta.impuesto),
-        "total": float(venta.total),
-    }
+def api_aparcar_orden(request, pk):
+    """Guarda la canasta en la base de datos para retomarla después."""
+    venta = get_object_or_404(Venta, pk=pk)
 
-    return JsonResponse({"ok": True, "lineas": lineas, "totales": totales})
+    if venta.estado != "BORRADOR":
+        return JsonResponse({"ok": False, "error": "Solo se aparcan órdenes en borrador."}, status=400)
 
-def api_producto_info(request, pk):
-    p = Producto.objects.get(pk=pk)
+    try:
+        with carrito_pos.bloqueado(venta.pk):
+            carrito = carrito_pos.obtener(venta)
+            carrito_pos.persistir(venta, carrito)
+    except carrito_pos.CarritoOcupado as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=409)
+
+    return JsonResponse({"ok": True, "venta": venta.numero, "total": float(venta.total)})
 
-    return JsonResponse({
-        "id": p.id,
-        "nombre": p.nombre,
-        "codigo": p.codigo_barras or "",
-        "categoria": p.categoria.nombre if p.categoria else "",
-        "proveedor": p.proveedor.nombre if p.proveedor else "",
-        "precio": float(p.precio_venta),
-        "impuesto": float(p.impuesto),
-        "stock": float(p.existencia.cantidad) if hasattr(p, "existencia") else 0,
-    })
 
 # ============================
 #  CANCELAR ORDEN (BORRADOR)
@@ -1006,8 +988,9 @@ def api_cancelar_orden(request, pk):
             "error": "Solo se pueden cancelar órdenes en borrador."
         }, status=400)
 
-    # Borrar las líneas
+    # Borrar las líneas (las guardadas y la canasta en cache)
     venta.detalles.all().delete()
+    carrito_pos.descartar(venta.pk)
 
     # Marcar como cancelada
     venta.estado = "CANCELADA"
@@ -1103,7 +1086,7 @@ def cartera_dashboard(request):
         dia = hoy - timedelta(days=i)
         valor = (
             CuentaPorCobrar.objects
-            .filter(creado__date=dia)
+            .filter(**rango_dia("creado", dia))
             .aggregate(total=Sum("monto_total"))["total"]
             or 0
         )
@@ -1155,17 +1138,13 @@ def cartera_vencidas(request):
 
 @login_required
 def cartera_detalle(request, pk):
-    cuenta = get_object_or_404(CuentaPorCobrar, pk=pk)
+    cuenta = get_object_or_404(
+        CuentaPorCobrar.objects.select_related("cliente", "venta__factura_sipv"), pk=pk
+    )
     abonos = cuenta.abonos.all()
 
-    # ================================
-    # Buscar factura SIN usar venta_id
-    # ================================
-    factura = None
-    if cuenta.venta and cuenta.venta.numero:
-        factura = Factura.objects.filter(
-            numero=f"FV-{cuenta.venta.numero}"
-        ).first()
+    # Factura de la venta por su enlace (Factura.venta)
+    factura = getattr(cuenta.venta, "factura_sipv", None) if cuenta.venta else None
 
     return render(request, "ventas/cartera_detalle.html", {
         "cuenta": cuenta,
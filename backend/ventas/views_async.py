@@ -0,0 +1,142 @@
+# ventas/views_async.py
+"""
+Endpoints JSON de consulta del POS, como vistas async.
+
+Bajo uvicorn (backend.asgi) no ocupan un worker mientras esperan a la base
+de datos, así que un PDF o un reporte pesado no frena las búsquedas de las
+cajas. Bajo gunicorn/WSGI siguen funcionando: Django las ejecuta con
+async_to_sync.
+
+Solo lectura y con el ORM async (async for, aget, afirst); la escritura del
+POS sigue en views.py. Las listas salen de values_list() con los
+codificadores de common.json_rapido.
+"""
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+
+from common.asincrono import login_requerido_async
+from common.consultas import presupuesto_consultas
+from common.json_rapido import RespuestaJSON, codificador, texto
+from maestros.models import Producto
+from . import carrito as carrito_pos
+from .models import Venta
+
+
+def _numero_o_cero(valor):
+    return float(valor) if valor is not None else 0
+
+
+_PRODUCTO_BUSQUEDA = codificador(
+    ("id", None),
+    ("nombre", None),
+    ("precio", float),
+    ("codigo", texto),
+    ("impuesto", float),
+)
+
+_VENTA_RECIENTE = codificador(
+    ("id", None),
+    ("numero", None),
+    ("fecha", lambda d: d.strftime("%Y-%m-%d %H:%M")),
+    ("total", float),
+    ("usuario", None),
+)
+
+_LINEA = codificador(
+    ("id", None),
+    ("producto_id", None),
+    ("nombre", None),
+    ("codigo", texto),
+    ("categoria", texto),
+    ("proveedor", texto),
+    ("impuesto", float),          # porcentaje real (0.15)
+    ("stock", _numero_o_cero),    # sin Existencia → 0
+    ("cantidad", float),
+    ("precio", float),
+    ("subtotal", float),
+    ("impuesto_valor", float),
+    ("total", float),
+)
+# "id" de la línea = id del producto, igual que carrito.a_json(): es el
+# linea_id que esperan api_linea_actualizar / api_linea_eliminar
+_CAMPOS_LINEA = (
+    "producto_id", "producto_id", "producto__nombre", "producto__codigo_barras",
+    "producto__categoria__nombre", "producto__proveedor__nombre", "producto__impuesto",
+    "producto__existencia__cantidad", "cantidad", "precio_unitario", "subtotal",
+    "impuesto", "total",
+)
+
+
+@login_requerido_async
+@presupuesto_consultas(3, max_repetidas=0)
+async def api_buscar_productos(request):
+    q = request.GET.get("q", "").strip()
+
+    productos = Producto.objects.filter(
+        Q(nombre__icontains=q) |
+        Q(codigo_barras__icontains=q)
+    ).values_list("id", "nombre", "precio_venta", "codigo_barras", "impuesto")[:20]
+
+    results = [_PRODUCTO_BUSQUEDA(p) async for p in productos]
+    return RespuestaJSON({"ok": True, "results": results})
+
+
+@presupuesto_consultas(2, max_repetidas=0)
+async def ventas_recientes_api(request):
+    ventas = Venta.objects.order_by("-creado").values_list(
+        "id", "numero", "creado", "total",
+        "creado_por_id", "creado_por__first_name", "creado_por__last_name",
+    )[:20]
+    data = [
+        # Mismo texto que User.get_full_name(); sin usuario: "Sistema"
+        _VENTA_RECIENTE((*v[:4], f"{v[5]} {v[6]}".strip() if v[4] else "Sistema"))
+        async for v in ventas
+    ]
+    return RespuestaJSON({"recientes": data})
+
+
+@login_requerido_async
+@presupuesto_consultas(4, max_repetidas=0)
+async def api_lineas(request, venta_id):
+    carrito = await carrito_pos.aen_cache(venta_id)
+    if carrito is not None:
+        return RespuestaJSON({"ok": True, **carrito_pos.a_json(carrito)})
+
+    venta = await Venta.objects.filter(pk=venta_id).afirst()
+    if venta is None:
+        raise Http404("La orden no existe")
+
+    # Una consulta con los JOIN de producto, categoría, proveedor y existencia
+    lineas = [
+        _LINEA(d) async for d in venta.detalles.order_by("pk").values_list(*_CAMPOS_LINEA)
+    ]
+
+    totales = {
+        "subtotal": float(venta.subtotal),
+        "impuesto": float(venta.impuesto),
+        "total": float(venta.total),
+    }
+
+    return RespuestaJSON({"ok": True, "lineas": lineas, "totales": totales})
+
+
+@presupuesto_consultas(2, max_repetidas=0)
+async def api_producto_info(request, pk):
+    p = await (
+        Producto.objects.select_related("categoria", "proveedor", "existencia")
+        .filter(pk=pk)
+        .afirst()
+    )
+    if p is None:
+        raise Http404("El producto no existe")
+
+    return JsonResponse({
+        "id": p.id,
+        "nombre": p.nombre,
+        "codigo": p.codigo_barras or "",
+        "categoria": p.categoria.nombre if p.categoria else "",
+        "proveedor": p.proveedor.nombre if p.proveedor else "",
+        "precio": float(p.precio_venta),
+        "impuesto": float(p.impuesto),
+        "stock": float(p.existencia.cantidad) if hasattr(p, "existencia") else 0,
+    })